@@ -0,0 +1,61 @@
+"""
+Compare the memory footprint and file size of the dataframes returned by the scraper with compact dtypes and a parquet dataset.
+The teams are fetched from the local Holdet.dk stand-in
+
+    python benchmarks/bench_dataset.py --teams 2000
+"""
+import argparse
+import shutil
+import sys
+import tempfile
+import time
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).parent.parent))
+sys.path.insert(0, str(Path(__file__).parent))
+
+from dataset import compact_dtypes, read_dataset, write_dataset
+from holdetdk_scraper import HoldetScraper
+from standin_server import GAME, StandinSite, start_server
+
+def size(path: Path) -> int:
+  return sum(file.stat().st_size for file in path.rglob('*') if file.is_file()) if path.is_dir() else path.stat().st_size
+
+def timed(fn):
+  start = time.perf_counter()
+  result = fn()
+  return result, time.perf_counter() - start
+
+if __name__ == '__main__':
+  parser = argparse.ArgumentParser(description='Benchmark compact dtypes and the parquet dataset against the current dataframes')
+  parser.add_argument('--teams', type=int, default=2000)
+  parser.add_argument('--excel', action='store_true', help='also time .to_excel(), which is slow for many teams')
+  args = parser.parse_args()
+
+  server = start_server(StandinSite(contestants=args.teams))
+  scraper = HoldetScraper(max_workers=8, parser='lxml', base_url=f'http://127.0.0.1:{server.server_port}')
+  table, teams = scraper.get_table_and_teams(game=GAME, top=args.teams)
+  server.shutdown()
+
+  for name, df in (('tabel', table), ('hold', teams)):
+    compact = compact_dtypes(df)
+    print(f'{name}: {len(df)} rækker, hukommelse {df.memory_usage(deep=True).sum() / 1e6:.2f} MB '
+          f'-> {compact.memory_usage(deep=True).sum() / 1e6:.2f} MB med kompakte typer')
+
+    folder = Path(tempfile.mkdtemp())
+    writers = {'csv': lambda path: df.to_csv(path, index=False),
+               'pickle': lambda path: df.to_pickle(path),
+               'parquet-datasæt': lambda path: write_dataset(df, path)}
+    if args.excel:
+      writers['excel'] = lambda path: df.to_excel(path, index=False)
+
+    for format, writer in writers.items():
+      path = folder / (name + ('.xlsx' if format == 'excel' else ''))
+      _, elapsed = timed(lambda: writer(path))
+      print(f'  {format:>16}: {size(path) / 1e6:7.2f} MB, skrevet på {elapsed:.3f} s')
+      shutil.rmtree(path) if path.is_dir() else path.unlink()
+
+    write_dataset(df, folder / name)
+    result, elapsed = timed(lambda: read_dataset(folder / name, game=GAME, round=int(df.at[0, 'Runde'])))
+    print(f'  {"læst igen":>16}: {len(result)} rækker på {elapsed:.3f} s (samme indhold: {result.astype(df.dtypes.to_dict()).equals(df)})')
+    shutil.rmtree(folder)
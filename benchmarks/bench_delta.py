@@ -0,0 +1,48 @@
+"""
+Poll the active round of the local Holdet.dk stand-in twice, with a share of the managers changing their team in between,
+and compare the number of requests of a full fetch with a delta fetch
+
+    python benchmarks/bench_delta.py --teams 10000 --changed 0.05
+"""
+import argparse
+import random
+import sys
+import tempfile
+import time
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).parent.parent))
+sys.path.insert(0, str(Path(__file__).parent))
+
+from holdetdk_scraper import HoldetScraper
+from standin_server import GAME, StandinSite, start_server
+
+def poll(scraper, **kwargs):
+  requests_before = scraper.session.stats()['requests']
+  start = time.perf_counter()
+  table, teams = scraper.get_table_and_teams(game=GAME, top=kwargs.pop('top'), **kwargs)
+  return teams, scraper.session.stats()['requests'] - requests_before, time.perf_counter() - start
+
+if __name__ == '__main__':
+  parser = argparse.ArgumentParser(description='Benchmark delta polling of the active round against a local stand-in')
+  parser.add_argument('--teams', type=int, default=10000)
+  parser.add_argument('--changed', type=float, default=0.05, help='the share of managers changing their team between the polls')
+  parser.add_argument('--latency', type=float, default=0.0)
+  args = parser.parse_args()
+
+  site = StandinSite(contestants=args.teams)
+  server = start_server(site, latency=args.latency)
+  scraper = HoldetScraper(max_workers=8, parser='lxml', base_url=f'http://127.0.0.1:{server.server_port}')
+  delta = str(Path(tempfile.mkdtemp()) / 'delta.sqlite')
+
+  _, requests, elapsed = poll(scraper, top=args.teams, delta=delta)
+  print(f'første kørsel: {requests} forespørgsler på {elapsed:.1f} s')
+
+  site.edit_teams(random.Random(0).sample(range(1, args.teams + 1), int(args.teams * args.changed)))
+
+  full, full_requests, full_elapsed = poll(scraper, top=args.teams)
+  teams, delta_requests, delta_elapsed = poll(scraper, top=args.teams, delta=delta)
+  print(f'fuld kørsel:  {full_requests} forespørgsler på {full_elapsed:.1f} s')
+  print(f'delta:        {delta_requests} forespørgsler på {delta_elapsed:.1f} s ({full_requests / delta_requests:.1f}x færre, identisk med fuld kørsel: {teams.equals(full)})')
+
+  server.shutdown()
@@ -0,0 +1,44 @@
+"""
+Compare one browser with a pool of headless browsers when fetching teams from an old round from the local Holdet.dk stand-in.
+Requires a chromedriver under Drivers/, like get_teams_from_old_round() does
+
+    python benchmarks/bench_old_round.py --teams 48 --browsers 1 4
+"""
+import argparse
+import sys
+import time
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).parent.parent))
+sys.path.insert(0, str(Path(__file__).parent))
+
+from holdetdk_scraper import HoldetScraper
+from standin_server import GAME, LOGIN_COOKIE, StandinSite, start_server
+
+if __name__ == '__main__':
+  parser = argparse.ArgumentParser(description='Benchmark get_teams_from_old_round against a local stand-in')
+  parser.add_argument('--teams', type=int, default=48)
+  parser.add_argument('--round', type=int, default=2)
+  parser.add_argument('--latency', type=float, default=0.05)
+  parser.add_argument('--browsers', type=int, nargs='+', default=[1, 4])
+  args = parser.parse_args()
+
+  server = start_server(StandinSite(contestants=args.teams), latency=args.latency)
+  base_url = f'http://127.0.0.1:{server.server_port}'
+  # the stand-in accepts any value of its login cookie, so no one has to log in
+  cookies = [{'name': LOGIN_COOKIE, 'value': 'standin'}]
+
+  scraper = HoldetScraper(max_workers=8, base_url=base_url)
+  team_links = scraper.get_standings_table(game=GAME, round=args.round, top=args.teams)['HoldLink']
+
+  reference = None
+  for browsers in args.browsers:
+    start = time.perf_counter()
+    teams = scraper.get_teams_from_old_round(team_link_list=team_links, round=args.round, n_browsers=browsers, cookies=cookies)
+    elapsed = time.perf_counter() - start
+
+    if reference is None:
+      reference = teams
+    print(f'n_browsers={browsers}: {teams["HoldLink"].nunique()} hold på {elapsed:.2f} s (identisk med første kørsel: {teams.equals(reference)})')
+
+  server.shutdown()
@@ -0,0 +1,110 @@
+"""
+Compare the one-pass calc_popularity_table with the previous implementation on synthetic teams tables
+
+    python benchmarks/bench_popularity.py --teams 1000 10000 100000 --splits 100 1000 5000
+"""
+import argparse
+import sys
+import time
+from pathlib import Path
+
+import numpy as np
+import pandas as pd
+
+sys.path.insert(0, str(Path(__file__).parent.parent))
+
+from popularity import calc_popularity_table
+
+def previous_calc_popularity(teams_table: pd.DataFrame) -> pd.DataFrame:
+  n_teams = len(teams_table['Hold'].drop_duplicates())
+
+  popularity = teams_table.groupby(['SpillerNavn', 'SpillerHold', 'SpillerPosition']).size().reset_index(name='Antal')
+  popularity['Pop%'] = (popularity['Antal']/n_teams)
+  popularity.drop(['Antal'], axis = 1, inplace = True)
+
+  captain = teams_table[teams_table['SpillerKaptajn']].groupby(['SpillerNavn', 'SpillerHold', 'SpillerPosition']).size().reset_index(name='Antal')
+  captain['(C)%'] = (captain['Antal']/n_teams)
+  captain.drop(['Antal'], axis = 1, inplace = True)
+
+  final = popularity.merge(captain, how = 'left', left_on = ['SpillerNavn', 'SpillerHold', 'SpillerPosition'], right_on = ['SpillerNavn', 'SpillerHold', 'SpillerPosition'])
+  final['(C)%'] = final['(C)%'].fillna(0)
+  final.sort_values(by=['Pop%', '(C)%'], inplace=True, ascending=False)
+
+  return final
+
+def previous_calc_popularity_table(teams_table: pd.DataFrame, splits = [100, 1000]) -> pd.DataFrame:
+  """
+  calc_popularity_table as it was before the one-pass implementation
+  """
+  n_teams = len(teams_table['Hold'].drop_duplicates())
+  players_per_team = int(len(teams_table)/len(teams_table['Hold'].drop_duplicates()))
+
+  samlet = previous_calc_popularity(teams_table=teams_table)
+  samlet.rename(columns={'Pop%': 'Pop% (samlet)',
+                         '(C)%': '(C)% (samlet)'}, inplace=True) 
+  pop_table = samlet
+  for split in splits:
+    if n_teams < split:
+      print(f'Der er kun {str(n_teams)} hold i tabellen. Returnerer alle meningsfulde splits.')
+      break
+
+    split_top = previous_calc_popularity(teams_table=teams_table[0:(players_per_team*split)])
+    split_top.rename(columns={'Pop%': f'Pop% (Top {str(split)})',
+                         '(C)%': f'(C)% (Top {str(split)})'}, inplace=True)
+    pop_table = pop_table.merge(split_top, how = 'left', left_on = ['SpillerNavn', 'SpillerHold', 'SpillerPosition'], right_on = ['SpillerNavn', 'SpillerHold', 'SpillerPosition'])    
+  
+  pop_table.fillna(0, inplace=True)
+  pop_table = pop_table.reset_index(drop=True)  
+
+  return pop_table
+
+POSITIONS = ['Målmand', 'Forsvar', 'Midtbane', 'Angreb']
+FORMATION = [0, 1, 1, 1, 1, 2, 2, 2, 2, 3, 3]
+
+def teams_table(n_teams: int, n_players = 600, seed = 0) -> pd.DataFrame:
+  """
+  A teams table like get_teams_from_active_round() returns, with 11 players per team drawn with skewed popularity
+  """
+  rng = np.random.default_rng(seed)
+  weights = rng.pareto(1.5, n_players) + 0.01
+  by_position = [np.flatnonzero(np.arange(n_players) % 4 == position) for position in range(4)]
+
+  rows = []
+  for position in FORMATION:
+    candidates = by_position[position]
+    p = weights[candidates] / weights[candidates].sum()
+    rows.append(rng.choice(candidates, size=n_teams, p=p))
+  players = np.stack(rows, axis=1)
+  captains = rng.integers(1, 11, size=n_teams)
+
+  team = np.repeat(np.arange(n_teams), 11)
+  player = players.ravel()
+  return pd.DataFrame({
+    'Spil': 'Premier Manager Efterår 2022',
+    'Runde': 4,
+    'Hold': pd.Series(team).map(lambda i: f'Hold {i + 1}'),
+    'HoldLink': pd.Series(team).map(lambda i: f'/da/premier-manager-efteraar-2022/userteams/{i + 1}'),
+    'Manager': pd.Series(team).map(lambda i: f'Manager {i + 1}'),
+    'SpillerNavn': pd.Series(player).map(lambda i: f'Spiller {i}'),
+    'SpillerHold': pd.Series(player).map(lambda i: f'Klub {i % 20}'),
+    'SpillerPosition': pd.Series(player).map(lambda i: POSITIONS[i % 4]),
+    'SpillerKaptajn': (np.arange(len(team)) % 11) == np.repeat(captains, 11),
+  })
+
+def timed(fn):
+  start = time.perf_counter()
+  result = fn()
+  return result, time.perf_counter() - start
+
+if __name__ == '__main__':
+  parser = argparse.ArgumentParser(description='Benchmark calc_popularity_table')
+  parser.add_argument('--teams', type=int, nargs='+', default=[1000, 10000, 100000])
+  parser.add_argument('--splits', type=int, nargs='+', default=[100, 1000, 5000])
+  args = parser.parse_args()
+
+  for n_teams in args.teams:
+    table = teams_table(n_teams)
+    previous, previous_elapsed = timed(lambda: previous_calc_popularity_table(table, splits=args.splits))
+    current, current_elapsed = timed(lambda: calc_popularity_table(table, splits=args.splits))
+    identical = previous.equals(current)
+    print(f'{n_teams} hold: før {previous_elapsed:.3f} s, nu {current_elapsed:.3f} s ({previous_elapsed / current_elapsed:.1f}x, identisk: {identical})')
@@ -0,0 +1,39 @@
+"""
+Compare serial and concurrent fetching of the standings table against the local Holdet.dk stand-in
+
+    python benchmarks/bench_standings.py --contestants 2400 --latency 0.05 --workers 1 8
+"""
+import argparse
+import sys
+import time
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).parent.parent))
+sys.path.insert(0, str(Path(__file__).parent))
+
+from holdetdk_scraper import HoldetScraper
+from standin_server import GAME, StandinSite, start_server
+
+if __name__ == '__main__':
+  parser = argparse.ArgumentParser(description='Benchmark get_standings_table against a local stand-in')
+  parser.add_argument('--contestants', type=int, default=2400)
+  parser.add_argument('--latency', type=float, default=0.05)
+  parser.add_argument('--workers', type=int, nargs='+', default=[1, 8])
+  args = parser.parse_args()
+
+  server = start_server(StandinSite(contestants=args.contestants), latency=args.latency)
+  base_url = f'http://127.0.0.1:{server.server_port}'
+
+  reference = None
+  for workers in args.workers:
+    scraper = HoldetScraper(max_workers=workers, base_url=base_url)
+    start = time.perf_counter()
+    table = scraper.get_standings_table(game=GAME, top=0)
+    elapsed = time.perf_counter() - start
+
+    if reference is None:
+      reference = table
+    identical = table.equals(reference)
+    print(f'max_workers={workers}: {len(table)} hold på {elapsed:.2f} s (identisk med første kørsel: {identical})')
+
+  server.shutdown()
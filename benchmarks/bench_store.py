@@ -0,0 +1,66 @@
+"""
+Time adding synthetic teams to a HoldetStore and the queries on it, compared with the same answers from a dataframe in memory
+
+    python benchmarks/bench_store.py --teams 100000 --rounds 3
+"""
+import argparse
+import os
+import sys
+import tempfile
+import time
+from pathlib import Path
+
+import pandas as pd
+
+sys.path.insert(0, str(Path(__file__).parent.parent))
+sys.path.insert(0, str(Path(__file__).parent))
+
+from bench_popularity import teams_table
+from store import HoldetStore
+
+def timed(fn):
+  start = time.perf_counter()
+  result = fn()
+  return result, time.perf_counter() - start
+
+def pandas_ownership(teams: pd.DataFrame, player: str, top = None) -> pd.DataFrame:
+  if top is not None:
+    teams = teams[teams['Præmiepulje'] <= top]
+  rows = teams[teams['SpillerNavn'] == player].groupby(['Spil', 'Runde'])['SpillerKaptajn'].agg(['size', 'sum'])
+  n_teams = teams.groupby(['Spil', 'Runde'])['HoldLink'].nunique()
+  return pd.DataFrame({'Pop%': rows['size'] / n_teams, '(C)%': rows['sum'] / n_teams}).fillna(0)
+
+if __name__ == '__main__':
+  parser = argparse.ArgumentParser(description='Benchmark the queries of HoldetStore')
+  parser.add_argument('--teams', type=int, default=100000)
+  parser.add_argument('--rounds', type=int, default=3)
+  parser.add_argument('--repeat', type=int, default=5)
+  args = parser.parse_args()
+
+  with tempfile.TemporaryDirectory() as folder:
+    path = os.path.join(folder, 'holdet.sqlite')
+    store = HoldetStore(path)
+    rounds = []
+    for round in range(1, args.rounds + 1):
+      teams = teams_table(args.teams, seed=round)
+      teams['Runde'] = round
+      teams['Præmiepulje'] = teams['HoldLink'].str.extract(r'(\d+)$')[0].astype(int)
+      rounds.append(teams)
+      _, seconds = timed(lambda: store.add_teams(teams))
+      print(f'Runde {round}: {args.teams} hold tilføjet på {seconds:.2f} s ({args.teams / seconds:.0f} hold/s)')
+    print(f'Størrelse: {os.path.getsize(path) / 1e6:.1f} MB')
+    teams = pd.concat(rounds, ignore_index=True)
+
+    popularity = teams['SpillerNavn'].value_counts()
+    players = {'populær': popularity.index[0], 'sjælden': popularity.index[len(popularity) // 2]}
+    queries = {f'ownership {name}, top {top}': (lambda player=player, top=top: store.ownership(player, top=top),
+                                                lambda player=player, top=top: pandas_ownership(teams, player, top=top))
+               for name, player in players.items() for top in (1000, None)}
+    queries['team_history'] = (lambda: store.team_history('Manager 17', players=True),
+                               lambda: teams[teams['Manager'] == 'Manager 17'])
+
+    for name, (in_store, in_memory) in queries.items():
+      store_ms = 1000 * min(timed(in_store)[1] for _ in range(args.repeat))
+      pandas_ms = 1000 * min(timed(in_memory)[1] for _ in range(args.repeat))
+      print(f'{name:<30} store: {store_ms:7.1f} ms   pandas i hukommelsen: {pandas_ms:7.1f} ms')
+    store.close()
@@ -0,0 +1,144 @@
+"""
+Offline benchmark suite. A local stand-in for Holdet.dk is started with the given latency, jitter and error rate, and
+get_standings_table, get_teams_from_active_round, get_table_and_teams and calc_popularity_table are measured at each scale
+(number of teams). Every measurement runs in its own process, so the peak memory is that of the measured call and its setup only.
+The stand-in serves generated pages, or pages recorded from Holdet.dk with record_fixtures.py when --fixtures is given.
+calc_popularity_table is measured on a synthetic teams table of the same size, since it does not send requests
+
+    python benchmarks/bench_suite.py --scales 1000 10000 100000 --latency 0.02 --jitter 0.01 --error-rate 0.01
+    python benchmarks/bench_suite.py --scales 1000 --fixtures benchmarks/recorded --out results.csv
+"""
+import argparse
+import json
+import resource
+import socket
+import subprocess
+import sys
+import time
+from pathlib import Path
+
+import pandas as pd
+
+sys.path.insert(0, str(Path(__file__).parent.parent))
+sys.path.insert(0, str(Path(__file__).parent))
+
+FUNCTIONS = ['get_standings_table', 'get_teams_from_active_round', 'get_table_and_teams', 'calc_popularity_table']
+PARSE_STAGES = ['parse_html', 'extract_table', 'extract_team', 'build_dataframe']
+RESULT = 'RESULTAT '
+
+def free_port() -> int:
+  with socket.socket() as s:
+    s.bind(('127.0.0.1', 0))
+    return s.getsockname()[1]
+
+def start_standin(args, contestants: int):
+  """
+  Start the stand-in in its own process, so it does not compete with the scraper for the GIL
+  """
+  port = free_port()
+  command = [sys.executable, str(Path(__file__).parent / 'standin_server.py'), '--port', str(port), '--contestants', str(contestants),
+             '--latency', str(args.latency), '--jitter', str(args.jitter), '--error-rate', str(args.error_rate)]
+  if args.fixtures:
+    command += ['--fixtures', args.fixtures]
+  server = subprocess.Popen(command, stdout=subprocess.PIPE, text=True)
+  server.stdout.readline()
+  return server, f'http://127.0.0.1:{port}'
+
+def measure(function: str, scale: int, base_url: str, game: str, args) -> dict:
+  """
+  Set up and measure one call. Runs in the child process
+  """
+  from holdetdk_scraper import HoldetScraper
+  scraper = HoldetScraper(max_workers=args.workers, parser=args.parser, base_url=base_url,
+                          parse_workers=args.parse_workers, parse_queue=args.parse_queue)
+
+  if function == 'get_standings_table':
+    call = lambda: scraper.get_standings_table(game=game, top=scale)
+  elif function == 'get_teams_from_active_round':
+    team_links = scraper.get_standings_table(game=game, top=scale)['HoldLink']
+    call = lambda: scraper.get_teams_from_active_round(team_link_list=team_links)
+  elif function == 'get_table_and_teams':
+    call = lambda: scraper.get_table_and_teams(game=game, top=scale)
+  else:
+    from bench_popularity import teams_table
+    teams = teams_table(scale)
+    call = lambda: scraper.calc_popularity_table(teams_table=teams, splits=[100, 1000, 10000])
+
+  scraper.metrics.reset()
+  requests_before = scraper.session.stats()
+  cpu_start, start = time.process_time(), time.perf_counter()
+  result = call()
+  seconds, cpu = time.perf_counter() - start, time.process_time() - cpu_start
+  requests_after = scraper.session.stats()
+  # the parse processes are counted once they have been stopped
+  scraper.close()
+  children = resource.getrusage(resource.RUSAGE_CHILDREN)
+
+  endpoints = scraper.metrics.endpoints().set_index('Endpoint')['Forespørgsler']
+  stages = scraper.metrics.stages().set_index('Fase')['Sekunder']
+  teams_df = result[1] if isinstance(result, tuple) else result
+  n_teams = teams_df['HoldLink' if 'HoldLink' in teams_df.columns else 'Hold'].nunique() if function != 'calc_popularity_table' else scale
+  n_requests = requests_after['requests'] - requests_before['requests']
+  retries = requests_after['retries'] - requests_before['retries']
+
+  return {'Skala': scale,
+          'Funktion': function,
+          'Sekunder': seconds,
+          'Sider/s': endpoints.get('tabel', 0) / seconds,
+          'Hold/s': n_teams / seconds,
+          'CPU s': cpu + children.ru_utime + children.ru_stime,
+          'Parse s': stages.reindex(PARSE_STAGES).fillna(0).sum(),
+          'Peak MB': (resource.getrusage(resource.RUSAGE_SELF).ru_maxrss + children.ru_maxrss) / 1024,
+          'Forespørgsler': n_requests,
+          'Fejlrate': retries / n_requests if n_requests else 0.0}
+
+if __name__ == '__main__':
+  parser = argparse.ArgumentParser(description='Offline benchmark suite against a local stand-in for Holdet.dk')
+  parser.add_argument('--scales', type=int, nargs='+', default=[1000, 10000, 100000])
+  parser.add_argument('--functions', nargs='+', default=FUNCTIONS, choices=FUNCTIONS)
+  parser.add_argument('--latency', type=float, default=0.02)
+  parser.add_argument('--jitter', type=float, default=0.01)
+  parser.add_argument('--error-rate', type=float, default=0.0)
+  parser.add_argument('--workers', type=int, default=8)
+  parser.add_argument('--parser', default='lxml')
+  parser.add_argument('--parse-workers', type=int, default=0, help='the number of parse processes, see HoldetScraper')
+  parser.add_argument('--parse-queue', type=int, default=None)
+  parser.add_argument('--fixtures', default=None, help='serve pages recorded with record_fixtures.py instead of generated pages')
+  parser.add_argument('--out', default=None, help='save the results as csv')
+  # used by the suite itself to run one measurement in a child process
+  parser.add_argument('--run', default=None, help=argparse.SUPPRESS)
+  parser.add_argument('--base-url', default=None, help=argparse.SUPPRESS)
+  parser.add_argument('--game', default=None, help=argparse.SUPPRESS)
+  args = parser.parse_args()
+
+  if args.run is not None:
+    print(RESULT + json.dumps(measure(args.run, args.scales[0], args.base_url, args.game, args), default=lambda value: value.item()))
+    sys.exit(0)
+
+  if args.fixtures:
+    game = json.loads((Path(args.fixtures) / 'manifest.json').read_text(encoding='utf-8'))['game']
+  else:
+    from standin_server import GAME as game
+
+  results = []
+  for scale in args.scales:
+    # every 50th manager is deleted on the generated site, so a few extra contestants are needed for scale valid teams
+    server, base_url = start_standin(args, contestants=scale + scale // 49 + 24)
+    try:
+      for function in args.functions:
+        command = [sys.executable, __file__, '--run', function, '--scales', str(scale), '--base-url', base_url, '--game', game,
+                   '--workers', str(args.workers), '--parser', args.parser, '--parse-workers', str(args.parse_workers)]
+        if args.parse_queue is not None:
+          command += ['--parse-queue', str(args.parse_queue)]
+        output = subprocess.run(command, stdout=subprocess.PIPE, stderr=subprocess.DEVNULL, text=True, check=True).stdout
+        result = json.loads(next(line for line in output.splitlines() if line.startswith(RESULT))[len(RESULT):])
+        results.append(result)
+        print(f'{scale:>7} {function:<28} {result["Sekunder"]:8.2f} s  {result["Hold/s"]:9.0f} hold/s  {result["Peak MB"]:7.0f} MB', flush=True)
+    finally:
+      server.terminate()
+
+  results = pd.DataFrame(results)
+  print()
+  print(results.to_string(index=False, float_format=lambda x: f'{x:.2f}'))
+  if args.out:
+    results.to_csv(args.out, index=False)
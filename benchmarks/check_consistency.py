@@ -0,0 +1,64 @@
+"""
+Regression harness for consistent=True in get_standings_table. The table of the local stand-in drifts while it is fetched,
+and the whole table is fetched, so every valid team must be returned exactly once. A run fails if a team is missing or
+duplicated while 'Konsistens' is 1.0, or if the returned table is less consistent than the first burst. The number of teams
+returned is also compared with a plain scrape of the same drifting table
+
+    python benchmarks/check_consistency.py
+    python benchmarks/check_consistency.py --contestants 480 --drift 2 --seeds 5
+"""
+import argparse
+import sys
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).parent.parent))
+sys.path.insert(0, str(Path(__file__).parent))
+
+from holdetdk_scraper import HoldetScraper
+from standin_server import GAME, StandinSite, start_server
+
+if __name__ == '__main__':
+  parser = argparse.ArgumentParser(description='Check consistent mode against a stand-in whose table drifts')
+  parser.add_argument('--contestants', type=int, default=2400)
+  parser.add_argument('--deleted-every', type=int, default=50)
+  parser.add_argument('--drift', type=float, nargs='+', default=[0.05, 0.5, 1])
+  parser.add_argument('--seeds', type=int, default=3)
+  parser.add_argument('--max-refetches', type=int, default=3)
+  args = parser.parse_args()
+
+  valid = args.contestants - (args.contestants // args.deleted_every if args.deleted_every else 0)
+  failures = 0
+  totals = {drift: [0, 0] for drift in args.drift}
+  for drift in args.drift:
+    for seed in range(args.seeds):
+      site = StandinSite(contestants=args.contestants, deleted_every=args.deleted_every, seed=seed, drift=drift)
+      server = start_server(site)
+      scraper = HoldetScraper(max_workers=8, parser='lxml', cache_ttl=0, base_url=f'http://127.0.0.1:{server.server_port}')
+      plain_found = 0
+      try:
+        plain_found = scraper.get_standings_table(game=GAME, top=0)['HoldLink'].nunique()
+        table, consistency = scraper.get_standings_table(game=GAME, top=0, consistent=True, max_refetches=args.max_refetches, return_consistency=True)
+        problems = []
+        found = table['HoldLink'].nunique()
+        if consistency['Konsistens'] == 1 and (found != valid or len(table) != valid):
+          problems.append(f"Konsistens 1.0 med {found} af {valid} hold")
+        if consistency['Konsistens'] < consistency['Konsistens før']:
+          problems.append(f"Konsistens {consistency['Konsistens']:.4f} mod {consistency['Konsistens før']:.4f} før")
+        totals[drift][0] += found
+        totals[drift][1] += plain_found
+      except Exception as e:
+        problems, found, consistency = [repr(e)], 0, {}
+      scraper.close()
+      server.shutdown()
+
+      print(f"drift={drift} seed={seed}: {found}/{valid} hold, uden consistent {plain_found}, "
+            f"Konsistens {consistency.get('Konsistens', 0):.4f} (før {consistency.get('Konsistens før', 0):.4f}), "
+            f"{consistency.get('Forsøg')} forsøg, {consistency.get('Genhentede sider')} sider hentet igen")
+      if problems:
+        failures += 1
+        print(f'FEJL drift={drift} seed={seed}: {", ".join(problems)}')
+
+  for drift, (found, plain) in totals.items():
+    print(f'drift={drift}: {found} hold med consistent, {plain} uden, af {valid * args.seeds}')
+  print(f'{len(args.drift) * args.seeds} kørsler, {failures} fejl')
+  sys.exit(1 if failures else 0)
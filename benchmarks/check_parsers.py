@@ -0,0 +1,55 @@
+"""
+Regression harness for the parser backends. Every fixture in benchmarks/fixtures is parsed with the reference
+BeautifulSoup backend and with each of the other backends, and the results must be identical
+
+    python benchmarks/check_parsers.py
+    python benchmarks/check_parsers.py --fixtures path/to/recorded/pages --repeat 20
+"""
+import argparse
+import sys
+import time
+from pathlib import Path
+
+import pandas as pd
+
+sys.path.insert(0, str(Path(__file__).parent.parent))
+
+from parsers import PARSERS, BeautifulSoupParser
+
+def parse(parser, path: Path):
+  content = path.read_bytes()
+  if path.name.startswith('standings'):
+    return parser.parse_standings_page(content)
+  team_name, manager, manager_points, team_list = parser.parse_team_page(content)
+  return pd.DataFrame.from_records(team_list).assign(Hold=team_name, Manager=manager, ManagerPoints=manager_points)
+
+if __name__ == '__main__':
+  parser = argparse.ArgumentParser(description='Check that all parser backends produce identical DataFrames')
+  parser.add_argument('--fixtures', default=str(Path(__file__).parent / 'fixtures'))
+  parser.add_argument('--repeat', type=int, default=5)
+  args = parser.parse_args()
+
+  fixtures = sorted(p for p in Path(args.fixtures).glob('*.html') if p.name.startswith(('standings', 'team')))
+  if not fixtures:
+    raise FileNotFoundError(f'Fandt ingen fixtures i {args.fixtures}')
+
+  reference = BeautifulSoupParser()
+  failures = 0
+  for name, backend in PARSERS.items():
+    backend = backend()
+    for path in fixtures:
+      try:
+        pd.testing.assert_frame_equal(parse(backend, path), parse(reference, path))
+      except AssertionError as e:
+        failures += 1
+        print(f'FEJL {name} {path.name}: {e}')
+
+    start = time.process_time()
+    for _ in range(args.repeat):
+      for path in fixtures:
+        parse(backend, path)
+    cpu = (time.process_time() - start) / (args.repeat * len(fixtures))
+    print(f'{name:12s} {cpu * 1000:7.2f} ms CPU pr. side')
+
+  print(f'{len(fixtures)} fixtures, {failures} afvigelser')
+  sys.exit(1 if failures else 0)
@@ -0,0 +1,78 @@
+"""
+Regression harness for the popularity calculations. Synthetic teams tables with missing values in the player and team columns are
+counted with calc_popularity_table and PopularityAggregator, and both must match a plain groupby that keeps missing values as keys
+
+    python benchmarks/check_popularity.py
+    python benchmarks/check_popularity.py --teams 5000 --seeds 5
+"""
+import argparse
+import sys
+from pathlib import Path
+
+import numpy as np
+import pandas as pd
+
+sys.path.insert(0, str(Path(__file__).parent.parent))
+sys.path.insert(0, str(Path(__file__).parent))
+
+from bench_popularity import teams_table
+from popularity import PLAYER_COLUMNS, PopularityAggregator, _codes, calc_popularity_table
+
+COLUMNS = ['Pop% (samlet)', '(C)% (samlet)']
+
+def with_missing_values(teams: pd.DataFrame, seed: int, team_key: str) -> pd.DataFrame:
+  """
+  Remove some of the clubs, positions and managers, so that (name, club, position) keys differ only by a missing value
+  """
+  rng = np.random.default_rng(seed)
+  teams = teams.copy()
+  for column in ['SpillerHold', 'SpillerPosition']:
+    teams.loc[rng.random(len(teams)) < 0.05, column] = np.nan
+  if team_key == 'Hold/Manager':
+    teams = teams.drop(columns='HoldLink')
+    managers = teams['Manager'].drop_duplicates().sample(frac=0.1, random_state=seed)
+    teams.loc[teams['Manager'].isin(managers), 'Manager'] = np.nan
+  return teams
+
+def reference(teams: pd.DataFrame) -> pd.DataFrame:
+  team_columns = ['HoldLink'] if 'HoldLink' in teams.columns else ['Hold', 'Manager']
+  n_teams = len(teams[team_columns].drop_duplicates())
+  rows = teams.groupby(PLAYER_COLUMNS, dropna=False)['SpillerKaptajn'].agg(['size', 'sum']).reset_index()
+  return rows.assign(**{'Pop% (samlet)': rows['size'] / n_teams, '(C)% (samlet)': rows['sum'] / n_teams})[PLAYER_COLUMNS + COLUMNS]
+
+def compare(name: str, result: pd.DataFrame, expected: pd.DataFrame) -> list:
+  if len(result) != len(expected):
+    return [f'{name}: {len(result)} spillere i stedet for {len(expected)}']
+  # merge matches missing values in the keys, unlike a join on an index
+  merged = expected.merge(result[PLAYER_COLUMNS + COLUMNS], how='left', on=PLAYER_COLUMNS, suffixes=('', ' beregnet'))
+  for column in COLUMNS:
+    if not np.allclose(merged[column], merged[f'{column} beregnet']):
+      return [f'{name}: {column} afviger']
+  return []
+
+if __name__ == '__main__':
+  parser = argparse.ArgumentParser(description='Check the popularity calculations on teams with missing values')
+  parser.add_argument('--teams', type=int, default=2000)
+  parser.add_argument('--seeds', type=int, default=3)
+  args = parser.parse_args()
+
+  failures = 0
+  codes, n_distinct = _codes(pd.DataFrame({'a': ['x', 'x', 'y'], 'b': ['q', 'p', np.nan]}))
+  if n_distinct != 3:
+    failures += 1
+    print(f'FEJL _codes: {codes.tolist()} giver {n_distinct} forskellige nøgler i stedet for 3')
+
+  for seed in range(args.seeds):
+    for team_key in ('HoldLink', 'Hold/Manager'):
+      teams = with_missing_values(teams_table(args.teams, seed=seed), seed=seed, team_key=team_key)
+      expected = reference(teams)
+      aggregator = PopularityAggregator(splits=[])
+      aggregator.add(teams)
+      problems = compare('calc_popularity_table', calc_popularity_table(teams, splits=[]), expected)
+      problems += compare('PopularityAggregator', aggregator.snapshot(), expected)
+      if problems:
+        failures += 1
+        print(f'FEJL seed={seed} nøgle={team_key}: {", ".join(problems)}')
+
+  print(f'{args.seeds * 2 + 1} kontroller, {failures} fejl')
+  sys.exit(1 if failures else 0)
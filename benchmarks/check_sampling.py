@@ -0,0 +1,55 @@
+"""
+Regression harness for random_sample in get_standings_table. The table of the local stand-in has many deleted managers,
+so most seeds need more than one draw, and every sample must have the requested number of distinct, valid teams,
+be the same for the same seed and stay within the table
+
+    python benchmarks/check_sampling.py
+    python benchmarks/check_sampling.py --contestants 2400 --deleted-every 5 --top 200 --seeds 20
+"""
+import argparse
+import sys
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).parent.parent))
+sys.path.insert(0, str(Path(__file__).parent))
+
+from holdetdk_scraper import HoldetScraper
+from standin_server import GAME, StandinSite, start_server
+
+if __name__ == '__main__':
+  parser = argparse.ArgumentParser(description='Check random_sample against a stand-in with deleted managers')
+  parser.add_argument('--contestants', type=int, default=2400)
+  parser.add_argument('--deleted-every', type=int, default=5)
+  parser.add_argument('--top', type=int, default=200)
+  parser.add_argument('--seeds', type=int, default=10)
+  args = parser.parse_args()
+
+  site = StandinSite(contestants=args.contestants, deleted_every=args.deleted_every)
+  server = start_server(site)
+  scraper = HoldetScraper(max_workers=8, parser='lxml', base_url=f'http://127.0.0.1:{server.server_port}')
+  valid = args.contestants - (args.contestants // args.deleted_every if args.deleted_every else 0)
+
+  failures = 0
+  for seed in range(args.seeds):
+    for strata in (None, [100, 1000]):
+      try:
+        sample = scraper.get_standings_table(game=GAME, top=args.top, random_sample=True, seed=seed, strata=strata)
+        again = scraper.get_standings_table(game=GAME, top=args.top, random_sample=True, seed=seed, strata=strata)
+        problems = []
+        if len(sample) != min(args.top, valid):
+          problems.append(f'{len(sample)} hold i stedet for {min(args.top, valid)}')
+        if sample['HoldLink'].duplicated().any():
+          problems.append('dubletter')
+        if (sample['Manager'] == '<Slettet>').any():
+          problems.append('slettede managere')
+        if not sample.equals(again):
+          problems.append('forskellig stikprøve med samme seed')
+      except Exception as e:
+        problems = [repr(e)]
+      if problems:
+        failures += 1
+        print(f'FEJL seed={seed} strata={strata}: {", ".join(problems)}')
+
+  server.shutdown()
+  print(f'{args.seeds} seeds, {failures} fejl')
+  sys.exit(1 if failures else 0)
@@ -0,0 +1,98 @@
+"""
+Regression harness for HoldetStore with real scraper output. The tables and teams of the local stand-in are fetched with
+get_table_and_teams, scrape_many and the simple functions, added to a store, and every stored row must keep its HoldLink
+(and ManagerLink in the table), so the indexes and team_history work. Frames without HoldLink must be rejected
+
+    python benchmarks/check_store.py
+    python benchmarks/check_store.py --contestants 1000 --top 300
+"""
+import argparse
+import os
+import sys
+import tempfile
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).parent.parent))
+sys.path.insert(0, str(Path(__file__).parent))
+
+from holdetdk_scraper import HoldetScraper
+from standin_server import GAME, StandinSite, start_server
+from store import HoldetStore
+
+def check_links(store: HoldetStore, table, teams) -> list:
+  """
+  Compare the links in the store with the links in the frames that were added
+  """
+  problems = []
+  stored = store.query('SELECT COUNT(*) AS n, COUNT(HoldLink) AS links, COUNT(ManagerLink) AS managers FROM tabel').iloc[0]
+  if stored['links'] != stored['n'] or stored['n'] != len(table):
+    problems.append(f"tabel: {stored['links']} af {stored['n']} rækker har HoldLink, {len(table)} rækker i tabellen")
+  if 'ManagerLink' in table.columns and stored['managers'] != table['ManagerLink'].notna().sum():
+    problems.append(f"tabel: {stored['managers']} rækker har ManagerLink i stedet for {table['ManagerLink'].notna().sum()}")
+  stored = store.query('SELECT COUNT(*) AS n, COUNT(DISTINCT HoldLink) AS links FROM hold').iloc[0]
+  if stored['links'] != stored['n'] or stored['n'] != teams['HoldLink'].nunique():
+    problems.append(f"hold: {stored['links']} forskellige HoldLink på {stored['n']} hold, {teams['HoldLink'].nunique()} hold hentet")
+  return problems
+
+def check_history(store: HoldetStore, table, teams) -> list:
+  """
+  The history of the first manager of the table must be found by the link to the manager, and the players by the name
+  """
+  problems = []
+  row = table.iloc[0]
+  if 'ManagerLink' in table.columns:
+    history = store.team_history(row['ManagerLink'])
+    if len(history) != 1 or history.at[0, 'HoldLink'] != row['HoldLink']:
+      problems.append(f"team_history({row['ManagerLink']!r}) gav {history['HoldLink'].tolist()}")
+  players = store.team_history(row['Manager'], players=True)
+  expected = teams[teams['Manager'] == row['Manager']]
+  if len(players) != len(expected) or players['SpillerNavn'].tolist() != expected['SpillerNavn'].tolist():
+    problems.append(f"team_history({row['Manager']!r}, players=True) gav {len(players)} spillere i stedet for {len(expected)}")
+  return problems
+
+if __name__ == '__main__':
+  parser = argparse.ArgumentParser(description='Check HoldetStore with tables and teams from the stand-in')
+  parser.add_argument('--contestants', type=int, default=500)
+  parser.add_argument('--top', type=int, default=200)
+  args = parser.parse_args()
+
+  server = start_server(StandinSite(contestants=args.contestants))
+  scraper = HoldetScraper(max_workers=8, parser='lxml', cache_ttl=0, base_url=f'http://127.0.0.1:{server.server_port}')
+  sources = {
+    'get_table_and_teams': lambda: scraper.get_table_and_teams(game=GAME, top=args.top),
+    'scrape_many': lambda: next(iter(scraper.scrape_many([(GAME, 0, args.top)]).values())),
+    'get_standings_table': lambda: (lambda table: (table, scraper.get_teams_from_active_round(team_link_list=table['HoldLink'])))(
+                                     scraper.get_standings_table(game=GAME, top=args.top)),
+  }
+
+  failures = 0
+  with tempfile.TemporaryDirectory() as folder:
+    for i, (name, fetch) in enumerate(sources.items()):
+      store = HoldetStore(os.path.join(folder, f'{i}.sqlite'))
+      try:
+        table, teams = fetch()
+        store.add_table(table)
+        store.add_teams(teams)
+        problems = check_links(store, table, teams) + check_history(store, table, teams)
+      except Exception as e:
+        problems = [repr(e)]
+      store.close()
+      print(f'{name}: {len(problems)} fejl')
+      if problems:
+        failures += 1
+        print(f'FEJL {name}: {", ".join(problems)}')
+
+    store = HoldetStore(os.path.join(folder, 'uden-links.sqlite'))
+    for name, add in (('add_table', store.add_table), ('add_teams', store.add_teams)):
+      try:
+        add(table.drop(columns='HoldLink') if name == 'add_table' else teams.drop(columns='HoldLink'))
+        failures += 1
+        print(f'FEJL {name}: rækker uden HoldLink blev gemt')
+      except ValueError:
+        pass
+    store.close()
+
+  scraper.close()
+  server.shutdown()
+  print(f'{len(sources) + 2} kontroller, {failures} fejl')
+  sys.exit(1 if failures else 0)
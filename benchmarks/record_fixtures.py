@@ -0,0 +1,79 @@
+"""
+Record pages from Holdet.dk as fixtures for the benchmarks, so the scraper can be measured offline against real pages.
+The front page, the landing page of præmiepuljen, the first pages of the table and the pages of the teams on them are saved
+together with a manifest.json, which standin_server.py --fixtures and bench_suite.py --fixtures read.
+The rounds pages of the teams are only shown to logged in users and are recorded with --rounds, which asks you to log in
+
+    python benchmarks/record_fixtures.py --game 'Premier Manager Efterår 2022' --pages 5 --teams 50 --out benchmarks/recorded
+    python benchmarks/check_parsers.py --fixtures benchmarks/recorded
+"""
+import argparse
+import json
+import re
+import sys
+import tempfile
+from pathlib import Path
+from urllib.parse import urlsplit
+
+sys.path.insert(0, str(Path(__file__).parent.parent))
+
+from driver_pool import login_and_export_cookies
+from holdetdk_scraper import HoldetScraper
+
+def fixture_name(path: str) -> str:
+  """
+  The file name of a recorded page, e.g. standings_r4_3.html (round 4, page 3) or team_123.html
+  """
+  match = re.search(r'/praemiepuljen/(\d+)/all/rank/asc/(\d+)$', path)
+  if match:
+    return f'standings_r{match.group(1)}_{match.group(2)}.html'
+  match = re.search(r'/userteams/(\d+)(/rounds)?$', path)
+  if match:
+    return f'{"rounds" if match.group(2) else "team"}_{match.group(1)}.html'
+  if path.endswith('/leaderboards/praemiepuljen'):
+    return 'landing.html'
+  if path.rstrip('/') == '/da':
+    return 'front.html'
+  return re.sub(r'[^\w]+', '_', path).strip('_') + '.html'
+
+if __name__ == '__main__':
+  parser = argparse.ArgumentParser(description='Record pages from Holdet.dk as benchmark fixtures')
+  parser.add_argument('--game', required=True)
+  parser.add_argument('--round', type=int, default=0)
+  parser.add_argument('--pages', type=int, default=5, help='the number of pages of the table to record')
+  parser.add_argument('--teams', type=int, default=50, help='the number of teams to record')
+  parser.add_argument('--rounds', action='store_true', help='also record the rounds pages of the teams (requires logging in)')
+  parser.add_argument('--out', default=str(Path(__file__).parent / 'recorded'))
+  parser.add_argument('--base-url', default='https://www.holdet.dk')
+  parser.add_argument('--rate-limit', type=float, default=2)
+  args = parser.parse_args()
+
+  # every page the scraper fetches through the cache ends up in it, and is copied from there to the fixtures
+  cache_dir = tempfile.mkdtemp()
+  scraper = HoldetScraper(base_url=args.base_url, rate_limit=args.rate_limit, cache_dir=cache_dir)
+  table = scraper.get_standings_table(game=args.game, round=args.round, top=args.pages * 24)
+  team_links = list(table['HoldLink'][:args.teams])
+  scraper.get_teams_from_active_round(team_link_list=team_links)
+
+  game_url = team_links[0].split('/')[2]
+  extra_urls = [f'{scraper.base_url}/da', f'{scraper.base_url}/da/{game_url}/leaderboards/praemiepuljen']
+  cookies = None
+  if args.rounds:
+    chrome_driver_path = str(Path(__file__).parent.parent / 'Drivers' / 'chromedriver')
+    cookies = {cookie['name']: cookie['value'] for cookie in login_and_export_cookies(chrome_driver_path, scraper.base_url)}
+    extra_urls += [f'{scraper.base_url}{team_link}/rounds' for team_link in team_links]
+  for url in extra_urls:
+    scraper.session.get(url, cache_ttl=0, cookies=cookies)
+
+  out = Path(args.out)
+  out.mkdir(parents=True, exist_ok=True)
+  pages = {}
+  for url in scraper.cache.urls():
+    path = urlsplit(url).path.rstrip('/')
+    name = fixture_name(path)
+    (out / name).write_bytes(scraper.cache.lookup(url)['body'])
+    pages[path] = name
+
+  manifest = {'game': args.game, 'game_url': game_url, 'base_url': scraper.base_url, 'pages': pages}
+  (out / 'manifest.json').write_text(json.dumps(manifest, ensure_ascii=False, indent=2), encoding='utf-8')
+  print(f'Gemte {len(pages)} sider i {out}')
@@ -0,0 +1,385 @@
+"""
+A local stand-in for Holdet.dk serving canned HTML with the same structure as the real site.
+Used by the benchmark scripts to measure the scraper without sending requests to Holdet.dk.
+
+Start it from the command line with
+    python benchmarks/standin_server.py --port 8000 --latency 0.1
+and point a scraper at it with HoldetScraper(base_url='http://127.0.0.1:8000').
+Pages recorded from Holdet.dk with record_fixtures.py are served instead with --fixtures path/to/recorded/pages
+"""
+import argparse
+import hashlib
+import html
+import json
+import random
+import re
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from pathlib import Path
+
+GAME = 'Premier Manager Efterår 2022'
+GAME_URL = 'premier-manager-efteraar-2022'
+PAGE_SIZE = 24
+LOGIN_COOKIE = 'holdet_session'
+POSITIONS = ['Målmand', 'Forsvar', 'Forsvar', 'Forsvar', 'Forsvar', 'Midtbane', 'Midtbane', 'Midtbane', 'Midtbane', 'Angreb', 'Angreb']
+
+
+def fmt(number: int) -> str:
+  """
+  Format an integer the way Holdet.dk does, i.e. with '.' as thousands separator
+  """
+  return f'{number:,}'.replace(',', '.')
+
+
+class StandinSite():
+  def __init__(self, contestants = 1000, active_round = 4, deleted_every = 50, seed = 0, drift = 0):
+    """
+    Arguments:
+        contestants (int): the number of contestants in præmiepuljen
+        active_round (int): the active round of the game
+        deleted_every (int): every n'th contestant is a deleted manager. Set to 0 for no deleted managers
+        seed (int): seed for the generated team and player data
+        drift (float): the average number of teams that move in the table of the active round before each page of it is served, like during a match
+    """
+    self.contestants = contestants
+    self.active_round = active_round
+    self.deleted_every = deleted_every
+    self.seed = seed
+    self.n_pages = (contestants + PAGE_SIZE - 1) // PAGE_SIZE
+    self.edits = {}
+    self.drift = drift
+    # order[i] is the team at position i + 1 in the table of the active round. Teams are named after their position before any drift
+    self.order = list(range(1, contestants + 1))
+    self.lock = threading.Lock()
+    self.rng = random.Random(seed)
+    self.players = [(f'Spiller {i}', f'Klub {i % 20}', POSITIONS[i % len(POSITIONS)]) for i in range(200)]
+
+  def team_id(self, rank: int) -> int:
+    return 100000 + rank
+
+  def team_name(self, rank: int) -> str:
+    return f'Bøf & Bajere {rank}' if rank % 5 == 0 else f'Hold {rank}'
+
+  def manager_name(self, rank: int) -> str:
+    return f'Søren Ærø {rank}' if rank % 7 == 0 else f'Manager {rank}'
+
+  def edit_teams(self, ranks: list):
+    """
+    Let the managers at the given ranks change their team, which changes the players of the team and its Værdi and RundeVækst in the table
+    """
+    for rank in ranks:
+      team_id = self.team_id(rank)
+      self.edits[team_id] = self.edits.get(team_id, 0) + 1
+
+  def move_team(self, from_position: int, to_position: int):
+    """
+    Move the team at from_position to to_position in the table of the active round. The teams in between move one position
+    """
+    with self.lock:
+      self.order.insert(to_position - 1, self.order.pop(from_position - 1))
+
+  def is_deleted(self, rank: int) -> bool:
+    return self.deleted_every > 0 and rank % self.deleted_every == 0
+
+  def front_page(self) -> str:
+    return f'''<html><body>
+<div id="game-1"><h1>{GAME}</h1><a href="/da/{GAME_URL}">Spil nu</a></div>
+<div id="game-2"><h1>Tour Manager 2022</h1><a href="/da/tour-manager-2022">Spil nu</a></div>
+</body></html>'''
+
+  def not_started_page(self) -> str:
+    return '<html><body><div class="panel">Spillet er ikke startet endnu</div></body></html>'
+
+  def landing_page(self) -> str:
+    rounds = ''.join(f'<li class="{"active" if r == self.active_round else ""}"><a href="#">Runde {r}</a></li>' for r in range(1, self.active_round + 1))
+    pages = ''.join(f'<li><a href="#">{p}</a></li>' for p in [1, 2, 3, self.n_pages])
+    return f'''<html><body>
+<ul id="rounds">{rounds}</ul>
+<div class="panel summary"><h3>{fmt(self.contestants)}</h3><span>deltagere</span></div>
+{self.standings_table(self.active_round, 1)}
+<ul class="pagination">{pages}<li><a href="#">Næste</a></li></ul>
+</body></html>'''
+
+  def standings_table(self, round: int, page: int) -> str:
+    rows = []
+    for position in range((page - 1) * PAGE_SIZE + 1, min(page * PAGE_SIZE, self.contestants) + 1):
+      rank = self.order[position - 1] if round == self.active_round else position
+      team_id = self.team_id(rank)
+      value = 50000000 - position * 1000 + round * 17 + (100 * self.edits.get(team_id, 0) if round == self.active_round else 0)
+      if self.is_deleted(rank):
+        manager = '<td>&lt;Slettet&gt;</td>'
+      else:
+        name = html.escape(self.manager_name(rank))
+        manager = f'<td><a href="/da/users/{team_id}" title="{name}">{name}</a></td>'
+      rows.append(f'''<tr><td>{position}</td><td>{fmt(position * 3)}</td><td>{(rank * 7) % 11 - 5}</td>
+<td><a href="/da/{GAME_URL}/userteams/{team_id}">{html.escape(self.team_name(rank))}</a></td>{manager}
+<td>{fmt(value)}</td><td>{fmt(position * 1000)}</td><td>{fmt(value % 100000)}</td></tr>''')
+    return f'''<table class="table">
+<thead><tr><th>#</th><th>Global</th><th>Spring</th><th>Hold</th><th>Manager</th><th>Afstand</th><th>Runde</th><th>Runde</th></tr></thead>
+<tbody>{''.join(rows)}</tbody>
+</table>'''
+
+  def standings_page(self, round: int, page: int) -> str:
+    with self.lock:
+      if round == self.active_round:
+        for _ in range(int(self.drift) + (self.rng.random() < self.drift % 1)):
+          from_position = self.rng.randint(1, self.contestants)
+          to_position = min(max(from_position + self.rng.randint(-3 * PAGE_SIZE, 3 * PAGE_SIZE), 1), self.contestants)
+          self.order.insert(to_position - 1, self.order.pop(from_position - 1))
+      return f'<html><body>{self.standings_table(round, page)}</body></html>'
+
+  def team_players(self, team_id: int, round = None) -> list:
+    round = round or self.active_round
+    edits = self.edits.get(team_id, 0) if round == self.active_round else 0
+    rng = random.Random(self.seed * 1000003 + team_id + 7919 * round + 104729 * edits)
+    squad = []
+    for position, n in [('Målmand', 1), ('Forsvar', 4), ('Midtbane', 4), ('Angreb', 2)]:
+      candidates = [p for p in self.players if p[2] == position]
+      squad.extend(rng.sample(candidates, n))
+    captain = rng.randrange(len(squad))
+    return [(name, club, position, i == captain, 5000000 + 10000 * (int(name.split()[-1]) % 100), rng.randint(-200000, 500000))
+            for i, (name, club, position) in enumerate(squad)]
+
+  def team_page(self, team_id: int) -> str:
+    rank = team_id - 100000
+    rows = []
+    for name, club, position, captain, value, growth in self.team_players(team_id):
+      star = '<i class="icon-star large gold captain"></i>' if captain else ''
+      rows.append(f'<tr class="player" fs-player-name="{name}" fs-player-team="{club}" fs-player-position="{position}" value="{value}" growth="{growth}"><td>{star}{name}</td></tr>')
+    return f'''<html><body>
+{self.byline(team_id)}
+<table><tbody>{''.join(rows)}</tbody></table>
+</body></html>'''
+
+  def byline(self, team_id: int) -> str:
+    rank = team_id - 100000
+    return f'''<div id="fantasyteam-header"><h3>{html.escape(self.team_name(rank))}</h3></div>
+<div class="byline">{GAME}</div>
+<div class="byline">Af <span>-</span> <a href="/da/users/{team_id}">{html.escape(self.manager_name(rank))}</a><br/><strong>Point:</strong> {fmt(1000 + rank)}
+</div>'''
+
+  def rounds_page(self, team_id: int, expanded = None) -> str:
+    """
+    The rounds page of a team, which is only shown to logged in users. Each round can be expanded and collapsed by clicking its toggle.
+    Arguments:
+        team_id (int): the id of the team
+        expanded (list): the rounds that are expanded. Defaults to the active round, like on Holdet.dk
+    """
+    expanded = [self.active_round] if expanded is None else expanded
+    rows, total = [], 0
+    for round in range(1, self.active_round + 1):
+      players = self.team_players(team_id, round)
+      round_growth = sum(growth * (2 if captain else 1) for _, _, _, captain, _, growth in players)
+      total += round_growth
+      rows.append(f'<tr class="turn-header"><td><a class="toggle turn" href="#" onclick="toggleRound({round}); return false;">Runde {round}</a></td><td></td><td>{fmt(round_growth)}</td><td></td></tr>')
+      style = '' if round in expanded else ' style="display: none;"'
+      for name, club, position, captain, value, growth in players:
+        rows.append(f'<tr class="round-{round}"{style}><td>{name} <small>{position}</small></td><td>{club}</td><td>{fmt(growth)}</td><td>{fmt(growth) if captain else ""}</td></tr>')
+    rows.append(f'<tr><td>Alle</td><td></td><td>{fmt(total)}</td><td></td></tr>')
+    return f'''<html><body>
+{self.byline(team_id)}
+<table><thead><tr><th></th><th></th><th>Vækst</th><th>Kaptajn</th></tr></thead>
+<tbody>{''.join(rows)}</tbody></table>
+<script>
+function toggleRound(round) {{
+  document.querySelectorAll('tr.round-' + round).forEach(function (row) {{
+    row.style.display = row.style.display === 'none' ? '' : 'none';
+  }});
+}}
+</script>
+</body></html>'''
+
+  def route(self, path: str):
+    """
+    Get the html for a path on the stand-in site
+    Returns:
+        The html as a string, or None if the path does not exist
+    """
+    path = path.rstrip('/')
+    if path == '/da':
+      return self.front_page()
+    if path == '/da/tour-manager-2022/leaderboards/praemiepuljen':
+      return self.not_started_page()
+    if path == f'/da/{GAME_URL}/leaderboards/praemiepuljen':
+      return self.landing_page()
+    match = re.fullmatch(rf'/da/{GAME_URL}/leaderboards/praemiepuljen/(\d+)/all/rank/asc/(\d+)', path)
+    if match:
+      return self.standings_page(int(match.group(1)), int(match.group(2)))
+    match = re.fullmatch(rf'/da/{GAME_URL}/userteams/(\d+)', path)
+    if match:
+      return self.team_page(int(match.group(1)))
+    match = re.fullmatch(rf'/da/{GAME_URL}/userteams/(\d+)/rounds', path)
+    if match:
+      return self.rounds_page(int(match.group(1)))
+    return None
+
+
+class RecordedSite():
+  def __init__(self, folder, contestants = None):
+    """
+    Serve pages recorded from Holdet.dk with record_fixtures.py. Standings pages beyond the recorded ones are served
+    by repeating the recorded pages with new team and manager ids, and teams that were not recorded are served by one of the recorded teams,
+    so the recorded pages can be used for tables of any size
+    Arguments:
+        folder (str or Path): the folder with the recorded pages and their manifest.json
+        contestants (int): the number of contestants shown on the landing page. Defaults to the recorded number
+    """
+    self.folder = Path(folder)
+    self.manifest = json.loads((self.folder / 'manifest.json').read_text(encoding='utf-8'))
+    self.game = self.manifest['game']
+    self.game_url = self.manifest['game_url']
+    self.pages = {path: (self.folder / name).read_text(encoding='utf-8') for path, name in self.manifest['pages'].items()}
+
+    self.standings = {}
+    self.teams = {}
+    self.rounds = {}
+    for path, page in self.pages.items():
+      match = re.fullmatch(r'.*/leaderboards/praemiepuljen/(\d+)/all/rank/asc/(\d+)', path)
+      if match:
+        self.standings[(int(match.group(1)), int(match.group(2)))] = page
+      match = re.fullmatch(r'.*/userteams/(\d+)(/rounds)?', path)
+      if match:
+        (self.rounds if match.group(2) else self.teams)[int(match.group(1))] = page
+    self.team_ids = sorted(self.teams)
+    self.rounds_ids = sorted(self.rounds)
+
+    landing = self.pages[f'/da/{self.game_url}/leaderboards/praemiepuljen']
+    if contestants is not None:
+      recorded = re.search(r'<h3>([\d.]+)</h3>', landing).group(1)
+      n_pages = (contestants + PAGE_SIZE - 1) // PAGE_SIZE
+      recorded_pages = (int(recorded.replace('.', '')) + PAGE_SIZE - 1) // PAGE_SIZE
+      landing = landing.replace(f'<h3>{recorded}</h3>', f'<h3>{fmt(contestants)}</h3>', 1)
+      landing = re.sub(rf'>\s*{recorded_pages}\s*<', f'>{n_pages}<', landing)
+    self.landing = landing
+
+  def standings_page(self, round: int, page: int) -> str:
+    # pages from other rounds are used if the round was not recorded
+    recorded = {p: html for (r, p), html in self.standings.items() if r == round} or {p: html for (r, p), html in self.standings.items()}
+    numbers = sorted(recorded)
+    cycle, index = divmod(page - 1, len(numbers))
+    html_page = recorded[numbers[index]]
+    if cycle == 0:
+      return html_page
+    # new ids, so the repeated rows are different teams
+    return re.sub(r'/(userteams|users)/(\d+)', lambda m: f'/{m.group(1)}/{int(m.group(2)) + cycle * 10_000_000}', html_page)
+
+  def route(self, path: str):
+    """
+    Get the html for a path on the recorded site
+    Returns:
+        The html as a string, or None if the path does not exist
+    """
+    path = path.rstrip('/')
+    if path == f'/da/{self.game_url}/leaderboards/praemiepuljen':
+      return self.landing
+    if path in self.pages:
+      return self.pages[path]
+    match = re.fullmatch(rf'/da/{self.game_url}/leaderboards/praemiepuljen/(\d+)/all/rank/asc/(\d+)', path)
+    if match and self.standings:
+      return self.standings_page(int(match.group(1)), int(match.group(2)))
+    match = re.fullmatch(rf'/da/{self.game_url}/userteams/(\d+)', path)
+    if match and self.team_ids:
+      return self.teams[self.team_ids[int(match.group(1)) % len(self.team_ids)]]
+    match = re.fullmatch(rf'/da/{self.game_url}/userteams/(\d+)/rounds', path)
+    if match and self.rounds_ids:
+      return self.rounds[self.rounds_ids[int(match.group(1)) % len(self.rounds_ids)]]
+    return None
+
+
+def write_fixtures(folder, site = None):
+  """
+  Save standings and team pages of the stand-in site as html fixtures
+  Arguments:
+      folder (str or Path): the folder to save the fixtures in
+      site (StandinSite): the stand-in site. Defaults to a site with 100 contestants
+  Returns:
+      None
+  """
+  site = site or StandinSite(contestants=100)
+  folder = Path(folder)
+  folder.mkdir(parents=True, exist_ok=True)
+  for page in range(1, site.n_pages + 1):
+    (folder / f'standings_{page}.html').write_text(site.standings_page(site.active_round, page), encoding='utf-8')
+  for rank in [1, 5, 7, 35]:
+    (folder / f'team_{rank}.html').write_text(site.team_page(site.team_id(rank)), encoding='utf-8')
+
+
+def make_handler(site, latency = 0.0, jitter = 0.0, error_rate = 0.0, seed = 0):
+  rng = random.Random(seed)
+  rng_lock = threading.Lock()
+
+  class Handler(BaseHTTPRequestHandler):
+    protocol_version = 'HTTP/1.1'
+
+    def do_GET(self):
+      with rng_lock:
+        delay = max(latency + rng.uniform(-jitter, jitter), 0)
+        fail = rng.random() < error_rate
+      if delay:
+        time.sleep(delay)
+      # a share of the requests fail like an overloaded server does
+      if fail:
+        self.send_response(503)
+        self.send_header('Content-Length', '0')
+        self.end_headers()
+        return
+      # like on Holdet.dk, the rounds page redirects to the team page unless you are logged in
+      if self.path.rstrip('/').endswith('/rounds') and LOGIN_COOKIE not in self.headers.get('Cookie', ''):
+        self.send_response(302)
+        self.send_header('Location', self.path.rstrip('/')[:-len('/rounds')])
+        self.send_header('Content-Length', '0')
+        self.end_headers()
+        return
+
+      html = site.route(self.path)
+      status = 200 if html is not None else 404
+      body = (html if html is not None else 'Not found').encode('utf-8')
+      etag = '"' + hashlib.sha1(body).hexdigest() + '"'
+      if status == 200 and self.headers.get('If-None-Match') == etag:
+        status, body = 304, b''
+      self.send_response(status)
+      self.send_header('Content-Type', 'text/html; charset=utf-8')
+      self.send_header('Content-Length', str(len(body)))
+      self.send_header('ETag', etag)
+      self.end_headers()
+      self.wfile.write(body)
+
+    def log_message(self, format, *args):
+      pass
+
+  return Handler
+
+
+def start_server(site, port = 0, latency = 0.0, jitter = 0.0, error_rate = 0.0):
+  """
+  Start the stand-in server in a background thread
+  Arguments:
+      site (StandinSite or RecordedSite): the stand-in site to serve
+      port (int): the port to listen on. Defaults to a free port
+      latency (float): seconds to wait before answering each request
+      jitter (float): the latency varies uniformly by up to this many seconds in both directions
+      error_rate (float): the share of requests answered with 503 Service Unavailable
+  Returns:
+      The running server. Its url is f'http://127.0.0.1:{server.server_port}'
+  """
+  server = ThreadingHTTPServer(('127.0.0.1', port), make_handler(site, latency, jitter, error_rate))
+  server.daemon_threads = True
+  threading.Thread(target=server.serve_forever, daemon=True).start()
+  return server
+
+
+if __name__ == '__main__':
+  parser = argparse.ArgumentParser(description='Serve a local stand-in for Holdet.dk')
+  parser.add_argument('--port', type=int, default=8000)
+  parser.add_argument('--latency', type=float, default=0.0)
+  parser.add_argument('--jitter', type=float, default=0.0)
+  parser.add_argument('--error-rate', type=float, default=0.0)
+  parser.add_argument('--contestants', type=int, default=None, help='defaults to 1000, or the recorded number with --fixtures')
+  parser.add_argument('--fixtures', default=None, help='serve pages recorded with record_fixtures.py instead of generated pages')
+  args = parser.parse_args()
+
+  site = RecordedSite(args.fixtures, contestants=args.contestants) if args.fixtures else StandinSite(contestants=args.contestants or 1000)
+  server = ThreadingHTTPServer(('127.0.0.1', args.port), make_handler(site, args.latency, args.jitter, args.error_rate))
+  print(f'Serving a Holdet.dk stand-in on http://127.0.0.1:{args.port}', flush=True)
+  server.serve_forever()
@@ -0,0 +1,98 @@
+import pickle
+import sqlite3
+import threading
+
+class CheckpointStore():
+  def __init__(self, path: str):
+    """
+    An sqlite file storing the pages and teams a scraping job has completed, so an interrupted job can be resumed.
+    Each completed item is written as soon as it has been fetched, and the stored DataFrames are returned unchanged on restart
+    Arguments:
+        path (str): the path of the sqlite file. It is created if it does not exist
+    """
+    self.path = path
+    self.__lock = threading.Lock()
+    self.__db = sqlite3.connect(path, check_same_thread=False)
+    self.__db.execute('''CREATE TABLE IF NOT EXISTS checkpoints (
+                           job TEXT NOT NULL,
+                           item TEXT NOT NULL,
+                           data BLOB NOT NULL,
+                           PRIMARY KEY (job, item))''')
+    self.__db.commit()
+
+  def get(self, job: str) -> dict:
+    """
+    Get the completed items of a job
+    Arguments:
+        job (str): the name of the job, e.g. 'tabel|Premier Manager Efterår 2022|4'
+    Returns:
+        A dictionary with the completed items as keys and their DataFrames as values
+    """
+    with self.__lock:
+      rows = self.__db.execute('SELECT item, data FROM checkpoints WHERE job = ?', (job,)).fetchall()
+    return {item: pickle.loads(data) for item, data in rows}
+
+  def keys(self, job: str) -> set:
+    """
+    Get the names of the completed items of a job without loading their DataFrames
+    Arguments:
+        job (str): the name of the job
+    Returns:
+        A set with the completed items
+    """
+    with self.__lock:
+      return {row[0] for row in self.__db.execute('SELECT item FROM checkpoints WHERE job = ?', (job,)).fetchall()}
+
+  def load(self, job: str, item: str):
+    """
+    Get the DataFrame of a single completed item of a job
+    Arguments:
+        job (str): the name of the job
+        item (str): the item
+    Returns:
+        The DataFrame of the item, or None if the item has not been completed
+    """
+    with self.__lock:
+      row = self.__db.execute('SELECT data FROM checkpoints WHERE job = ? AND item = ?', (job, item)).fetchone()
+    return pickle.loads(row[0]) if row is not None else None
+
+  def put(self, job: str, item: str, df):
+    """
+    Store a completed item of a job
+    Arguments:
+        job (str): the name of the job
+        item (str): the item, e.g. a page number or a team_link
+        df (pd.DataFrame): the result of the item
+    Returns:
+        None
+    """
+    data = pickle.dumps(df, protocol=pickle.HIGHEST_PROTOCOL)
+    with self.__lock:
+      self.__db.execute('INSERT OR REPLACE INTO checkpoints VALUES (?, ?, ?)', (job, item, data))
+      self.__db.commit()
+
+  def jobs(self) -> dict:
+    """
+    Get the jobs in the store
+    Arguments:
+        None
+    Returns:
+        A dictionary with the jobs as keys and their number of completed items as values
+    """
+    with self.__lock:
+      return dict(self.__db.execute('SELECT job, COUNT(*) FROM checkpoints GROUP BY job').fetchall())
+
+  def clear(self, job = None):
+    """
+    Delete the completed items of a job, or of all jobs if job is None
+    """
+    with self.__lock:
+      if job is None:
+        self.__db.execute('DELETE FROM checkpoints')
+      else:
+        self.__db.execute('DELETE FROM checkpoints WHERE job = ?', (job,))
+      self.__db.commit()
+
+  def close(self):
+    with self.__lock:
+      self.__db.close()
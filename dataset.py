@@ -0,0 +1,127 @@
+import numpy as np
+import pandas as pd
+import pyarrow as pa
+import pyarrow.dataset as ds
+
+PARTITION_COLUMNS = ['Spil', 'Runde']
+
+# strings that are repeated on many rows are stored as categories (dictionary encoded in parquet)
+CATEGORY_COLUMNS = ['Spil', 'Hold', 'HoldLink', 'Manager', 'ManagerLink', 'Formation', 'Kaptajn',
+                    'SpillerNavn', 'SpillerHold', 'SpillerPosition']
+
+# the smallest integer types that hold the values Holdet.dk uses
+INTEGER_COLUMNS = {'Runde': 'int16',
+                   'Præmiepulje': 'int32',
+                   'Global': 'int32',
+                   'Spring': 'int32',
+                   'ManagerPoints': 'int32',
+                   'Værdi': 'int32',
+                   'Afstand': 'int32',
+                   'RundeVækst': 'int32',
+                   'KaptajnVækst': 'int32',
+                   'SpillerVærdi': 'int32',
+                   'SpillerVækst': 'int32'}
+
+def compact_dtypes(df: pd.DataFrame) -> pd.DataFrame:
+  """
+  Convert a table or teams dataframe from the scraper to compact dtypes. Repeated strings become categories and integers are downcast.
+  Integer columns with missing values (e.g. KaptajnVækst of a team that could not be fetched) become nullable integers, and
+  columns with values that do not fit the smaller type are left unchanged
+  Arguments:
+      df (pd.DataFrame): a dataframe returned by e.g. get_standings_table(), get_teams_from_active_round() or get_table_and_teams()
+  Returns:
+      A copy of the dataframe with compact dtypes
+  """
+  df = df.copy()
+  for column in df.columns:
+    if column in CATEGORY_COLUMNS and not isinstance(df[column].dtype, pd.CategoricalDtype):
+      df[column] = df[column].astype('category')
+
+    elif column in INTEGER_COLUMNS and pd.api.types.is_numeric_dtype(df[column]):
+      dtype = INTEGER_COLUMNS[column]
+      values = df[column]
+      if values.isna().any():
+        dtype = dtype.capitalize()
+      elif not np.array_equal(values, np.floor(values)):
+        continue
+      info = np.iinfo(dtype.lower())
+      if values.min() >= info.min and values.max() <= info.max:
+        df[column] = values.astype(dtype)
+
+  return df
+
+def write_dataset(df: pd.DataFrame, path: str):
+  """
+  Save a table or teams dataframe to a parquet dataset partitioned by Spil and Runde, i.e. with a folder for each game and round.
+  Rounds already in the dataset are replaced, while other rounds are left unchanged, so a dataset can be built up round by round
+  Arguments:
+      df (pd.DataFrame): a dataframe with the columns Spil and Runde, e.g. returned by get_standings_table() or get_table_and_teams()
+      path (str): the folder of the dataset. Save tables and teams in separate folders
+  Returns:
+      None
+  """
+  table = pa.Table.from_pandas(compact_dtypes(df), preserve_index=False)
+  # use_threads=False keeps the rows of each round in the order of the dataframe
+  ds.write_dataset(table, path, format='parquet',
+                   partitioning=PARTITION_COLUMNS, partitioning_flavor='hive',
+                   existing_data_behavior='delete_matching', basename_template='part-{i}.parquet',
+                   use_threads=False)
+
+def open_dataset(path: str) -> ds.Dataset:
+  """
+  Open a parquet dataset saved with write_dataset() without reading it. The dataset can be filtered and read with pyarrow,
+  or queried by e.g. DuckDB or Polars
+  Arguments:
+      path (str): the folder of the dataset
+  Returns:
+      A pyarrow dataset
+  """
+  return ds.dataset(path, format='parquet', partitioning='hive')
+
+def _filter(game, round):
+  expression = None
+  for column, value in (('Spil', game), ('Runde', round)):
+    if value is None:
+      continue
+    values = list(value) if isinstance(value, (list, tuple, set)) else [value]
+    condition = ds.field(column).isin(values)
+    expression = condition if expression is None else expression & condition
+  return expression
+
+def _to_pandas(data, columns) -> pd.DataFrame:
+  df = compact_dtypes(data.to_pandas())
+  if columns is None:
+    # the partition columns are read from the folder names and come last, while the scraper returns them first
+    df = df[[column for column in PARTITION_COLUMNS if column in df.columns] + [column for column in df.columns if column not in PARTITION_COLUMNS]]
+  return df
+
+def iter_dataset(path: str, game = None, round = None, columns = None, batch_size = 100_000):
+  """
+  Read a parquet dataset saved with write_dataset() in batches. Only the folders of the selected games and rounds and the selected columns are read
+  Arguments:
+      path (str): the folder of the dataset
+      game (str or list): the game(s) to read. Defaults to all games
+      round (int or list): the round(s) to read. Defaults to all rounds
+      columns (list): the columns to read. Defaults to all columns
+      batch_size (int): the maximum number of rows in each batch
+  Returns:
+      A generator of dataframes with compact dtypes
+  """
+  scanner = open_dataset(path).scanner(columns=columns, filter=_filter(game, round), batch_size=batch_size, use_threads=False)
+  for batch in scanner.to_batches():
+    if batch.num_rows > 0:
+      yield _to_pandas(batch, columns)
+
+def read_dataset(path: str, game = None, round = None, columns = None) -> pd.DataFrame:
+  """
+  Read a parquet dataset saved with write_dataset(). Only the folders of the selected games and rounds and the selected columns are read
+  Arguments:
+      path (str): the folder of the dataset
+      game (str or list): the game(s) to read. Defaults to all games
+      round (int or list): the round(s) to read. Defaults to all rounds
+      columns (list): the columns to read. Defaults to all columns
+  Returns:
+      A dataframe with compact dtypes
+  """
+  table = open_dataset(path).to_table(columns=columns, filter=_filter(game, round))
+  return _to_pandas(table, columns)
@@ -0,0 +1,131 @@
+import queue
+from concurrent.futures import ThreadPoolExecutor
+from getpass import getpass
+from selenium import webdriver
+from selenium.webdriver.common.by import By
+from selenium.webdriver.chrome.service import Service
+from tqdm import tqdm
+
+def new_driver(chrome_driver_path: str, headless = True):
+  """
+  Start a Chrome webdriver
+  Arguments:
+      chrome_driver_path (str): the path of the chromedriver
+      headless (bool): Set to False in order to show the browser window
+  Returns:
+      The webdriver
+  """
+  options = webdriver.ChromeOptions()
+  if headless:
+    options.add_argument('--headless=new')
+    options.add_argument('--window-size=1920,1080')
+  driver = webdriver.Chrome(service=Service(chrome_driver_path), options=options)
+  if not headless:
+    driver.maximize_window()
+  return driver
+
+def accept_cookies(driver):
+  """
+  Click 'Tillad alle' in the cookie dialog of Holdet.dk if it is shown
+  """
+  cookie_buttons = driver.find_elements(by = By.CLASS_NAME, value = "CybotCookiebotDialogBodyButton")
+  for button in cookie_buttons:
+      if button.text.lower() == "tillad alle":
+          button.click()
+          break
+
+def login_and_export_cookies(chrome_driver_path: str, base_url: str) -> list:
+  """
+  Open a visible browser, let the user log in on Holdet.dk and export the cookies of the logged in session
+  Arguments:
+      chrome_driver_path (str): the path of the chromedriver
+      base_url (str): the url of Holdet.dk
+  Returns:
+      A list of cookies as returned by driver.get_cookies()
+  """
+  driver = new_driver(chrome_driver_path, headless=False)
+  try:
+    driver.get(f'{base_url}/da')
+    accept_cookies(driver)
+
+    print('Log ind på Holdet.dk og tryk herefter ENTER')
+    getpass('Log ind på Holdet.dk og tryk herefter ENTER')
+
+    return driver.get_cookies()
+  finally:
+    driver.quit()
+
+class DriverPool():
+  def __init__(self, chrome_driver_path: str, base_url: str, cookies: list, n_browsers = 4, headless = True):
+    """
+    A pool of Chrome webdrivers sharing the same logged in session on Holdet.dk.
+    The cookies of the session are injected into every browser, so the user only logs in once
+    Arguments:
+        chrome_driver_path (str): the path of the chromedriver
+        base_url (str): the url of Holdet.dk
+        cookies (list): the cookies of a logged in session, e.g. from login_and_export_cookies()
+        n_browsers (int): the number of browsers in the pool
+        headless (bool): Set to False in order to show the browser windows
+    """
+    if n_browsers < 1:
+      raise ValueError('n_browsers skal være mindst 1')
+
+    self.base_url = base_url
+    self.cookies = cookies
+    self.drivers = []
+    self.__idle = queue.Queue()
+
+    try:
+      with ThreadPoolExecutor(max_workers=n_browsers) as executor:
+        for driver in executor.map(lambda _: self.__start_driver(chrome_driver_path, headless), range(n_browsers)):
+          self.drivers.append(driver)
+          self.__idle.put(driver)
+    except Exception:
+      self.quit()
+      raise
+
+  def __start_driver(self, chrome_driver_path: str, headless: bool):
+    driver = new_driver(chrome_driver_path, headless=headless)
+    # cookies can only be added for the domain of the page the browser is on
+    driver.get(f'{self.base_url}/da')
+    accept_cookies(driver)
+    for cookie in self.cookies:
+      driver.add_cookie({key: value for key, value in cookie.items() if key != 'sameSite' or value in ('Strict', 'Lax', 'None')})
+    return driver
+
+  def map(self, fn, items: list, desc = 'Henter hold') -> list:
+    """
+    Call fn(driver, item) for every item, distributing the items across the browsers of the pool
+    Arguments:
+        fn (function): a function taking a webdriver and an item
+        items (list): the items
+        desc (str): the description of the progress bar
+    Returns:
+        A list with the result for every item, in the order of items
+    """
+    def run(item):
+      driver = self.__idle.get()
+      try:
+        return fn(driver, item)
+      finally:
+        self.__idle.put(driver)
+
+    with ThreadPoolExecutor(max_workers=len(self.drivers)) as executor:
+      return list(tqdm(executor.map(run, items), total = len(items), desc = desc))
+
+  def quit(self):
+    """
+    Close all browsers of the pool
+    """
+    for driver in self.drivers:
+      try:
+        driver.quit()
+      except Exception:
+        pass
+    self.drivers = []
+
+  def __enter__(self):
+    return self
+
+  def __exit__(self, *args):
+    self.quit()
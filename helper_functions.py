@@ -1,7 +1,42 @@
+import threading
+import time
+from urllib.parse import urlparse
+
 # helper function to return key for any value
 def get_key(dict, val):
     for key, value in dict.items():
          if val == value:
              return key
- 
+
     return "key doesn't exist"
+
+# helper class to limit the number of requests per second sent to each host
+class RateLimiter():
+    def __init__(self, rate = None):
+        """
+        Arguments:
+            rate (float): the maximum number of requests per second per host. None means no limit
+        """
+        self.rate = rate
+        self.__lock = threading.Lock()
+        self.__next_slot = {}
+
+    def wait(self, url: str):
+        """
+        Block until a request to the host of the url is allowed. Thread-safe
+        Arguments:
+            url (str): the url about to be requested
+        Returns:
+            None
+        """
+        if not self.rate:
+            return
+
+        host = urlparse(url).netloc
+        with self.__lock:
+            now = time.monotonic()
+            slot = max(now, self.__next_slot.get(host, now))
+            self.__next_slot[host] = slot + 1/self.rate
+
+        if slot > now:
+            time.sleep(slot - now)
@@ -4,52 +4,263 @@ from tqdm import tqdm
 import re
 import requests
 import os
+import threading
+import time
+import json
 from bs4 import BeautifulSoup
 from pathlib import Path
-from selenium import webdriver
 from selenium.webdriver.common.by import By
-from selenium.webdriver.chrome.service import Service
-from getpass import getpass
+from collections import deque
+from concurrent.futures import Future
 from helper_functions import get_key
+from http_session import HoldetSession
+from parsers import get_parser, ProcessParser, STANDINGS_COLUMNS
+from response_cache import ResponseCache, FOREVER
+from driver_pool import DriverPool, login_and_export_cookies
+from checkpoint import CheckpointStore
+from popularity import calc_popularity_table
+from metrics import Metrics
+from scheduler import Scheduler, PRIORITY_SUMMARY, PRIORITY_STANDINGS, PRIORITY_TEAMS
+
+TEAM_COLUMNS = ['Spil', 'Runde', 'Hold', 'Formation', 'HoldLink', 'Manager', 'ManagerPoints',
+                'SpillerNavn', 'SpillerHold', 'SpillerPosition', 'SpillerKaptajn', 'SpillerVærdi', 'SpillerVækst']
+
+class LeaderboardSummary():
+  def __init__(self, url: str, fetch, ttl = 300, game = None):
+    """
+    Summary of the landing page of præmiepuljen for a game on Holdet.dk.
+    The page is downloaded and parsed once and reused until it is older than ttl seconds
+    Arguments:
+        url (str): the url of the landing page of præmiepuljen
+        fetch (function): a function taking a url and returning a response from Holdet.dk
+        ttl (float): the number of seconds the summary is reused before it is fetched again
+        game (str): the url of the game on Holdet.dk, without the 'www.holdet.dk/da/' part. Only used when the summary is shown
+    """
+    self.url = url
+    self.game = game
+    self.ttl = ttl
+    self.fetched_at = None
+    self.__fetch = fetch
+    self.__lock = threading.RLock()
+    self.__has_started = None
+    self.__active_round = None
+    self.__contestants = None
+    self.__n_pages = None
+
+  def refresh(self):
+    """
+    Download and parse the landing page of præmiepuljen again
+    Arguments:
+        None
+    Returns:
+        The refreshed summary
+    """
+    with self.__lock:
+      html_raw = self.__fetch(self.url)
+      soup = BeautifulSoup(html_raw.content, 'html.parser')
+      rounds = soup.find_all(name = 'ul', id = 'rounds')
+      self.__has_started = len(rounds) > 0
+
+      if self.__has_started:
+        active_round = rounds[0].find_all(name = 'li', class_ = 'active')[0].text
+        self.__active_round = int(re.findall(r'\d+', active_round)[0])
+        self.__contestants = int(soup.find_all(name = 'div', class_ = 'panel summary')[0].find_all(name='h3')[0].text.replace('.',''))
+        pages = soup.find_all(name = 'ul', class_ = 'pagination')[0].find_all(name='a')
+        self.__n_pages = int(pages[len(pages)-2].text)
+      else:
+        self.__active_round, self.__contestants, self.__n_pages = None, None, None
+
+      self.fetched_at = time.monotonic()
+
+    return self
+
+  def __fresh(self):
+    with self.__lock:
+      if self.fetched_at is None or time.monotonic() - self.fetched_at > self.ttl:
+        self.refresh()
+    return self
+
+  @property
+  def has_started(self) -> bool:
+    return self.__fresh().__has_started
+
+  @property
+  def active_round(self) -> int:
+    return self.__fresh().__active_round
+
+  @property
+  def contestants(self) -> int:
+    return self.__fresh().__contestants
+
+  @property
+  def n_pages(self) -> int:
+    return self.__fresh().__n_pages
+
+  def __repr__(self):
+    # only the values already fetched are shown, so showing the summary never sends a request
+    if self.fetched_at is None:
+      return f'LeaderboardSummary(game={self.game!r}, ikke hentet)'
+    return f'LeaderboardSummary(game={self.game!r}, active_round={self.__active_round}, contestants={self.__contestants})'
 
 class HoldetScraper():
-  def __init__(self):
-    self.__active_games_dict, self.__inactive_games_dict = self.__get_active_games_dict()
+  def __init__(self, max_workers = 1, rate_limit = None, base_url = 'https://www.holdet.dk', summary_ttl = 300,
+               pool_size = None, timeout = (5, 30), max_retries = 5, backoff_factor = 0.5,
+               games_cache = None, concurrent_discovery = False, parser = 'html.parser',
+               cache_dir = None, cache_ttl = 300, cache_max_bytes = 1_000_000_000, parse_workers = 0, parse_queue = None):
+    """
+    Creating a scraper does not send any requests. The list of games is fetched the first time it is needed,
+    and a game is only checked for having started when it is used (or when active_games/inactive_games is read)
+    Arguments:
+        max_workers (int): the maximum number of pages fetched concurrently. Defaults to 1 (one page at a time)
+        rate_limit (float): the maximum number of requests per second sent to Holdet.dk. Defaults to None (no limit)
+        base_url (str): the url of Holdet.dk. Only change this when scraping a local copy of the site
+        summary_ttl (float): the number of seconds the active round, number of contestants and number of pages of a game are reused before they are fetched again
+        pool_size (int): the number of connections to Holdet.dk kept open for reuse. Defaults to max(10, max_workers)
+        timeout (float or tuple): the connect and read timeout in seconds of each request
+        max_retries (int): the number of times a failed request (connection error, timeout, 429 or 5xx) is retried before giving up
+        backoff_factor (float): the base in seconds of the exponential backoff between retries
+        games_cache (str): path to a json file with the list of games on Holdet.dk. If the file exists the games are read from it instead of from Holdet.dk, otherwise it is created the first time the games are fetched
+        concurrent_discovery (bool): Set to True in order to check all games for having started concurrently (using max_workers threads) when active_games or inactive_games is read
+        parser (str): the backend used to parse standings and team pages. 'html.parser' (BeautifulSoup, default) or 'lxml' (faster, same output)
+        cache_dir (str): a folder in which standings and team pages are cached on disk. Defaults to None (no caching)
+        cache_ttl (float): the number of seconds cached pages from the active round are used before they are revalidated. Pages from closed rounds are cached forever
+        cache_max_bytes (int): the maximum size of the cache. The least recently used pages are evicted when it is full
+        parse_workers (int): the number of processes parsing standings and team pages while the threads go on fetching. Defaults to 0 (the pages are parsed in the threads fetching them)
+        parse_queue (int): the maximum number of downloaded pages waiting for or being parsed when parse_workers is set. Defaults to 2 * parse_workers
+    """
+    if max_workers < 1:
+      raise ValueError('max_workers skal være mindst 1')
+
+    self.max_workers = max_workers
+    self.scheduler = Scheduler(max_workers=max_workers)
+    self.base_url = base_url.rstrip('/')
+    self.metrics = Metrics()
+    self.parser = get_parser(parser) if parse_workers == 0 else ProcessParser(parser, workers=parse_workers, queue_depth=parse_queue)
+    self.parser.metrics = self.metrics
+    self.summary_ttl = summary_ttl
+    self.cache_ttl = cache_ttl
+    self.cache = ResponseCache(cache_dir, max_bytes=cache_max_bytes) if cache_dir is not None else None
+    self.session = HoldetSession(pool_size=pool_size or max(10, max_workers), timeout=timeout, max_retries=max_retries,
+                                 backoff_factor=backoff_factor, rate_limit=rate_limit, cache=self.cache)
+    self.__summaries = {}
+    self.__summaries_lock = threading.Lock()
+    self.games_cache = games_cache
+    self.concurrent_discovery = concurrent_discovery
+    self.__games_dict = None
+    self.__games_lock = threading.Lock()
+    self.__login_cookies = None
+
+  @property
+  def active_games(self) -> list:
+    """
+    A sorted list of the games on Holdet.dk that have started
+    """
+    active, _ = self.__get_active_games_dict()
+    return sorted(active)
 
-    self.active_games = [*self.__active_games_dict]
-    self.active_games.sort()
-    
-    self.inactive_games = [*self.__inactive_games_dict]
-    self.inactive_games.sort()
+  @property
+  def inactive_games(self) -> list:
+    """
+    A sorted list of the games on Holdet.dk that have been launched but have not yet started
+    """
+    _, not_yet_started = self.__get_active_games_dict()
+    return sorted(not_yet_started)
 
   def __game_has_started(self, game_url: str) -> bool:
     """
     Check if a specific game on Holdet.dk has started
     Arguments:
-        game (str): the name of a game on Holdet.dk
+        game_url (str): the url of a game on Holdet.dk, without the 'www.holdet.dk/da/' part
     Returns:
         An boolean indicating if the game has started
     """
 
-    url = f'https://www.holdet.dk/da/{game_url}/leaderboards/praemiepuljen'
-    html_raw = requests.get(url)
-    soup = BeautifulSoup(html_raw.content, 'html.parser')
-    rounds = soup.find_all(name = 'ul', id = 'rounds')
-    has_started = len(rounds) > 0
+    return self.__get_summary_from_url(game_url).has_started
+
+  def __get_summary_from_url(self, game_url: str) -> LeaderboardSummary:
+    """
+    Get the cached summary of præmiepuljen for a game on Holdet.dk. The summary is created on first use
+    Arguments:
+        game_url (str): the url of a game on Holdet.dk, without the 'www.holdet.dk/da/' part
+    Returns:
+        The LeaderboardSummary of the game
+    """
+    with self.__summaries_lock:
+      if game_url not in self.__summaries:
+        url = f'{self.base_url}/da/{game_url}/leaderboards/praemiepuljen'
+        self.__summaries[game_url] = LeaderboardSummary(url=url, fetch=self.__get, ttl=self.summary_ttl, game=game_url)
+      return self.__summaries[game_url]
+
+  def get_leaderboard_summary(self, game: str) -> LeaderboardSummary:
+    """
+    Get the summary of præmiepuljen for a specific game on Holdet.dk, i.e. the active round, the number of contestants and the number of pages.
+    The summary is shared by all lookups and is only fetched again when it is older than summary_ttl seconds or when refresh() is called on it
+    Arguments:
+        game (str): the name of an active game on Holdet.dk
+    Returns:
+        The LeaderboardSummary of the game
+    """
+    return self.__get_summary_from_url(self.__get_game_url(game))
 
-    return has_started
+  def __get(self, url: str, cache_ttl = None) -> requests.Response:
+    """
+    Send a GET request to Holdet.dk through the pooled session of the scraper
+    Arguments:
+        url (str): the url to request
+        cache_ttl (float): the number of seconds a cached response may be reused. Defaults to None (the cache is not used)
+    Returns:
+        The response from Holdet.dk
+    """
+    start = time.perf_counter()
+    response = self.session.get(url, cache_ttl=cache_ttl)
+    seconds = time.perf_counter() - start
+    self.metrics.record('http', seconds)
+    self.metrics.record_request(url, response.status_code, len(response.content), getattr(response, 'from_cache', False), seconds)
+    return response
   
   def __get__games_dict(self) -> dict:
     """
-    Get a dictionary of games on Holdet.dk
+    Get a dictionary of games on Holdet.dk. The dictionary is fetched once (or read from games_cache) and reused
+    Arguments:
+        None
+    Returns:
+        A dictionary with games as keys and game urls as values
+    """
+    with self.__games_lock:
+      if self.__games_dict is None:
+        if self.games_cache is not None and os.path.exists(self.games_cache):
+          with open(self.games_cache, encoding='utf-8') as f:
+            self.__games_dict = json.load(f)
+        else:
+          self.__games_dict = self.__fetch_games_dict()
+          if self.games_cache is not None:
+            self.save_games(self.games_cache)
+
+      return self.__games_dict
+
+  def save_games(self, path: str):
+    """
+    Save the list of games on Holdet.dk to a json file, which can be passed as games_cache when creating a new scraper
+    Arguments:
+        path (str): the path of the json file
+    Returns:
+        None
+    """
+    games_dict = self.__games_dict if self.__games_dict is not None else self.__get__games_dict()
+    with open(path, 'w', encoding='utf-8') as f:
+      json.dump(games_dict, f, ensure_ascii=False, indent=2)
+
+  def __fetch_games_dict(self) -> dict:
+    """
+    Fetch a dictionary of games from the front page of Holdet.dk
     Arguments:
         None
     Returns:
         A dictionary with games as keys and game urls as values
     """
 
-    url = 'https://www.holdet.dk/da'
-    html_raw = requests.get(url)
+    url = f'{self.base_url}/da'
+    html_raw = self.__get(url)
     soup = BeautifulSoup(html_raw.content, 'html.parser')
     games = soup.find_all(name='div', id=re.compile('game'))
 
@@ -73,14 +284,33 @@ class HoldetScraper():
     active = {}
     not_yet_started = {}
 
-    for game, game_url in games_dict.items():
-      if self.__game_has_started(game_url):
+    if self.concurrent_discovery:
+      futures = [self.scheduler.submit(self.__game_has_started, game_url, priority=PRIORITY_SUMMARY) for game_url in games_dict.values()]
+      has_started = [future.result() for future in futures]
+    else:
+      has_started = [self.__game_has_started(game_url) for game_url in games_dict.values()]
+
+    for (game, game_url), started in zip(games_dict.items(), has_started):
+      if started:
         active[game] = game_url
       else:
         not_yet_started[game] = game_url
     
     return active, not_yet_started
 
+  def __get_game_url(self, game: str) -> str:
+    """
+    Get the url of an active game on Holdet.dk. Only this game is checked for having started
+    Arguments:
+        game (str): the name of an active game on Holdet.dk
+    Returns:
+        The url of the game, without the 'www.holdet.dk/da/' part
+    """
+    game_url = self.__get__games_dict().get(game)
+    if game_url is None or not self.__game_has_started(game_url):
+      raise ValueError('Det valgte spil er ikke aktivt. Vælg et spil fra active_games listen')
+
+    return game_url
 
   def __get_active_round(self, game: str) -> int:
     """
@@ -91,15 +321,7 @@ class HoldetScraper():
         An integer representing the active round of the game
     """
 
-    game_url = self.__active_games_dict[game]
-    url = f'https://www.holdet.dk/da/{game_url}/leaderboards/praemiepuljen'
-    html_raw = requests.get(url)
-    soup = BeautifulSoup(html_raw.content, 'html.parser')
-    rounds = soup.find_all(name = 'ul', id = 'rounds')[0]
-    active_round = rounds.find_all(name = 'li', class_ = 'active')[0].text
-    active_round = int(re.findall(r'\d+', active_round)[0])  
-
-    return active_round
+    return self.get_leaderboard_summary(game).active_round
 
   def __get_no_of_contestants(self, game: str) -> int:
     """
@@ -109,14 +331,8 @@ class HoldetScraper():
     Returns:
         An integer with the number of contestants in præmiepuljen for the game
     """
-    
-    game_url = self.__active_games_dict[game]
-    url = f'https://www.holdet.dk/da/{game_url}/leaderboards/praemiepuljen'
-    html_raw = requests.get(url)
-    soup = BeautifulSoup(html_raw.content, 'html.parser')
-    contestants = int(soup.find_all(name = 'div', class_ = 'panel summary')[0].find_all(name='h3')[0].text.replace('.',''))
 
-    return contestants
+    return self.get_leaderboard_summary(game).contestants
 
   def __get_no_of_pages(self, game: str) -> int:
     """
@@ -126,15 +342,8 @@ class HoldetScraper():
     Returns:
         An integer with the number of pages in præmiepuljen for the game
     """
-    
-    game_url = self.__active_games_dict[game]
-    url = f'https://www.holdet.dk/da/{game_url}/leaderboards/praemiepuljen'
-    html_raw = requests.get(url)
-    soup = BeautifulSoup(html_raw.content, 'html.parser')
-    pages = soup.find_all(name = 'ul', class_ = 'pagination')[0].find_all(name='a')
-    n_pages = int(pages[len(pages)-2].text)
 
-    return n_pages
+    return self.get_leaderboard_summary(game).n_pages
 
   def __get_game_from_team_link(self, team_link: str) -> str:
     """
@@ -144,64 +353,88 @@ class HoldetScraper():
     Returns:
         The name of the game assoicated with the team
     """
-    for game, game_url in self.__active_games_dict.items():
-      if game_url in team_link:
-          g = game
-          break
-    return g
+    game_url = team_link.split('/userteams/')[0].replace('/da/','')
+    return get_key(self.__get__games_dict(), game_url)
 
-  def __get_standings_table_page(self, game: str, round: int, page: int) -> pd.DataFrame:
+  def __get_standings_table_page(self, game: str, round: int, page: int, refresh = False) -> pd.DataFrame:
     """
     Get data for the contestants in a specific page of the standings table (præmiepuljen) for a specific round of a specific game on Holdet.dk
     Arguments:
         game (str): the name of an active game on Holdet.dk
         round (int): the round of the game
         page (int): the page number of the standings table (præmiepuljen)
+        refresh (bool): Set to True in order to ask Holdet.dk for the page even if it is in the cache
     Returns:
-        A dataframe with data for the contestants in this standings table page of præmiepuljen
+        A Future with a dataframe with data for the contestants in this standings table page of præmiepuljen
     """
-    game_url = self.__active_games_dict[game]
-    url = f'https://www.holdet.dk/da/{game_url}/leaderboards/praemiepuljen/{str(round)}/all/rank/asc/{str(page)}'
-    html_raw = requests.get(url)
-    soup = BeautifulSoup(html_raw.content, 'html.parser')
-    table_html = soup.find_all(name = 'table')
-    table_df = pd.read_html(str(table_html), thousands='.', decimal=',')[0][['#', 'Global', 'Spring', 'Hold', 'Manager', 'Afstand', 'Runde', 'Runde.1']]
-    #%%
-    teams = soup.find_all(name = 'table')[0].find_all('a', href=lambda href: href and '/userteams/' in href)
-    table_df['HoldLink'] = [link.get('href') for link in teams]
-    #%%
-    # Exclude deleted managers
-    table_df = table_df[table_df['Manager']!='<Slettet>']
-    #%%
-    managers = soup.find_all('a',href=lambda href: href and '/users/' in href, title=True)
-    table_df['ManagerLink'] = [link.get('href') for link in managers]
-    #%%
-    table_df.rename(columns={'#': 'Præmiepulje', 
-                                'Afstand': 'Værdi',
-                                'Runde': 'Afstand',
-                                'Runde.1': 'RundeVækst'}, inplace=True)
-    table_df = table_df[['Præmiepulje', 'Global', 'Spring', 'Hold', 'HoldLink', 'Manager', 'ManagerLink', 'Værdi', 'Afstand', 'RundeVækst']]
-    return table_df
+    game_url = self.__get_game_url(game)
+    url = f'{self.base_url}/da/{game_url}/leaderboards/praemiepuljen/{str(round)}/all/rank/asc/{str(page)}'
+    # the standings of a closed round never change
+    cache_ttl = FOREVER if round < self.__get_active_round(game=game) else self.cache_ttl
+    if refresh:
+      cache_ttl = 0
+    html_raw = self.__get(url, cache_ttl=cache_ttl)
+    return self.parser.submit_standings_page(html_raw.content)
+
+  def __then(self, future: Future, fn, priority: int):
+    """
+    Call fn with future when it is done. A page that is being parsed in the parse processes is not done yet, and fn is then queued
+    as a new task in the scheduler, so the thread that fetched the page can fetch the next page instead of waiting for the parsing
+    Arguments:
+        future (Future): e.g. a page being parsed
+        fn (function): the function to call with the done future
+        priority (int): the priority of fn in the scheduler
+    Returns:
+        The result of fn, or a Future with it
+    """
+    if future.done():
+      return fn(future)
+    return self.scheduler.then(future, fn, priority=priority)
   
-  def get_standings_table(self, game: str, round = 0, top = 100, random_sample = False) -> pd.DataFrame:
+  def __map_in_order(self, fn, items: list, desc: str, priority = PRIORITY_TEAMS):
     """
-    Get Top X of præmiepuljen of a specific round of a specific game on Holdet.dk
+    Call fn on every item using the shared scheduler and yield the results in the order of items as they become ready.
+    At most 2 * max_workers items are in progress at a time, so memory use does not grow with the number of items
+    Arguments:
+        fn (function): the function to call
+        items (list): the items
+        desc (str): the description of the progress bar
+        priority (int): the priority of the items in the scheduler
+    Returns:
+        A generator of the results
+    """
+    items = list(items)
+    window = 2 * self.max_workers
+    with tqdm(total = len(items), desc = desc) as progress:
+      in_progress = deque()
+      try:
+        for item in items:
+          in_progress.append(self.scheduler.submit(fn, item, priority=priority))
+          if len(in_progress) >= window:
+            yield in_progress.popleft().result()
+            progress.update(1)
+        while in_progress:
+          yield in_progress.popleft().result()
+          progress.update(1)
+      finally:
+        for future in in_progress:
+          future.cancel()
+
+  def __check_standings_arguments(self, game: str, round: int, top: int):
+    """
+    Validate the arguments of a standings table request
     Arguments:
         game (str): the name of an active game on Holdet.dk
-        round (int): the round of the game. Defaults to the active round
-        top (int): the top part of præmiepuljen you want. Defaults to Top 100. Set to 0 in order to return all.
-        random_sample (bool): Set to True in order to get a random sample from præmiepuljen. The number of teams returned is the number specified in the 'top' parameter.
-
+        round (int): the round of the game. 0 means the active round
+        top (int): the top part of præmiepuljen. 0 means all
     Returns:
-        A dataframe with data for the Top X contestants in præmiepuljen for the specified game and round
+        The round and the number of teams to return
     """
 
-    if game not in self.active_games:
-      raise ValueError('Det valgte spil er ikke aktivt. Vælg et spil fra active_games listen')
+    self.__get_game_url(game) # raises a ValueError if the game is not active
 
     active_round = self.__get_active_round(game=game)
     contestants = self.__get_no_of_contestants(game=game)
-    n_pages = self.__get_no_of_pages(game=game)
 
     if round == 0: # if no round is specified, return results for active round
       round = active_round
@@ -219,125 +452,528 @@ class HoldetScraper():
       print(f'Du har efterspurgt Top {str(top)}, men der findes kun {str(contestants)} deltagere i præmiepuljen. \n Returnerer hele præmiepuljen.')
       top = contestants
 
-    if not random_sample:
-      description = f'{game}, Runde {str(round)}: Henter tabel for Top {str(top)} i præmiepuljen'
-      scrape_range = range(1, int(np.ceil(top/24))+1)
-    else:
-      description = f'{game}, Runde {str(round)}: Henter tabel for {str(top)} tilfældige hold i præmiepuljen'
-      scrape_range = range(1, n_pages + 1)
+    return round, top
 
-    page_list = []
-    for page in tqdm(scrape_range, desc = description):
-      page_df = self.__get_standings_table_page(game=game, round=round, page=page)
-      page_list.append(page_df)
+  def __iter_standings_pages(self, game: str, round: int, pages: list, description: str, checkpoint = None, refresh = False):
+    """
+    Fetch pages of the standings table concurrently and yield them in the order of pages
+    Arguments:
+        game (str): the name of an active game on Holdet.dk
+        round (int): the round of the game
+        pages (list): the page numbers
+        description (str): the description of the progress bar
+        checkpoint (str or CheckpointStore): a checkpoint file for the pages, see get_standings_table()
+        refresh (bool): Set to True in order to fetch the pages again even if they are in the checkpoint or the cache
+    Returns:
+        A generator of dataframes, one per page
+    """
+    get_page = self.__standings_page_fetcher(game=game, round=round, checkpoint=checkpoint, refresh=refresh)
+    yield from self.__map_in_order(get_page, pages, description, priority=PRIORITY_STANDINGS)
 
-    total_df = pd.concat(page_list).reset_index(drop=True)
-    total_df = total_df.drop_duplicates('HoldLink')
+  def __standings_page_fetcher(self, game: str, round: int, checkpoint = None, refresh = False):
+    """
+    Make a function that fetches a page of the standings table, taking it from the checkpoint if it has already been fetched
+    Arguments:
+        game (str): the name of an active game on Holdet.dk
+        round (int): the round of the game
+        checkpoint (str or CheckpointStore): a checkpoint file for the pages, see get_standings_table()
+        refresh (bool): Set to True in order to fetch the pages again even if they are in the checkpoint or the cache
+    Returns:
+        A function taking a page number and returning the dataframe of the page
+    """
+    store = self.__open_checkpoint(checkpoint)
+    job = f'tabel|{game}|{str(round)}'
+    completed = store.keys(job) if store is not None and not refresh else set()
 
-    if len(total_df) < top:
-      print(f'Der findes kun {str(len(total_df))} valide (ikke-slettede) hold i præmiepuljen. \n Returnerer alle disse.')
-      top = len(total_df)
-  
+    def get_page(page):
+      if str(page) in completed:
+        return store.load(job, str(page))
+
+      def finish(parsed):
+        page_df = parsed.result()
+        if store is not None:
+          store.put(job, str(page), page_df)
+        return page_df
+
+      parsed = self.__get_standings_table_page(game=game, round=round, page=page, refresh=refresh)
+      return self.__then(parsed, finish, priority=PRIORITY_STANDINGS)
+
+    return get_page
+
+  def iter_standings(self, game: str, round = 0, top = 100, checkpoint = None):
+    """
+    Get Top X of præmiepuljen of a specific round of a specific game on Holdet.dk one page at a time.
+    Each page is yielded as soon as it (and the pages before it) has been fetched, so the teams can be processed
+    while the rest of the table is being fetched and without keeping the whole table in memory
+    Arguments:
+        game (str): the name of an active game on Holdet.dk
+        round (int): the round of the game. Defaults to the active round
+        top (int): the top part of præmiepuljen you want. Defaults to Top 100. Set to 0 in order to return all.
+        checkpoint (str or CheckpointStore): a checkpoint file for the pages, see get_standings_table()
+    Returns:
+        A generator of dataframes with the same columns as get_standings_table(), one per page of præmiepuljen
+    """
+    round, top = self.__check_standings_arguments(game=game, round=round, top=top)
+    yield from self.__iter_standings(game=game, round=round, top=top, checkpoint=checkpoint)
+
+  def __iter_standings(self, game: str, round: int, top: int, checkpoint = None):
+    """
+    Yield the pages of Top X of præmiepuljen, see iter_standings(). round and top must already have been checked
+    """
+    description = f'{game}, Runde {str(round)}: Henter tabel for Top {str(top)} i præmiepuljen'
+    pages = range(1, int(np.ceil(top/24))+1)
+    page_dfs = self.__iter_standings_pages(game=game, round=round, pages=pages, description=description, checkpoint=checkpoint)
+    yield from self.__trim_standings(page_dfs, game=game, round=round, top=top)
 
+  @staticmethod
+  def __trim_standings(page_dfs, game: str, round: int, top: int):
+    """
+    Yield the pages of the standings table up to Top X without duplicated teams, with the columns Spil and Runde added
+    Arguments:
+        page_dfs (iterable): the dataframes of the pages, in the order of the pages
+        game (str): the name of the game
+        round (int): the round of the game
+        top (int): the number of teams
+    Returns:
+        A generator of dataframes, one per page
+    """
+    # a team can show up on two pages if the table shifts while it is fetched. Only its first appearance is kept
+    seen = set()
+    remaining = top
+    for page_df in page_dfs:
+      page_df = page_df[~page_df['HoldLink'].isin(seen) & ~page_df['HoldLink'].duplicated()]
+      page_df = page_df[0:remaining].reset_index(drop=True)
+      seen.update(page_df['HoldLink'])
+      remaining -= len(page_df)
+
+      page_df['Spil'] = game
+      page_df['Runde'] = round
+      yield page_df
+
+      if remaining == 0:
+        break
+
+  @staticmethod
+  def __find_drift(pages: dict, seen: dict, complete: bool):
+    """
+    Find pages of the standings table that were fetched while the table shifted.
+    A team that moves across the border of two pages between the fetch of the one page and the other shows up on both pages,
+    while another team is missing from both. Such a duplicated team makes every page from its first to its last appearance suspect.
+    A team that has been seen on an earlier fetch but is on none of the pages is missing. It went missing somewhere between the page
+    where it was seen last and the nearest suspect page, so every page in between is suspect too.
+    The ranks in Præmiepulje must also match the positions of the rows, unless a team shares the rank of the team above it
+    Arguments:
+        pages (dict): the pages of the table with the page numbers as keys
+        seen (dict): the page each team was seen on in the latest fetch that contained it, with HoldLink as keys
+        complete (bool): True if the pages reach the bottom of the table. Otherwise teams last seen on the last page may have left the pages
+    Returns:
+        The set of suspect pages, the number of duplicated rows, the number of rows with a wrong rank and the number of missing teams
+    """
+    rows = pd.concat([pd.DataFrame({'Side': page,
+                                    'Position': (page - 1) * 24 + pages[page].index + 1,
+                                    'HoldLink': pages[page]['HoldLink'],
+                                    'Præmiepulje': pages[page]['Præmiepulje']}) for page in sorted(pages)], ignore_index=True)
+    suspect = set()
+
+    duplicated = rows[rows['HoldLink'].duplicated(keep=False)]
+    for _, sides in duplicated.groupby('HoldLink')['Side']:
+      suspect.update(range(sides.min(), sides.max() + 1))
+
+    wrong_rank = (rows['Præmiepulje'] != rows['Position']) & (rows['Præmiepulje'] != rows['Præmiepulje'].shift())
+    for page in rows.loc[wrong_rank, 'Side']:
+      suspect.update(p for p in (page - 1, page) if p in pages)
+
+    last_page = max(pages)
+    present = set(rows['HoldLink'])
+    missing = [page for link, page in seen.items() if link not in present and (complete or page < last_page)]
+    anchors = sorted(suspect)
+    for page in missing:
+      near = min(anchors, key=lambda anchor: abs(anchor - page)) if anchors else page
+      suspect.update(p for p in range(min(page, near) - 1, max(page, near) + 2) if p in pages)
+
+    return suspect, int(rows['HoldLink'].duplicated().sum()), int(wrong_rank.sum()), len(missing)
+
+  def __consistent_standings(self, game: str, round: int, top: int, checkpoint = None, max_refetches = 3):
+    """
+    Get Top X of præmiepuljen as a consistent snapshot. All pages are fetched in one concurrent burst and then checked against
+    a second burst of all pages. Pages that were fetched while the table shifted, see __find_drift(), are fetched again together
+    until no team is duplicated or missing compared with every team seen on the way. The snapshot with the fewest errors is returned
+    Arguments:
+        game (str): the name of an active game on Holdet.dk
+        round (int): the round of the game
+        top (int): the top part of præmiepuljen
+        checkpoint (str or CheckpointStore): a checkpoint file for the pages, see get_standings_table()
+        max_refetches (int): the maximum number of times suspect pages are fetched again after the check burst
+    Returns:
+        A dataframe with the table, and a dictionary describing its consistency
+    """
+    description = f'{game}, Runde {str(round)}: Henter tabel for Top {str(top)} i præmiepuljen'
+    page_numbers = list(range(1, int(np.ceil(top/24))+1))
+    complete = page_numbers[-1] * 24 >= self.__get_no_of_contestants(game=game)
+    pages = dict(zip(page_numbers, self.__iter_standings_pages(game=game, round=round, pages=page_numbers, description=description, checkpoint=checkpoint)))
+
+    seen = {}
+    def remember(fetched):
+      for page, page_df in fetched.items():
+        seen.update(dict.fromkeys(page_df['HoldLink'], page))
+
+    # every snapshot is kept, since a refetch can make the table worse if it shifts again while the pages are fetched
+    remember(pages)
+    snapshots = [dict(pages)]
+    consistency = {'Sider': len(pages), 'Genhentede sider': 0, 'Forsøg': 0}
+
+    # the first refetch is a check of the whole table, which finds the teams that went missing without leaving a duplicate
+    refetch = page_numbers
+    while refetch and consistency['Forsøg'] <= max_refetches:
+      if consistency['Forsøg'] == 0:
+        description = f'{game}, Runde {str(round)}: Kontrollerer tabellen'
+      else:
+        description = f'{game}, Runde {str(round)}: Tabellen har flyttet sig. Henter {str(len(refetch))} sider igen'
+      # each run of neighbouring pages is fetched on its own, so the run is only exposed to the moves made while it is fetched
+      runs = np.split(np.array(refetch), np.flatnonzero(np.diff(refetch) > 1) + 1)
+      for run in runs:
+        fetched = dict(zip(run.tolist(), self.__iter_standings_pages(game=game, round=round, pages=run.tolist(), description=description, checkpoint=checkpoint, refresh=True)))
+        remember(fetched)
+        pages.update(fetched)
+      snapshots.append(dict(pages))
+      consistency['Genhentede sider'] += len(refetch)
+      consistency['Forsøg'] += 1
+      refetch = sorted(self.__find_drift(pages, seen, complete)[0])
+
+    # the snapshots are compared with every team seen, also the teams seen after the snapshot was taken
+    errors = [self.__find_drift(snapshot, seen, complete)[1:] for snapshot in snapshots]
+    # missing teams are worse than duplicates, which are only included once
+    best = min(range(len(snapshots)), key=lambda i: (errors[i][2], sum(errors[i]), -i))
+    pages = snapshots[best]
+    duplicates, wrong_ranks, missing = errors[best]
+    n_rows = [sum(len(page_df) for page_df in snapshot.values()) for snapshot in snapshots]
+    consistency.update({'Konsistens før': 1 - sum(errors[0]) / max(n_rows[0], 1),
+                        'Dubletter': duplicates,
+                        'Rangfejl': wrong_ranks,
+                        'Manglende': missing,
+                        'Konsistens': 1 - (duplicates + wrong_ranks + missing) / max(n_rows[best], 1)})
+
+    if duplicates + wrong_ranks + missing:
+      print(f'Tabellen er ikke konsistent efter {str(consistency["Forsøg"])} forsøg: {str(duplicates)} hold optræder to gange og er kun medtaget én gang, og {str(missing)} hold mangler')
+
+    total_df = pd.concat([pages[page] for page in page_numbers]).reset_index(drop=True)
+    total_df = total_df.drop_duplicates('HoldLink')[0:top]
     total_df['Spil'] = game
     total_df['Runde'] = round
 
-    if not random_sample:
-      total_df = total_df[0:top]
+    return total_df, consistency
+
+  def __sample_standings(self, game: str, round: int, top: int, seed = None, oversample = 1.2, strata = None, checkpoint = None) -> pd.DataFrame:
+    """
+    Get a random sample of teams from præmiepuljen while only fetching the pages containing the sampled teams.
+    Positions in the table are drawn at random and mapped to pages of 24 teams. Positions held by deleted managers are replaced
+    by drawing more positions, so the sample is uniform over the valid teams
+    Arguments:
+        game (str): the name of an active game on Holdet.dk
+        round (int): the round of the game
+        top (int): the number of teams in the sample
+        seed (int): seed of the random generator. The same seed returns the same sample from the same table
+        oversample (float): the number of positions drawn per missing team, to cover deleted managers without fetching more pages afterwards
+        strata (list): rank boundaries, e.g. [100, 1000], dividing præmiepuljen into bands. Each band gets its proportional share of the sample
+        checkpoint (str or CheckpointStore): a checkpoint file for the pages, see get_standings_table()
+    Returns:
+        A dataframe with the sampled teams
+    """
+    contestants = self.__get_no_of_contestants(game=game)
+    rng = np.random.default_rng(seed)
+
+    # the bands are (lows[i], highs[i]] and get a share of the sample proportional to their size (largest remainder)
+    highs = sorted({int(b) for b in (strata or []) if 0 < b < contestants}) + [contestants]
+    lows = [0] + highs[:-1]
+    exact = top * (np.array(highs) - np.array(lows)) / contestants
+    quotas = np.floor(exact).astype(int)
+    quotas[np.argsort(quotas - exact)[:top - quotas.sum()]] += 1
+
+    # every band is visited in a random order, and positions are taken from the front of the order until the band is full
+    orders = [rng.permutation(np.arange(low + 1, high + 1)) for low, high in zip(lows, highs)]
+    drawn = [0] * len(orders)
+    hits = [[] for _ in orders]
+    pages = {}
+    description = f'{game}, Runde {str(round)}: Henter tabel for {str(top)} tilfældige hold i præmiepuljen'
+
+    while True:
+      draws = []
+      for band, order in enumerate(orders):
+        missing = quotas[band] - len(hits[band])
+        if missing > 0 and drawn[band] < len(order):
+          n = int(np.ceil(missing * oversample))
+          draws.append((band, order[drawn[band]:drawn[band] + n]))
+          drawn[band] += n
+      if not draws:
+        break
+
+      new_pages = sorted({(position - 1) // 24 + 1 for _, positions in draws for position in positions} - pages.keys())
+      pages.update(zip(new_pages, self.__iter_standings_pages(game=game, round=round, pages=new_pages, description=description, checkpoint=checkpoint)))
+
+      # the index of a page is the row number on the page before deleted managers were removed
+      for band, positions in draws:
+        for position in positions:
+          page, row = (position - 1) // 24 + 1, (position - 1) % 24
+          if row in pages[page].index and len(hits[band]) < quotas[band]:
+            hits[band].append((page, row))
+
+    selected = sorted(hit for band_hits in hits for hit in band_hits)
+    rows = [pages[page].loc[[row]] for page, row in selected]
+    if rows:
+      sample_df = pd.concat(rows).reset_index(drop=True)
     else:
-      total_df = total_df.sample(n = top)
+      sample_df = pd.DataFrame(columns=next(iter(pages.values())).columns if pages else STANDINGS_COLUMNS)
+    sample_df = sample_df.drop_duplicates('HoldLink')
+    sample_df['Spil'] = game
+    sample_df['Runde'] = round
 
-    total_df.sort_values(by=['Præmiepulje'], inplace=True)
-    total_df = total_df.reset_index(drop=True)  
+    return sample_df
 
+  def get_standings_table(self, game: str, round = 0, top = 100, random_sample = False, checkpoint = None,
+                          seed = None, oversample = 1.2, strata = None,
+                          consistent = False, max_refetches = 3, return_consistency = False) -> pd.DataFrame:
+    """
+    Get Top X of præmiepuljen of a specific round of a specific game on Holdet.dk
+    Arguments:
+        game (str): the name of an active game on Holdet.dk
+        round (int): the round of the game. Defaults to the active round
+        top (int): the top part of præmiepuljen you want. Defaults to Top 100. Set to 0 in order to return all.
+        random_sample (bool): Set to True in order to get a random sample from præmiepuljen. The number of teams returned is the number specified in the 'top' parameter.
+                              Only the pages containing the sampled teams are fetched.
+        checkpoint (str or CheckpointStore): a checkpoint file in which each page is saved as soon as it has been fetched. Pages already in the file are not fetched again, so an interrupted run can be resumed by running it again
+        seed (int): seed for random_sample. Set it in order to get the same sample every time from the same table
+        oversample (float): the number of positions drawn per team in random_sample, to cover deleted managers. Defaults to 1.2
+        strata (list): rank boundaries for random_sample, e.g. [100, 1000]. Each rank band gets its proportional share of the sample. Defaults to None (no stratification)
+        consistent (bool): Set to True during matches in order to get a consistent snapshot of the table. The table is checked against a second fetch of all pages,
+                           and pages fetched while the table shifted, so that teams show up twice or are missing, are fetched again until the table is consistent. Not used with random_sample
+        max_refetches (int): the maximum number of times the shifted pages are fetched again after the check when consistent is True
+        return_consistency (bool): Set to True in order to also return a dictionary with the consistency of the table ('Konsistens' is only 1.0 for a table that passed the check)
+
+    Returns:
+        A dataframe with data for the Top X contestants in præmiepuljen for the specified game and round,
+        and if return_consistency is True a dictionary with the consistency of the table
+    """
+
+    round, top = self.__check_standings_arguments(game=game, round=round, top=top)
+
+    consistency = None
+    if consistent and not random_sample:
+      total_df, consistency = self.__consistent_standings(game=game, round=round, top=top, checkpoint=checkpoint, max_refetches=max_refetches)
+    elif not random_sample:
+      page_list = list(self.__iter_standings(game=game, round=round, top=top, checkpoint=checkpoint))
+      total_df = pd.concat(page_list).reset_index(drop=True)
+    else:
+      total_df = self.__sample_standings(game=game, round=round, top=top, seed=seed, oversample=oversample, strata=strata, checkpoint=checkpoint)
+
+    total_df = self.__sort_standings(total_df, top=top)
+
+    if return_consistency:
+      return total_df, consistency
     return total_df  
 
-  def __get_team(self, team_link: str) -> pd.DataFrame:
+  @staticmethod
+  def __sort_standings(total_df: pd.DataFrame, top: int) -> pd.DataFrame:
+    """
+    Sort a standings table by Præmiepulje and tell if it has fewer than the requested number of teams
+    """
+    if len(total_df) < top:
+      print(f'Der findes kun {str(len(total_df))} valide (ikke-slettede) hold i præmiepuljen. \n Returnerer alle disse.')
+
+    total_df = total_df.sort_values(by=['Præmiepulje'])
+    return total_df.reset_index(drop=True)
+
+  def __open_checkpoint(self, checkpoint):
+    """
+    Open a checkpoint file
+    Arguments:
+        checkpoint (str or CheckpointStore): the path of a checkpoint file, an open CheckpointStore or None
+    Returns:
+        A CheckpointStore, or None if checkpoint is None
+    """
+    if checkpoint is None or isinstance(checkpoint, CheckpointStore):
+      return checkpoint
+    return CheckpointStore(checkpoint)
+
+  def __get_team_page(self, team_link: str) -> Future:
     """
-    Get a specific team on Holdet.dk
+    Fetch the page of a specific team on Holdet.dk and start parsing it
     Arguments:
         team_link (str): the url of a team on Holdet.dk, without the 'www.holdet.dk' part
     Returns:
-        A dataframe with data for the specified team
+        A Future with the name of the team, the name of the manager, the points of the manager and the players, see __build_team()
     """
+    url = f'{self.base_url}{team_link}'
+    page = self.__get(url, cache_ttl=self.cache_ttl)
+    return self.parser.submit_team_page(page.content)
 
-    url = f'https://www.holdet.dk{team_link}'
-    page = requests.get(url)
-    soup = BeautifulSoup(page.content, 'html.parser')
-    players = soup.find_all(name = 'tbody')[0].find_all(name = 'tr', class_ = re.compile('p'))
-    
-    team_list = []
-    for p in players:
-      captain_check = p.find(name='i', class_='icon-star large gold captain')
-      if captain_check is not None:
-        captain = True
-      else:
-        captain = False
-
-      row = {
-          'SpillerNavn': p['fs-player-name'],
-          'SpillerHold': p['fs-player-team'],
-          'SpillerPosition': p['fs-player-position'],
-          'SpillerKaptajn': captain,
-          'SpillerVærdi': int(p['value']),
-          'SpillerVækst': int(p['growth'])
-      }
-      team_list.append(row)
-    
-    team = pd.DataFrame.from_records(team_list)
+  def __build_team(self, parsed: tuple, team_link: str, game: str, round: int) -> pd.DataFrame:
+    """
+    Build the dataframe of a team from its parsed page
+    Arguments:
+        parsed (tuple): the name of the team, the name of the manager, the points of the manager and the players, see __get_team_page()
+        team_link (str): the url of the team on Holdet.dk, without the 'www.holdet.dk' part
+        game (str): the name of the game of the team
+        round (int): the active round of the game
+    Returns:
+        A dataframe with data for the specified team
+    """
+    team_name, manager, manager_points, team_list = parsed
 
-    game_url = team_link.split('/userteams/')[0].replace('/da/','')
-    game = get_key(self.__active_games_dict, game_url)
+    with self.metrics.timer('build_dataframe'):
+      team = pd.DataFrame.from_records(team_list)
 
-    team['Spil'] = game
-    team['Runde'] = self.__get_active_round(game=game)
-    team['Hold'] = soup.find_all(name = 'div', id = 'fantasyteam-header')[0].find(name = 'h3').text
-    team['Formation'] = str((team['SpillerPosition']=='Forsvar').sum()) + '-' + str((team['SpillerPosition']=='Midtbane').sum()) + '-' + str((team['SpillerPosition']=='Angreb').sum())
-    team['Manager'] = soup.find_all(name = 'div', class_ = 'byline')[1].contents[3].text
-    team['ManagerPoints'] = int(str(soup.find_all(name = 'div', class_ = 'byline')[1].contents[6]).strip().replace('.', ''))
-    team['HoldLink'] = team_link
+      team['Spil'] = game
+      team['Runde'] = round
+      team['Hold'] = team_name
+      team['Formation'] = str((team['SpillerPosition']=='Forsvar').sum()) + '-' + str((team['SpillerPosition']=='Midtbane').sum()) + '-' + str((team['SpillerPosition']=='Angreb').sum())
+      team['Manager'] = manager
+      team['ManagerPoints'] = manager_points
+      team['HoldLink'] = team_link
 
-    team = team[['Spil', 'Runde', 'Hold', 'Formation', 'HoldLink', 'Manager', 'ManagerPoints', 
-                 'SpillerNavn', 'SpillerHold', 'SpillerPosition', 'SpillerKaptajn', 'SpillerVærdi', 'SpillerVækst']]
+      team = team[TEAM_COLUMNS]
 
     return team
 
-  def get_teams_from_active_round(self, team_link_list: list) -> pd.DataFrame:
+  def __iter_team_results(self, team_link_list: list, checkpoint = None):
+    """
+    Fetch teams from the active round concurrently and yield them in the order of team_link_list.
+    A team that cannot be fetched does not stop the others
+    Arguments:
+        team_link_list (list): A list of team_links containing the url of a team on Holdet.dk, without the 'www.holdet.dk' part
+        checkpoint (str or CheckpointStore): a checkpoint file for the teams, see get_teams_from_active_round()
+    Returns:
+        A generator of tuples (team_link, team dataframe, exception). Either the dataframe or the exception is None
+    """
+    team_link_list = list(team_link_list)
+    get_team = self.__team_fetcher(team_link_list=team_link_list, checkpoint=checkpoint)
+    yield from self.__map_in_order(get_team, team_link_list, 'Henter hold')
+
+  def __team_fetcher(self, team_link_list: list, checkpoint = None):
+    """
+    Make a function that fetches a team from the active round, taking it from the checkpoint if it has already been fetched
+    Arguments:
+        team_link_list (list): the team_links the function will be called with
+        checkpoint (str or CheckpointStore): a checkpoint file for the teams, see get_teams_from_active_round()
+    Returns:
+        A function taking a team_link and returning a tuple (team_link, team dataframe, exception). Either the dataframe or the exception is None
+    """
+    # the game and active round are looked up once per game in the batch instead of once per team.
+    # A link to an unknown or inactive game is reported as a failure of that team only
+    games, active_rounds, lookup_errors = {}, {}, {}
+    for team_link in team_link_list:
+      try:
+        game = self.__get_game_from_team_link(team_link=team_link)
+      except Exception as e:
+        game = team_link
+        lookup_errors[game] = e
+      games[team_link] = game
+      if game in active_rounds or game in lookup_errors:
+        continue
+      try:
+        active_rounds[game] = self.__get_active_round(game=game)
+      except Exception as e:
+        lookup_errors[game] = e
+
+    store = self.__open_checkpoint(checkpoint)
+    jobs = {game: f'hold|{game}|{str(active_round)}' for game, active_round in active_rounds.items()}
+    completed = {game: store.keys(job) if store is not None else set() for game, job in jobs.items()}
+
+    def get_team(team_link):
+      try:
+        game = games[team_link]
+        if game in lookup_errors:
+          raise lookup_errors[game]
+        if team_link in completed[game]:
+          return team_link, store.load(jobs[game], team_link), None
+        parsed = self.__get_team_page(team_link=team_link)
+      except Exception as e:
+        return team_link, None, e
+
+      def finish(parsed):
+        try:
+          team_df = self.__build_team(parsed.result(), team_link=team_link, game=game, round=active_rounds[game])
+          if store is not None:
+            store.put(jobs[game], team_link, team_df)
+          return team_link, team_df, None
+        except Exception as e:
+          return team_link, None, e
+
+      return self.__then(parsed, finish, priority=PRIORITY_TEAMS)
+
+    return get_team
+
+  def iter_teams(self, team_link_list: list, checkpoint = None, failures = None):
+    """
+    Get teams on Holdet.dk one team at a time. Each team is yielded as soon as it (and the teams before it) has been fetched,
+    so the teams can be processed while the rest are being fetched and without keeping them all in memory
+    Warning: The teams returned will always be those of the currently active round!
+    Arguments:
+        team_link_list (list): A list of team_links containing the url of a team on Holdet.dk, without the 'www.holdet.dk' part
+        checkpoint (str or CheckpointStore): a checkpoint file for the teams, see get_teams_from_active_round()
+        failures (list): a list to which a dictionary with the keys 'HoldLink' and 'Fejl' is appended for each team that could not be fetched. Defaults to None (failed teams are skipped silently)
+    Returns:
+        A generator of dataframes with the same columns as get_teams_from_active_round(), one per team
     """
-    Get teams on Holdet.dk
+    for team_link, team_df, e in self.__iter_team_results(team_link_list=team_link_list, checkpoint=checkpoint):
+      if e is not None:
+        if failures is not None:
+          failures.append({'HoldLink': team_link, 'Fejl': repr(e)})
+        continue
+      yield team_df
+
+  def get_teams_from_active_round(self, team_link_list: list, return_failures = False, checkpoint = None) -> pd.DataFrame:
+    """
+    Get teams on Holdet.dk. The teams are fetched concurrently using max_workers threads.
+    A team that cannot be fetched does not stop the others. It is left out of the result and reported as a failure instead
     Warning: The teams returned will always be those of the currently active round!
     Arguments:
         team_link_list (list): A list of team_links containing the url of a team on Holdet.dk, without the 'www.holdet.dk' part
+        return_failures (bool): Set to True in order to also return a dataframe with the teams that could not be fetched
+        checkpoint (str or CheckpointStore): a checkpoint file in which each team is saved as soon as it has been fetched. Teams already in the file are not fetched again, so an interrupted run can be resumed by running it again
     Returns:
-        A dataframe with data for the specified teams
+        A dataframe with data for the specified teams, in the order of team_link_list,
+        and if return_failures is True a dataframe with the columns 'HoldLink' and 'Fejl' for the teams that could not be fetched
     """
+    failure_list = []
+    team_list = list(self.iter_teams(team_link_list=team_link_list, checkpoint=checkpoint, failures=failure_list))
+    failures = pd.DataFrame(failure_list, columns=['HoldLink', 'Fejl'])
 
-    team_list = []
-    for team_link in tqdm(team_link_list, desc = f'Henter hold'):
-      team_df = self.__get_team(team_link=team_link)
-      team_list.append(team_df)
+    if len(failures) > 0 and not return_failures:
+      print(f'{str(len(failures))} hold kunne ikke hentes og er udeladt. Sæt return_failures=True for at se hvilke.')
 
-    teams_df = pd.concat(team_list).reset_index(drop=True)  
+    if len(team_list) > 0:
+      teams_df = pd.concat(team_list).reset_index(drop=True)
+    else:
+      teams_df = pd.DataFrame(columns=TEAM_COLUMNS)
+
+    if return_failures:
+      return teams_df, failures
     return teams_df
   
-  def __get_team_from_old_round(self, driver, team_link: str, round: int) -> pd.DataFrame:
+  def __get_team_from_old_round(self, driver, team_link: str, round: int, game = None, active_round = None) -> pd.DataFrame:
     """
     Get a team on Holdet.dk from a round that is not active anymore
     Warning: You need a 'gold team' in the requested game for this to work and you are required to log in during the proces!
     Arguments:
+        driver: a webdriver logged in on Holdet.dk
         team_link (str): the url of a team on Holdet.dk, without the 'www.holdet.dk' part
         round (int): the round from which you want this team
+        game (str): the name of the game of the team. Looked up from the team_link if not given
+        active_round (int): the active round of the game. Looked up if not given
     Returns:
         A dataframe with data for the specified team from the specified round
     """
 
-    driver.get(f'https://www.holdet.dk{team_link}/rounds')
+    with self.metrics.timer('browser'):
+      driver.get(f'{self.base_url}{team_link}/rounds')
 
     if not '/rounds' in driver.current_url:
       raise ValueError('Du er logget ind med en bruger som ikke har et guldhold i det pågældende spil. Du kan derfor kun hente data fra den aktive runde!')
 
-    game = self.__get_game_from_team_link(team_link=team_link)
-    active_round = self.__get_active_round(game=game)
+    if game is None:
+      game = self.__get_game_from_team_link(team_link=team_link)
+    if active_round is None:
+      active_round = self.__get_active_round(game=game)
 
     runde_buttons = driver.find_elements(by = By.CLASS_NAME, value = "toggle.turn")
     for button in runde_buttons: # fold den aktive runde ind
@@ -350,7 +986,20 @@ class HoldetScraper():
             button.click()
             break
 
-    soup = BeautifulSoup(driver.page_source, 'html.parser')
+    return self.__parse_team_from_old_round(page_source=driver.page_source, team_link=team_link, game=game, round=round)
+
+  def __parse_team_from_old_round(self, page_source: str, team_link: str, game: str, round: int) -> pd.DataFrame:
+    """
+    Parse the rounds page of a team on Holdet.dk with the requested round expanded
+    Arguments:
+        page_source (str): the html of the rounds page
+        team_link (str): the url of the team on Holdet.dk, without the 'www.holdet.dk' part
+        game (str): the name of the game of the team
+        round (int): the expanded round
+    Returns:
+        A dataframe with data for the specified team from the specified round
+    """
+    soup = BeautifulSoup(page_source, 'html.parser')
 
     table_html = soup.find_all(name = 'table')
     table_df = pd.read_html(str(table_html), thousands='.', decimal=',')[0]
@@ -389,17 +1038,76 @@ class HoldetScraper():
 
     return table_df
 
-  def get_teams_from_old_round(self, team_link_list: list, round: int) -> pd.DataFrame:
+  def __parse_team_history(self, page_source: str, team_link: str, game: str, rounds: list) -> pd.DataFrame:
+    """
+    Parse the rounds page of a team on Holdet.dk with several rounds expanded. The players of each round are listed below the toggle of the round
+    Arguments:
+        page_source (str): the html of the rounds page
+        team_link (str): the url of the team on Holdet.dk, without the 'www.holdet.dk' part
+        game (str): the name of the game of the team
+        rounds (list): the expanded rounds
+    Returns:
+        A dataframe with data for the specified team with a row per player per round
+    """
+    soup = BeautifulSoup(page_source, 'html.parser')
+
+    table_html = soup.find_all(name = 'table')
+    table_df = pd.read_html(str(table_html), thousands='.', decimal=',')[0]
+    table_df.rename(columns={'Unnamed: 0': 'SpillerNavn',
+                            'Unnamed: 1': 'SpillerPosition',
+                            'Vækst': 'SpillerVækst',
+                            'Kaptajn': 'KaptajnVækst'}, inplace=True)
+    table_df = table_df[['SpillerNavn', 'SpillerPosition', 'SpillerVækst', 'KaptajnVækst']]
+
+    # the rows of a round follow the 'Runde X' row of the round, and the 'Alle' row ends the last round
+    round_headers = table_df['SpillerNavn'].str.extract(r'^Runde (\d+)$', expand=False)
+    round_headers[table_df['SpillerNavn'] == 'Alle'] = '0'
+    table_df['Runde'] = round_headers.ffill()
+    table_df = table_df[round_headers.isna() & table_df['Runde'].notna()].copy()
+    table_df['Runde'] = table_df['Runde'].astype(int)
+    table_df = table_df[table_df['Runde'].isin(rounds)].reset_index(drop=True)
+
+    table_df['SpillerKaptajn'] = table_df['KaptajnVækst'].notna()
+    table_df['SpillerPosition'] = table_df['SpillerNavn'].str.split(' ').str[-1].str.strip()
+    table_df['SpillerNavn'] = [player.replace(position, '').strip() for player, position in zip(table_df['SpillerNavn'], table_df['SpillerPosition'])]
+
+    positions = table_df.groupby('Runde')['SpillerPosition']
+    formation = (positions.transform(lambda p: (p=='Forsvar').sum()).astype(str) + '-' +
+                 positions.transform(lambda p: (p=='Midtbane').sum()).astype(str) + '-' +
+                 positions.transform(lambda p: (p=='Angreb').sum()).astype(str))
+
+    table_df['Spil'] = game
+    table_df['Hold'] = soup.find_all(name = 'div', id = 'fantasyteam-header')[0].find(name = 'h3').text
+    table_df['Formation'] = formation
+    table_df['Manager'] = soup.find_all(name = 'div', class_ = 'byline')[1].contents[3].text
+    table_df['ManagerPoints'] = int(str(soup.find_all(name = 'div', class_ = 'byline')[1].contents[6]).strip().replace('.', ''))
+    table_df['HoldLink'] = team_link
+    table_df['SpillerHold'] = 'DummyHold'
+    table_df['SpillerVærdi'] = 0
+
+    table_df = table_df.sort_values(by=['Runde'], kind='stable').reset_index(drop=True)
+    table_df = table_df[['Spil', 'Runde', 'Hold', 'Formation', 'HoldLink', 'Manager', 'ManagerPoints', 
+                         'SpillerNavn', 'SpillerHold', 'SpillerPosition', 'SpillerKaptajn', 'SpillerVærdi', 'SpillerVækst']]
+
+    return table_df
+
+  def get_teams_from_old_round(self, team_link_list: list, round: int, n_browsers = None, headless = True, cookies = None, checkpoint = None) -> pd.DataFrame:
     """
-    Get teams on Holdet.dk from a round that is not active anymore
+    Get teams on Holdet.dk from a round that is not active anymore.
+    You log in once in a visible browser, after which the session is shared by a pool of browsers that fetch the teams concurrently
     Warning: You need a 'gold team' in the requested game for this to work and you are required to log in during the proces!
     Note: The values returned in the columns 'SpillerHold' and 'SpillerVærdi' are dummy values since these can't be found on the team page for old rounds!
     Arguments:
         team_link_list (list): A list of team_links containing the url of a team on Holdet.dk, without the 'www.holdet.dk' part
         round (int): the round from which you want these teams
+        n_browsers (int): the number of browsers fetching teams. Defaults to max_workers
+        headless (bool): Set to False in order to show the browsers fetching teams
+        cookies (list): cookies of a logged in session, e.g. from export_login_cookies(). Defaults to the session of an earlier login, or asks you to log in
+        checkpoint (str or CheckpointStore): a checkpoint file in which each team is saved as soon as it has been fetched. Teams already in the file are not fetched again, so an interrupted run can be resumed by running it again
     Returns:
         A dataframe with data for the specified teams from the specified round
     """
+    team_link_list = list(team_link_list)
 
     game = self.__get_game_from_team_link(team_link=team_link_list[0])
     active_round = self.__get_active_round(game=game)
@@ -409,40 +1117,160 @@ class HoldetScraper():
     elif round > active_round:
       raise ValueError(f'Den sidste tilgængelige runde er Runde {str(active_round)}')
 
+    store = self.__open_checkpoint(checkpoint)
+    job = f'gammel-hold|{game}|{str(round)}'
+    completed = store.get(job) if store is not None else {}
+    remaining = [team_link for team_link in dict.fromkeys(team_link_list) if team_link not in completed]
+
+    def get_team(driver, team_link):
+      team_df = self.__get_team_from_old_round(driver=driver, team_link=team_link, round=round, game=game, active_round=active_round)
+      if store is not None:
+        store.put(job, team_link, team_df)
+      return team_df
+
+    if len(remaining) > 0:
+      chrome_driver_path = self.__get_chrome_driver_path()
+      cookies = self.__get_login_cookies(chrome_driver_path=chrome_driver_path, cookies=cookies)
+
+      with DriverPool(chrome_driver_path=chrome_driver_path, base_url=self.base_url, cookies=cookies,
+                      n_browsers=min(n_browsers or self.max_workers, len(remaining)), headless=headless) as pool:
+        completed.update(zip(remaining, pool.map(get_team, remaining)))
+
+    team_list = [completed[team_link] for team_link in team_link_list]
+
+    teams_df = pd.concat(team_list).reset_index(drop=True)  
+
+    return teams_df
+
+  def get_team_history(self, team_link: str, rounds = None, headless = True, cookies = None) -> pd.DataFrame:
+    """
+    Get a team on Holdet.dk from several rounds at once. All requested rounds are expanded in a single visit to the rounds page of the team
+    and parsed from the same page, instead of loading the page once per round
+    Warning: You need a 'gold team' in the requested game for this to work and you are required to log in during the proces!
+    Note: The values returned in the columns 'SpillerHold' and 'SpillerVærdi' are dummy values since these can't be found on the team page for old rounds!
+    Arguments:
+        team_link (str): the url of a team on Holdet.dk, without the 'www.holdet.dk' part
+        rounds (list): the rounds you want the team from. Defaults to all rounds up to and including the active round
+        headless (bool): Set to False in order to show the browser fetching the team
+        cookies (list): cookies of a logged in session, e.g. from export_login_cookies(). Defaults to the session of an earlier login, or asks you to log in
+    Returns:
+        A dataframe with data for the specified team with a row per player per round, sorted by 'Runde'
+    """
+    game = self.__get_game_from_team_link(team_link=team_link)
+    active_round = self.__get_active_round(game=game)
+
+    if rounds is None:
+      rounds = range(1, active_round + 1)
+    rounds = sorted(set(rounds))
+
+    if len(rounds) == 0:
+      raise ValueError('Vælg mindst én runde')
+    elif rounds[0] < 1:
+      raise ValueError('Den første tilgængelige runde er Runde 1')
+    elif rounds[-1] > active_round:
+      raise ValueError(f'Den sidste tilgængelige runde er Runde {str(active_round)}')
+
+    chrome_driver_path = self.__get_chrome_driver_path()
+    cookies = self.__get_login_cookies(chrome_driver_path=chrome_driver_path, cookies=cookies)
+
+    def get_history(driver, team_link):
+      with self.metrics.timer('browser'):
+        driver.get(f'{self.base_url}{team_link}/rounds')
+
+      if not '/rounds' in driver.current_url:
+        raise ValueError('Du er logget ind med en bruger som ikke har et guldhold i det pågældende spil. Du kan derfor kun hente data fra den aktive runde!')
+
+      # the active round is expanded when the page loads, all other rounds are collapsed
+      for button in driver.find_elements(by = By.CLASS_NAME, value = "toggle.turn"):
+        round = int(re.findall(r'\d+', button.text)[0])
+        if (round == active_round) != (round in rounds):
+          button.click()
+
+      return self.__parse_team_history(page_source=driver.page_source, team_link=team_link, game=game, rounds=rounds)
+
+    with DriverPool(chrome_driver_path=chrome_driver_path, base_url=self.base_url, cookies=cookies, n_browsers=1, headless=headless) as pool:
+      return pool.map(get_history, [team_link], desc = 'Henter historik')[0]
+
+  def __get_chrome_driver_path(self) -> str:
+    """
+    Get the path of the chromedriver under [...]/Drivers/
+    Arguments:
+        None
+    Returns:
+        The path of the chromedriver
+    """
     chrome_driver_path = str(Path(__file__).parent / "Drivers" / "chromedriver")
 
     if not os.path.exists(chrome_driver_path):
       if not os.path.exists(chrome_driver_path + '.exe'):
         raise FileNotFoundError(f'Please download a chromedriver from https://sites.google.com/chromium.org/driver/ and place it under {chrome_driver_path.replace("/chromedriver","")} with the name "chromedriver"')
 
-    driver = webdriver.Chrome(service=Service(chrome_driver_path))
-    driver.maximize_window()
-
-    url = 'https://www.holdet.dk/da'
-    driver.get(url)
-
-    # accept cookies
-    cookie_buttons = driver.find_elements(by = By.CLASS_NAME, value = "CybotCookiebotDialogBodyButton")
-    for button in cookie_buttons:
-        if button.text.lower() == "tillad alle":
-            button.click()
-            break
-    
-    print('Log ind på Holdet.dk og tryk herefter ENTER')
-    getpass('Log ind på Holdet.dk og tryk herefter ENTER')
-
-    team_list = []
-    for team_link in tqdm(team_link_list, desc = f'Henter hold'):
-      team_df = self.__get_team_from_old_round(driver=driver, team_link=team_link, round = round)
-      team_list.append(team_df)
+    return chrome_driver_path
 
-    driver.quit()
+  def __get_login_cookies(self, chrome_driver_path: str, cookies = None) -> list:
+    """
+    Get the cookies of a logged in session on Holdet.dk. The user is asked to log in the first time, after which the cookies are reused
+    Arguments:
+        chrome_driver_path (str): the path of the chromedriver
+        cookies (list): cookies of a logged in session to use instead, e.g. from export_login_cookies()
+    Returns:
+        A list of cookies
+    """
+    if cookies is not None:
+      self.__login_cookies = cookies
+    elif self.__login_cookies is None:
+      self.__login_cookies = login_and_export_cookies(chrome_driver_path=chrome_driver_path, base_url=self.base_url)
 
-    teams_df = pd.concat(team_list).reset_index(drop=True)  
+    return self.__login_cookies
 
-    return teams_df
+  def export_login_cookies(self) -> list:
+    """
+    Get the cookies of the logged in session on Holdet.dk, e.g. to pass them as cookies to get_teams_from_old_round() from another scraper
+    Arguments:
+        None
+    Returns:
+        A list of cookies, or None if no one has logged in yet
+    """
+    return self.__login_cookies
 
-  def get_table_and_teams(self, game: str, round = 0, top = 100, random_sample = False, table_from_previous_round = False):
+  def __get_teams_delta(self, table: pd.DataFrame, store: CheckpointStore, game: str, round: int) -> pd.DataFrame:
+    """
+    Get the teams of the table from the active round, fetching only the teams that are new or whose row in the table has changed since the previous run.
+    The teams of the other rows are taken from the previous run, and the table and teams of this run are saved for the next one
+    Arguments:
+        table (pd.DataFrame): the table of the active round, returned by get_standings_table()
+        store (CheckpointStore): the store with the table and teams of the previous run
+        game (str): the name of the game
+        round (int): the active round of the game
+    Returns:
+        A dataframe with data for the teams, in the order of the table
+    """
+    job = f'delta|{game}|{round}'
+    columns = ['HoldLink', 'Værdi', 'RundeVækst']
+    previous_table = store.load(job, 'tabel')
+    previous_teams = store.load(job, 'hold')
+
+    unchanged = set()
+    if previous_table is not None and previous_teams is not None:
+      rows = table[columns].merge(previous_table[columns], how = 'inner', on = 'HoldLink', suffixes = ('', 'Før'))
+      same = (rows['Værdi'] == rows['VærdiFør']) & (rows['RundeVækst'] == rows['RundeVækstFør'])
+      unchanged = set(rows.loc[same, 'HoldLink']) & set(previous_teams['HoldLink'])
+
+    team_link_list = [team_link for team_link in table['HoldLink'] if team_link not in unchanged]
+    print(f'{game}, Runde {str(round)}: {str(len(team_link_list))} af {str(len(table))} hold er nye eller ændrede og hentes. Resten genbruges')
+    teams = self.get_teams_from_active_round(team_link_list = team_link_list)
+    if len(unchanged) > 0:
+      teams = pd.concat([previous_teams[previous_teams['HoldLink'].isin(unchanged)], teams])
+
+    position = {team_link: i for i, team_link in enumerate(table['HoldLink'])}
+    teams = teams.iloc[np.argsort(teams['HoldLink'].map(position).to_numpy(), kind = 'stable')].reset_index(drop=True)
+
+    store.put(job, 'tabel', table[columns])
+    store.put(job, 'hold', teams)
+    return teams
+
+  def get_table_and_teams(self, game: str, round = 0, top = 100, random_sample = False, table_from_previous_round = False, checkpoint = None,
+                          seed = None, oversample = 1.2, strata = None, delta = None, consistent = False):
     """
     Get Top X of præmiepuljen of a specific round of a specific game on Holdet.dk together with the teams from that round
     Arguments:
@@ -451,6 +1279,14 @@ class HoldetScraper():
         top (int): the top part of præmiepuljen you want. Defaults to Top 100
         random_sample (bool): Set to True in order to get a random sample from præmiepuljen. The number of teams returned is the number specified in the 'top' parameter.
         table_from_previous_round (bool): If you are scraping teams from the active round during a match it can be advantageous to set this parameter to True. The table returned will then be from the previous round and thus you eliminate the risk of the table shifting during runtime which could potentially cause inaccuraries/duplicates
+        checkpoint (str or CheckpointStore): a checkpoint file in which each page and team is saved as soon as it has been fetched. If the run is interrupted, running it again with the same checkpoint only fetches what is missing
+        seed (int): seed for random_sample, see get_standings_table()
+        oversample (float): oversampling factor for random_sample, see get_standings_table()
+        strata (list): rank boundaries for random_sample, see get_standings_table()
+        delta (str or CheckpointStore): a file in which the table and teams of the active round are saved. When polling the active round with the same file,
+                                        only teams that are new or whose Værdi or RundeVækst in the table has changed are fetched again. The other teams are taken from the file.
+                                        Not used with table_from_previous_round, since the table of the previous round does not change
+        consistent (bool): Set to True in order to get a consistent snapshot of the table during matches, see get_standings_table()
     Returns:
         Two dataframes, 
           one with data for the Top X contestants in præmiepuljen for the specified game and round, and
@@ -465,16 +1301,32 @@ class HoldetScraper():
     if table_from_previous_round and round == active_round: # get table from previous round
       round = max(active_round - 1,1)
 
-    table_simple = self.get_standings_table(game=game, round=round, top=top, random_sample=random_sample)
+    store = self.__open_checkpoint(checkpoint)
+    table_simple = self.get_standings_table(game=game, round=round, top=top, random_sample=random_sample, checkpoint=store,
+                                            seed=seed, oversample=oversample, strata=strata, consistent=consistent)
 
     if table_from_previous_round and round == max(active_round - 1,1): #get teams from the active round
       round = active_round
 
-    if round == active_round:
-      teams_simple = self.get_teams_from_active_round(team_link_list = table_simple['HoldLink'])
+    if round == active_round and delta is not None and not table_from_previous_round:
+      teams_simple = self.__get_teams_delta(table=table_simple, store=self.__open_checkpoint(delta), game=game, round=round)
+    elif round == active_round:
+      teams_simple = self.get_teams_from_active_round(team_link_list = table_simple['HoldLink'], checkpoint=store)
     elif round < active_round:
-      teams_simple = self.get_teams_from_old_round(team_link_list = table_simple['HoldLink'], round=round)
+      teams_simple = self.get_teams_from_old_round(team_link_list = table_simple['HoldLink'], round=round, checkpoint=store)
 
+    return self.__enrich_table_and_teams(table_simple=table_simple, teams_simple=teams_simple)
+
+  @staticmethod
+  def __enrich_table_and_teams(table_simple: pd.DataFrame, teams_simple: pd.DataFrame):
+    """
+    Add the captain, manager points and formation of each team to the table, and the placement of each team to the teams
+    Arguments:
+        table_simple (pd.DataFrame): the table returned by get_standings_table()
+        teams_simple (pd.DataFrame): the teams of the table
+    Returns:
+        The table and the teams in the shape returned by get_table_and_teams()
+    """
     table_info = table_simple[['HoldLink', 'Præmiepulje', 'Global']]
     
     teams_info = teams_simple[teams_simple['SpillerKaptajn']][['HoldLink', 'ManagerPoints', 'SpillerNavn', 'SpillerVækst', 'Formation']]
@@ -484,70 +1336,167 @@ class HoldetScraper():
     table_enriched = table_simple.merge(teams_info, how = 'left', left_on = 'HoldLink', right_on = 'HoldLink')
     teams_enriched = teams_simple.merge(table_info, how = 'left', left_on = 'HoldLink', right_on = 'HoldLink')
 
-    table_enriched = table_enriched[['Spil', 'Runde', 'Præmiepulje', 'Global', 'Spring', 'Hold', 'Manager', 'ManagerPoints',
+    table_enriched = table_enriched[['Spil', 'Runde', 'Præmiepulje', 'Global', 'Spring', 'Hold', 'HoldLink', 'Manager', 'ManagerLink', 'ManagerPoints',
                                      'Værdi', 'Afstand', 'RundeVækst', 'Kaptajn', 'KaptajnVækst', 'Formation']]
 
-    teams_enriched = teams_enriched[['Spil', 'Runde', 'Præmiepulje', 'Global', 'Hold', 'Formation', 'Manager', 'ManagerPoints', 
+    teams_enriched = teams_enriched[['Spil', 'Runde', 'Præmiepulje', 'Global', 'Hold', 'HoldLink', 'Formation', 'Manager', 'ManagerPoints', 
                                      'SpillerNavn', 'SpillerHold', 'SpillerPosition', 'SpillerKaptajn', 'SpillerVærdi', 'SpillerVækst']]
 
     return table_enriched, teams_enriched
-  
-  def __calc_popularity(self, teams_table: pd.DataFrame) -> pd.DataFrame:
+
+  def scrape_many(self, jobs: list, checkpoint = None, return_failures = False) -> dict:
     """
-    Calculate popularity percentages and captaincy popularity of the players in the teams_table
+    Get the tables and teams of several games and rounds in one batch, e.g. of every game in active_games.
+    Everything goes through the shared scheduler of the scraper, so the whole batch uses max_workers threads, one connection pool and one rate limit,
+    and the summary of each game is fetched once. Standings pages are fetched before team pages, so all tables are ready early,
+    and the teams of a table are fetched as soon as the table is complete, while the pages of the next tables are still being fetched
     Arguments:
-        teams_table (pd.DataFrame): a Dataframe returned by one of the functions get_teams_from_active_round(), get_teams_from_old_round() or get_table_and_teams
+        jobs (list): tuples (game, round, top) with the same meaning as in get_table_and_teams(), e.g. [('Premier Manager Efterår 2022', 0, 1000)].
+                     round and top can be left out and default to the active round and Top 100. A game and round requested twice is fetched once with the largest top
+        checkpoint (str or CheckpointStore): a checkpoint file in which each page and team is saved as soon as it has been fetched, see get_table_and_teams()
+        return_failures (bool): Set to True in order to also return a dataframe with the teams from the active round that could not be fetched
     Returns:
-        A DataFrame with popularity percentages and captaincy popularity for all players in the teams_table
+        A dictionary with (game, round) as keys, where round is the number of the round (also when 0 was given), and tuples (table, teams) as returned by get_table_and_teams() as values,
+        and if return_failures is True a dataframe with the columns 'Spil', 'Runde', 'HoldLink' and 'Fejl' for the teams that could not be fetched
     """
-
-    n_teams = len(teams_table['Hold'].drop_duplicates())
-
-    popularity = teams_table.groupby(['SpillerNavn', 'SpillerHold', 'SpillerPosition']).size().reset_index(name='Antal')
-    popularity['Pop%'] = (popularity['Antal']/n_teams)
-    popularity.drop(['Antal'], axis = 1, inplace = True)
-
-    captain = teams_table[teams_table['SpillerKaptajn']].groupby(['SpillerNavn', 'SpillerHold', 'SpillerPosition']).size().reset_index(name='Antal')
-    captain['(C)%'] = (captain['Antal']/n_teams)
-    captain.drop(['Antal'], axis = 1, inplace = True)
-
-    final = popularity.merge(captain, how = 'left', left_on = ['SpillerNavn', 'SpillerHold', 'SpillerPosition'], right_on = ['SpillerNavn', 'SpillerHold', 'SpillerPosition'])
-    final['(C)%'] = final['(C)%'].fillna(0)
-    final.sort_values(by=['Pop%', '(C)%'], inplace=True, ascending=False)
-
-    return final
-
+    jobs = [(job,) if isinstance(job, str) else tuple(job) for job in jobs]
+    jobs = [job + (0, 100)[len(job) - 1:] for job in jobs]
+
+    # the summaries of the games are fetched concurrently, once per game, and the jobs are checked before anything else is fetched
+    futures = [self.scheduler.submit(self.__check_standings_arguments, game, round, top, priority=PRIORITY_SUMMARY) for game, round, top in jobs]
+    tops = {}
+    for (game, _, _), future in zip(jobs, futures):
+      round, top = future.result()
+      tops[(game, round)] = max(top, tops.get((game, round), 0))
+    active_rounds = {game: self.__get_active_round(game=game) for game, _ in tops}
+
+    store = self.__open_checkpoint(checkpoint)
+    n_pages = sum(int(np.ceil(top/24)) for top in tops.values())
+    progress = tqdm(total = n_pages, desc = f'Henter {str(len(tops))} tabeller og deres hold')
+    update = lambda future: progress.update(1)
+
+    def submit(fn, items, priority):
+      futures = [self.scheduler.submit(fn, item, priority=priority) for item in items]
+      for future in futures:
+        future.add_done_callback(update)
+      return futures
+
+    page_futures, team_futures = {}, {}
+    try:
+      # all standings pages are queued at once. Team pages queued later wait for the standings pages that are still queued
+      for (game, round), top in tops.items():
+        get_page = self.__standings_page_fetcher(game=game, round=round, checkpoint=store)
+        page_futures[(game, round)] = submit(get_page, range(1, int(np.ceil(top/24))+1), PRIORITY_STANDINGS)
+
+      tables = {}
+      for (game, round), futures in page_futures.items():
+        page_dfs = (future.result() for future in futures)
+        pages = list(self.__trim_standings(page_dfs, game=game, round=round, top=tops[(game, round)]))
+        tables[(game, round)] = self.__sort_standings(pd.concat(pages).reset_index(drop=True), top=tops[(game, round)])
+        for future in futures: # the pages after the last needed page
+          future.cancel()
+
+        if round == active_rounds[game]:
+          team_link_list = list(tables[(game, round)]['HoldLink'])
+          progress.total += len(team_link_list)
+          progress.refresh()
+          get_team = self.__team_fetcher(team_link_list=team_link_list, checkpoint=store)
+          team_futures[(game, round)] = submit(get_team, team_link_list, PRIORITY_TEAMS)
+
+      failure_list = []
+      results = {}
+      for (game, round), table in tables.items():
+        if (game, round) in team_futures:
+          team_list = []
+          for team_link, team_df, e in (future.result() for future in team_futures[(game, round)]):
+            if e is not None:
+              failure_list.append({'Spil': game, 'Runde': round, 'HoldLink': team_link, 'Fejl': repr(e)})
+            else:
+              team_list.append(team_df)
+          teams = pd.concat(team_list).reset_index(drop=True) if len(team_list) > 0 else pd.DataFrame(columns=TEAM_COLUMNS)
+        else:
+          # teams from closed rounds can only be seen when logged in, so they are fetched with the browsers afterwards
+          teams = None
+        results[(game, round)] = (table, teams)
+    finally:
+      progress.close()
+      for futures in list(page_futures.values()) + list(team_futures.values()):
+        for future in futures:
+          future.cancel()
+
+    for (game, round), (table, teams) in results.items():
+      if teams is None:
+        teams = self.get_teams_from_old_round(team_link_list=table['HoldLink'], round=round, checkpoint=store)
+      results[(game, round)] = self.__enrich_table_and_teams(table_simple=table, teams_simple=teams)
+
+    failures = pd.DataFrame(failure_list, columns=['Spil', 'Runde', 'HoldLink', 'Fejl'])
+    if len(failures) > 0 and not return_failures:
+      print(f'{str(len(failures))} hold kunne ikke hentes og er udeladt. Sæt return_failures=True for at se hvilke.')
+
+    if return_failures:
+      return results, failures
+    return results
+  
   def calc_popularity_table(self, teams_table: pd.DataFrame, splits = [100, 1000]) -> pd.DataFrame:
     """
-    Calculate popularity percentages and captaincy popularity of the players in the teams_table
+    Calculate popularity percentages and captaincy popularity of the players in the teams_table.
+    The teams are ranked by their order in the teams_table, and all splits are calculated in one pass, see popularity.calc_popularity_table()
     Arguments:
-        teams_table (pd.DataFrame): a Dataframe returned by one of the functions get_teams_from_active_round(), get_teams_from_old_round() or get_table_and_teams
+        teams_table (pd.DataFrame): a Dataframe returned by one of the functions get_teams_from_active_round(), get_teams_from_old_round() or get_table_and_teams()
         splits (list): The splits for which you want to calculate popularity
     Returns:
         A DataFrame with popularity percentages and captaincy popularity for all players in the teams_table
     """
 
-    n_teams = len(teams_table['Hold'].drop_duplicates())
-    players_per_team = int(len(teams_table)/len(teams_table['Hold'].drop_duplicates()))
+    return calc_popularity_table(teams_table=teams_table, splits=splits)
 
-    samlet = self.__calc_popularity(teams_table=teams_table)
-    samlet.rename(columns={'Pop%': 'Pop% (samlet)',
-                           '(C)%': '(C)% (samlet)'}, inplace=True) 
-    pop_table = samlet
-    for split in splits:
-      if n_teams < split:
-        print(f'Der er kun {str(n_teams)} hold i tabellen. Returnerer alle meningsfulde splits.')
-        break
+  def close(self):
+    """
+    Stop the worker threads and the parse processes and close the connections to Holdet.dk
+    """
+    self.scheduler.shutdown()
+    if isinstance(self.parser, ProcessParser):
+      self.parser.close()
+    self.session.close()
 
-      split_top = self.__calc_popularity(teams_table=teams_table[0:(players_per_team*split)])
-      split_top.rename(columns={'Pop%': f'Pop% (Top {str(split)})',
-                           '(C)%': f'(C)% (Top {str(split)})'}, inplace=True)
-      pop_table = pop_table.merge(split_top, how = 'left', left_on = ['SpillerNavn', 'SpillerHold', 'SpillerPosition'], right_on = ['SpillerNavn', 'SpillerHold', 'SpillerPosition'])    
-    
-    pop_table.fillna(0, inplace=True)
-    pop_table = pop_table.reset_index(drop=True)  
+  def profile(self, method: str, *args, profiler = 'cProfile', limit = 25, **kwargs):
+    """
+    Call a public method of the scraper under a profiler and print where the time was spent, e.g.
+    scraper.profile('get_standings_table', game='Premier Manager Efterår 2022', top=1000)
+    The profilers only see the calling thread, so set max_workers=1 in order to profile the fetching and parsing of the pages.
+    With more workers, scraper.metrics shows the time spent in each stage across all threads
+    Arguments:
+        method (str): the name of the method, e.g. 'get_standings_table'
+        args: passed on to the method
+        profiler (str): 'cProfile' (built in) or 'pyinstrument' (if installed)
+        limit (int): the number of functions shown by cProfile
+        kwargs: passed on to the method
+    Returns:
+        The result of the method
+    """
+    if method.startswith('_') or not callable(getattr(self, method, None)):
+      raise ValueError(f'"{method}" er ikke en offentlig metode på HoldetScraper')
+    fn = getattr(self, method)
+
+    if profiler == 'cProfile':
+      import cProfile
+      import pstats
+      profile = cProfile.Profile()
+      result = profile.runcall(fn, *args, **kwargs)
+      pstats.Stats(profile).sort_stats('cumulative').print_stats(limit)
+    elif profiler == 'pyinstrument':
+      from pyinstrument import Profiler
+      profile = Profiler()
+      profile.start()
+      try:
+        result = fn(*args, **kwargs)
+      finally:
+        profile.stop()
+      print(profile.output_text(unicode=True))
+    else:
+      raise ValueError(f'Ukendt profiler "{profiler}". Vælg cProfile eller pyinstrument')
 
-    return pop_table
+    return result
 
 if __name__ == "__main__":
     scraper = HoldetScraper()
@@ -0,0 +1,188 @@
+import random
+import threading
+import time
+from email.utils import parsedate_to_datetime
+from datetime import datetime, timezone
+import requests
+from requests.adapters import HTTPAdapter
+from requests.structures import CaseInsensitiveDict
+from helper_functions import RateLimiter
+
+RETRY_STATUSES = {429, 500, 502, 503, 504}
+CACHED_HEADERS = ['Content-Type', 'Date', 'ETag', 'Last-Modified']
+
+class HoldetSession():
+  def __init__(self, pool_size = 10, timeout = (5, 30), max_retries = 5, backoff_factor = 0.5, backoff_max = 60, rate_limit = None, cache = None):
+    """
+    A pooled HTTP session for Holdet.dk with timeouts, retries and rate limiting.
+    Connections are kept alive and reused between requests, and failed requests are retried with exponential backoff and jitter
+    Arguments:
+        pool_size (int): the maximum number of open connections per host
+        timeout (float or tuple): the connect and read timeout in seconds of each request
+        max_retries (int): the number of times a request is retried after a connection error, a timeout or a 429/5xx response
+        backoff_factor (float): the base of the exponential backoff in seconds. Retry number n waits up to backoff_factor * 2**n seconds
+        backoff_max (float): the maximum number of seconds to wait between two attempts, also when the server sends a Retry-After header
+        rate_limit (float): the maximum number of requests per second per host. Defaults to None (no limit)
+        cache (ResponseCache): an on-disk cache used by requests made with a cache_ttl. Defaults to None (no caching)
+    """
+    self.cache = cache
+    self.timeout = timeout
+    self.max_retries = max_retries
+    self.backoff_factor = backoff_factor
+    self.backoff_max = backoff_max
+    self.rate_limiter = RateLimiter(rate=rate_limit)
+
+    self.__adapter = HTTPAdapter(pool_connections=pool_size, pool_maxsize=pool_size, max_retries=0)
+    self.__session = requests.Session()
+    self.__session.mount('http://', self.__adapter)
+    self.__session.mount('https://', self.__adapter)
+
+    self.__lock = threading.Lock()
+    self.__requests = 0
+    self.__retries = 0
+    self.__retired_connections = 0
+    self.__retired_requests = 0
+
+  def __backoff(self, attempt: int) -> float:
+    """
+    The number of seconds to wait before retry number attempt + 1 (exponential backoff with full jitter)
+    """
+    return random.uniform(0, min(self.backoff_max, self.backoff_factor * 2**attempt))
+
+  def __retry_after(self, response: requests.Response):
+    """
+    The number of seconds the server asks us to wait in its Retry-After header, or None if there is no such header
+    """
+    retry_after = response.headers.get('Retry-After')
+    if retry_after is None:
+      return None
+
+    try:
+      seconds = float(retry_after)
+    except ValueError:
+      try:
+        seconds = (parsedate_to_datetime(retry_after) - datetime.now(timezone.utc)).total_seconds()
+      except (TypeError, ValueError):
+        return None
+
+    return min(max(seconds, 0), self.backoff_max)
+
+  def get(self, url: str, cache_ttl = None, **kwargs) -> requests.Response:
+    """
+    Send a GET request through the connection pool. Connection errors, timeouts and 429/5xx responses are retried up to max_retries times
+    Arguments:
+        url (str): the url to request
+        cache_ttl (float): the number of seconds a cached response of the url may be used without asking the server.
+                           Use response_cache.FOREVER for pages that never change. When the cached response is older,
+                           it is revalidated with If-None-Match/If-Modified-Since. Defaults to None (the cache is not used)
+        kwargs: passed on to requests.Session.get
+    Returns:
+        The response
+    Raises:
+        requests.HTTPError if the final response has an error status code, or the last connection error if every attempt failed
+    """
+    if self.cache is None or cache_ttl is None:
+      return self.__get(url, **kwargs)
+
+    cached = self.cache.lookup(url)
+    if cached is not None and cached['age'] <= cache_ttl:
+      self.cache.record('hits')
+      self.cache.touch(url)
+      return self.__cached_response(url, cached)
+
+    headers = dict(kwargs.pop('headers', None) or {})
+    if cached is not None:
+      cached_headers = CaseInsensitiveDict(cached['headers'])
+      if 'ETag' in cached_headers:
+        headers['If-None-Match'] = cached_headers['ETag']
+      if 'Last-Modified' in cached_headers:
+        headers['If-Modified-Since'] = cached_headers['Last-Modified']
+
+    response = self.__get(url, headers=headers, **kwargs)
+    if response.status_code == 304 and cached is not None:
+      self.cache.record('revalidated')
+      self.cache.touch(url, revalidated=True)
+      return self.__cached_response(url, cached)
+
+    self.cache.record('misses')
+    if response.status_code == 200:
+      self.cache.store(url, response.content, {h: response.headers[h] for h in CACHED_HEADERS if h in response.headers})
+    return response
+
+  @staticmethod
+  def __cached_response(url: str, cached: dict) -> requests.Response:
+    """
+    Build a response object from a cached response
+    """
+    response = requests.Response()
+    response.status_code = 200
+    response.url = url
+    response.headers = CaseInsensitiveDict(cached['headers'])
+    response._content = cached['body']
+    response.encoding = requests.utils.get_encoding_from_headers(response.headers)
+    response.from_cache = True
+    return response
+
+  def __get(self, url: str, **kwargs) -> requests.Response:
+    """
+    Send a GET request with retries, without using the cache
+    """
+    kwargs.setdefault('timeout', self.timeout)
+
+    for attempt in range(self.max_retries + 1):
+      self.rate_limiter.wait(url)
+      with self.__lock:
+        self.__requests += 1
+
+      try:
+        response = self.__session.get(url, **kwargs)
+      except (requests.ConnectionError, requests.Timeout):
+        if attempt == self.max_retries:
+          raise
+        delay = self.__backoff(attempt)
+      else:
+        if response.status_code not in RETRY_STATUSES or attempt == self.max_retries:
+          response.raise_for_status()
+          return response
+        delay = self.__retry_after(response)
+        if delay is None:
+          delay = self.__backoff(attempt)
+        response.close()
+
+      with self.__lock:
+        self.__retries += 1
+      time.sleep(delay)
+
+  def stats(self) -> dict:
+    """
+    Get counters for the requests sent through the session
+    Arguments:
+        None
+    Returns:
+        A dictionary with the number of requests (including retries), retries, opened connections and reused connections
+    """
+    connections = self.__retired_connections
+    pooled_requests = self.__retired_requests
+    pools = self.__adapter.poolmanager.pools
+    for key in pools.keys():
+      pool = pools.get(key)
+      if pool is not None:
+        connections += pool.num_connections
+        pooled_requests += pool.num_requests
+
+    with self.__lock:
+      return {
+        'requests': self.__requests,
+        'retries': self.__retries,
+        'connections_opened': connections,
+        'connections_reused': pooled_requests - connections
+      }
+
+  def close(self):
+    """
+    Close all pooled connections
+    """
+    stats = self.stats()
+    self.__retired_connections = stats['connections_opened']
+    self.__retired_requests = stats['connections_opened'] + stats['connections_reused']
+    self.__session.close()
@@ -0,0 +1,140 @@
+import re
+import threading
+import time
+from contextlib import contextmanager
+import pandas as pd
+
+ENDPOINTS = [('runder', re.compile(r'/userteams/[^/]+/rounds/?$')),
+             ('hold', re.compile(r'/userteams/[^/]+/?$')),
+             ('tabel', re.compile(r'/leaderboards/praemiepuljen/\d+/all/rank/asc/\d+/?$')),
+             ('oversigt', re.compile(r'/leaderboards/praemiepuljen/?$')),
+             ('forside', re.compile(r'/da/?$'))]
+
+def endpoint(url: str) -> str:
+  """
+  The kind of page on Holdet.dk a url points to: 'tabel', 'oversigt', 'hold', 'runder', 'forside' or 'andet'
+  """
+  for name, pattern in ENDPOINTS:
+    if pattern.search(url.split('?')[0]):
+      return name
+  return 'andet'
+
+class Metrics():
+  def __init__(self):
+    """
+    Timings of the stages of a scrape and counters of the requests sent to Holdet.dk.
+    Every stage (e.g. 'http', 'parse_html', 'extract_table', 'build_dataframe') is timed with timer(), and callbacks added with
+    subscribe() are called with an event for every timing and request, e.g. to log them or send them to a monitoring system
+    """
+    self.__lock = threading.Lock()
+    self.__callbacks = []
+    self.reset()
+
+  def reset(self):
+    """
+    Forget all timings and counters
+    """
+    with self.__lock:
+      self.__stages = {}
+      self.__endpoints = {}
+      self.__started = time.perf_counter()
+
+  def subscribe(self, callback):
+    """
+    Call callback(event) for every timing and request. An event is a dictionary with the key 'type' ('stage' or 'request')
+    and the keys 'stage' and 'seconds', or 'url', 'endpoint', 'status', 'bytes', 'cached' and 'seconds'
+    Arguments:
+        callback (function): a function taking an event. It is called from the thread doing the work, so it must be thread-safe and fast
+    Returns:
+        None
+    """
+    with self.__lock:
+      self.__callbacks.append(callback)
+
+  def unsubscribe(self, callback):
+    with self.__lock:
+      self.__callbacks.remove(callback)
+
+  def __emit(self, event: dict):
+    for callback in list(self.__callbacks):
+      callback(event)
+
+  @contextmanager
+  def timer(self, stage: str):
+    """
+    Time the code in a with block as a stage, e.g. with metrics.timer('parse_html'):
+    """
+    start = time.perf_counter()
+    try:
+      yield
+    finally:
+      self.record(stage, time.perf_counter() - start)
+
+  def record(self, stage: str, seconds: float):
+    """
+    Record a timing of a stage
+    """
+    with self.__lock:
+      count, total, longest = self.__stages.get(stage, (0, 0.0, 0.0))
+      self.__stages[stage] = (count + 1, total + seconds, max(longest, seconds))
+    self.__emit({'type': 'stage', 'stage': stage, 'seconds': seconds})
+
+  def record_request(self, url: str, status: int, n_bytes: int, cached: bool, seconds: float):
+    """
+    Record a request to Holdet.dk
+    Arguments:
+        url (str): the url of the request
+        status (int): the status code of the response
+        n_bytes (int): the size of the body of the response
+        cached (bool): whether the response came from the cache
+        seconds (float): the time the request took
+    Returns:
+        None
+    """
+    name = endpoint(url)
+    with self.__lock:
+      requests, hits, total_bytes = self.__endpoints.get(name, (0, 0, 0))
+      self.__endpoints[name] = (requests + 1, hits + int(cached), total_bytes + (0 if cached else n_bytes))
+    self.__emit({'type': 'request', 'url': url, 'endpoint': name, 'status': status, 'bytes': n_bytes, 'cached': cached, 'seconds': seconds})
+
+  def stages(self) -> pd.DataFrame:
+    """
+    Get the timings of the stages
+    Arguments:
+        None
+    Returns:
+        A dataframe with the number of timings, the total seconds and the mean and max milliseconds of each stage.
+        Stages run in several threads at once, so their total seconds can add up to more than the wall time
+    """
+    with self.__lock:
+      stages = dict(self.__stages)
+    rows = [{'Fase': stage, 'Antal': count, 'Sekunder': total, 'Gns. ms': 1000 * total / count, 'Maks ms': 1000 * longest}
+            for stage, (count, total, longest) in stages.items()]
+    return pd.DataFrame(rows, columns=['Fase', 'Antal', 'Sekunder', 'Gns. ms', 'Maks ms']).sort_values('Sekunder', ascending=False).reset_index(drop=True)
+
+  def endpoints(self) -> pd.DataFrame:
+    """
+    Get the counters of the requests
+    Arguments:
+        None
+    Returns:
+        A dataframe with the number of requests, cache hits and downloaded bytes for each kind of page
+    """
+    with self.__lock:
+      endpoints = dict(self.__endpoints)
+    rows = [{'Endpoint': name, 'Forespørgsler': requests, 'Cache-hits': hits, 'Bytes': total_bytes}
+            for name, (requests, hits, total_bytes) in endpoints.items()]
+    return pd.DataFrame(rows, columns=['Endpoint', 'Forespørgsler', 'Cache-hits', 'Bytes']).sort_values('Forespørgsler', ascending=False).reset_index(drop=True)
+
+  def report(self) -> str:
+    """
+    Get a text report of the timings and requests since the metrics were created or reset
+    """
+    stages, endpoints = self.stages(), self.endpoints()
+    lines = [f'Tid siden start: {time.perf_counter() - self.__started:.2f} s',
+             f'Forespørgsler: {endpoints["Forespørgsler"].sum()}, heraf fra cachen: {endpoints["Cache-hits"].sum()}, hentet: {endpoints["Bytes"].sum() / 1e6:.2f} MB',
+             '',
+             stages.to_string(index=False, float_format=lambda x: f'{x:.3f}'),
+             '',
+             endpoints.to_string(index=False)]
+    return '\n'.join(lines)
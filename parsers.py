@@ -0,0 +1,384 @@
+import re
+import threading
+import time
+from concurrent.futures import Future, ProcessPoolExecutor
+from contextlib import contextmanager, nullcontext
+import pandas as pd
+from bs4 import BeautifulSoup
+from pandas.io.parsers import TextParser
+
+STANDINGS_COLUMNS = ['Præmiepulje', 'Global', 'Spring', 'Hold', 'HoldLink', 'Manager', 'ManagerLink', 'Værdi', 'Afstand', 'RundeVækst']
+STANDINGS_RENAME = {'#': 'Præmiepulje',
+                    'Afstand': 'Værdi',
+                    'Runde': 'Afstand',
+                    'Runde.1': 'RundeVækst'}
+
+# same whitespace handling as pd.read_html, so both backends produce identical text
+_RE_WHITESPACE = re.compile(r'[\r\n]+|\s{2,}')
+_RE_HIDDEN = re.compile(r'display:\s*none')
+
+class Parser():
+  """
+  Base class of the parser backends. Set metrics to a Metrics object in order to time the stages of the parsing
+  """
+  name = None
+  metrics = None
+
+  def _stage(self, stage: str):
+    return self.metrics.timer(stage) if self.metrics is not None else nullcontext()
+
+  def submit_standings_page(self, content: bytes) -> Future:
+    """
+    Start parsing a page of the standings table (præmiepuljen), see parse_standings_page(). The page is parsed right away in the calling thread
+    Returns:
+        A Future with the dataframe
+    """
+    return _parsed_now(self.parse_standings_page, content)
+
+  def submit_team_page(self, content: bytes) -> Future:
+    """
+    Start parsing the page of a team from the active round, see parse_team_page(). The page is parsed right away in the calling thread
+    Returns:
+        A Future with the name of the team, the name of the manager, the points of the manager and the players
+    """
+    return _parsed_now(self.parse_team_page, content)
+
+def _parsed_now(parse, content: bytes) -> Future:
+  future = Future()
+  try:
+    future.set_result(parse(content))
+  except Exception as e:
+    future.set_exception(e)
+  return future
+
+class BeautifulSoupParser(Parser):
+  """
+  Parse pages from Holdet.dk with BeautifulSoup and pd.read_html. This is the reference implementation
+  """
+  name = 'html.parser'
+
+  def parse_standings_page(self, content: bytes) -> pd.DataFrame:
+    """
+    Parse a page of the standings table (præmiepuljen)
+    Arguments:
+        content (bytes): the html of the page
+    Returns:
+        A dataframe with data for the contestants in this standings table page of præmiepuljen
+    """
+    with self._stage('parse_html'):
+      soup = BeautifulSoup(content, 'html.parser')
+    with self._stage('extract_table'):
+      table_html = soup.find_all(name = 'table')
+      table_df = pd.read_html(str(table_html), thousands='.', decimal=',')[0][['#', 'Global', 'Spring', 'Hold', 'Manager', 'Afstand', 'Runde', 'Runde.1']]
+    with self._stage('build_dataframe'):
+      #%%
+      teams = soup.find_all(name = 'table')[0].find_all('a', href=lambda href: href and '/userteams/' in href)
+      table_df['HoldLink'] = [link.get('href') for link in teams]
+      #%%
+      # Exclude deleted managers
+      table_df = table_df[table_df['Manager']!='<Slettet>']
+      #%%
+      managers = soup.find_all('a',href=lambda href: href and '/users/' in href, title=True)
+      table_df['ManagerLink'] = [link.get('href') for link in managers]
+      #%%
+      table_df.rename(columns=STANDINGS_RENAME, inplace=True)
+      table_df = table_df[STANDINGS_COLUMNS]
+    return table_df
+
+  def parse_team_page(self, content: bytes):
+    """
+    Parse the page of a team from the active round
+    Arguments:
+        content (bytes): the html of the page
+    Returns:
+        The name of the team, the name of the manager, the points of the manager and a list with a dictionary for each player
+    """
+    with self._stage('parse_html'):
+      soup = BeautifulSoup(content, 'html.parser')
+    with self._stage('extract_team'):
+      players = soup.find_all(name = 'tbody')[0].find_all(name = 'tr', class_ = re.compile('p'))
+
+      team_list = []
+      for p in players:
+        captain_check = p.find(name='i', class_='icon-star large gold captain')
+        if captain_check is not None:
+          captain = True
+        else:
+          captain = False
+
+        row = {
+            'SpillerNavn': p['fs-player-name'],
+            'SpillerHold': p['fs-player-team'],
+            'SpillerPosition': p['fs-player-position'],
+            'SpillerKaptajn': captain,
+            'SpillerVærdi': int(p['value']),
+            'SpillerVækst': int(p['growth'])
+        }
+        team_list.append(row)
+
+      team_name = soup.find_all(name = 'div', id = 'fantasyteam-header')[0].find(name = 'h3').text
+      byline = soup.find_all(name = 'div', class_ = 'byline')[1]
+      manager = byline.contents[3].text
+      manager_points = int(str(byline.contents[6]).strip().replace('.', ''))
+
+    return team_name, manager, manager_points, team_list
+
+class LxmlParser(Parser):
+  """
+  Parse pages from Holdet.dk with lxml. Rows, team links and manager links of a standings page are extracted in a single pass over the table,
+  without building a soup or serializing the table for pd.read_html. Produces the same output as BeautifulSoupParser
+  """
+  name = 'lxml'
+
+  def __init__(self):
+    from lxml import html
+    self.__html = html
+    self.__parser = html.HTMLParser(encoding='utf-8')
+
+  def __document(self, content):
+    if isinstance(content, str):
+      content = content.encode('utf-8')
+    return self.__html.document_fromstring(content, parser=self.__parser)
+
+  @staticmethod
+  def __text(element) -> str:
+    return _RE_WHITESPACE.sub(' ', element.text_content().strip())
+
+  @staticmethod
+  def __contents(element) -> list:
+    """
+    The children of an element including its text nodes, like BeautifulSoup's Tag.contents
+    """
+    contents = [element.text] if element.text else []
+    for child in element:
+      contents.append(child)
+      if child.tail:
+        contents.append(child.tail)
+    return contents
+
+  def parse_standings_page(self, content: bytes) -> pd.DataFrame:
+    """
+    Parse a page of the standings table (præmiepuljen)
+    Arguments:
+        content (bytes): the html of the page
+    Returns:
+        A dataframe with data for the contestants in this standings table page of præmiepuljen
+    """
+    with self._stage('parse_html'):
+      table = self.__document(content).xpath('//table')[0]
+    with self._stage('extract_table'):
+      for hidden in table.xpath('.//*[@style]'):
+        if _RE_HIDDEN.search(hidden.get('style')):
+          hidden.drop_tree()
+
+      header, rows, team_links, manager_links = None, [], [], []
+      for tr in table.iter('tr'):
+        cells = [cell for cell in tr if cell.tag in ('td', 'th')]
+        if header is None and (tr.getparent().tag == 'thead' or all(cell.tag == 'th' for cell in cells)):
+          header = [self.__text(cell) for cell in cells]
+          continue
+
+        rows.append([self.__text(cell) for cell in cells])
+        team_link, manager_link = None, None
+        for a in tr.iter('a'):
+          href = a.get('href')
+          if not href:
+            continue
+          if team_link is None and '/userteams/' in href:
+            team_link = href
+          elif manager_link is None and '/users/' in href and a.get('title') is not None:
+            manager_link = href
+        team_links.append(team_link)
+        manager_links.append(manager_link)
+
+    with self._stage('build_dataframe'):
+      # fill out ragged rows like pd.read_html does
+      width = max([len(header)] + [len(row) for row in rows])
+      data = [row + [''] * (width - len(row)) for row in [header] + rows]
+      with TextParser(data, header=0, thousands='.', decimal=',') as parser:
+        table_df = parser.read()[['#', 'Global', 'Spring', 'Hold', 'Manager', 'Afstand', 'Runde', 'Runde.1']]
+
+      table_df['HoldLink'] = team_links
+      table_df['ManagerLink'] = manager_links
+      # Exclude deleted managers
+      table_df = table_df[table_df['Manager']!='<Slettet>']
+      table_df = table_df.rename(columns=STANDINGS_RENAME)[STANDINGS_COLUMNS]
+    return table_df
+
+  def parse_team_page(self, content: bytes):
+    """
+    Parse the page of a team from the active round
+    Arguments:
+        content (bytes): the html of the page
+    Returns:
+        The name of the team, the name of the manager, the points of the manager and a list with a dictionary for each player
+    """
+    with self._stage('parse_html'):
+      document = self.__document(content)
+
+    with self._stage('extract_team'):
+      team_list = []
+      for p in document.xpath("(//tbody)[1]//tr[contains(@class, 'p')]"):
+        row = {
+            'SpillerNavn': p.get('fs-player-name'),
+            'SpillerHold': p.get('fs-player-team'),
+            'SpillerPosition': p.get('fs-player-position'),
+            'SpillerKaptajn': len(p.xpath(".//i[@class='icon-star large gold captain']")) > 0,
+            'SpillerVærdi': int(p.get('value')),
+            'SpillerVækst': int(p.get('growth'))
+        }
+        team_list.append(row)
+
+      team_name = document.xpath("(//div[@id='fantasyteam-header'])[1]/descendant::h3[1]")[0].text_content()
+      byline = document.xpath("//div[contains(concat(' ', normalize-space(@class), ' '), ' byline ')]")[1]
+      contents = self.__contents(byline)
+      manager = contents[3] if isinstance(contents[3], str) else contents[3].text_content()
+      manager_points = int(str(contents[6]).strip().replace('.', ''))
+
+    return team_name, manager, manager_points, team_list
+
+PARSERS = {
+  'html.parser': BeautifulSoupParser,
+  'lxml': LxmlParser
+}
+
+def get_parser(name: str):
+  """
+  Get a parser backend by name
+  Arguments:
+      name (str): 'html.parser' for BeautifulSoup (the reference implementation) or 'lxml' for the fast lxml backend
+  Returns:
+      An instance of the parser backend
+  """
+  if name not in PARSERS:
+    raise ValueError(f'Ukendt parser "{name}". Vælg en af {", ".join(PARSERS)}')
+
+  return PARSERS[name]()
+
+class _StageLog():
+  """
+  Collects the stage timings of a parse process, so they can be sent back with the result and recorded in the Metrics of the scraper
+  """
+  def __init__(self):
+    self.stages = []
+
+  @contextmanager
+  def timer(self, stage: str):
+    start = time.perf_counter()
+    try:
+      yield
+    finally:
+      self.stages.append((stage, time.perf_counter() - start))
+
+# the parser backend of a parse process, created when the process starts
+_process_parser = None
+
+def _init_process(name: str):
+  global _process_parser
+  _process_parser = get_parser(name)
+
+def _parse_in_process(method: str, content: bytes):
+  _process_parser.metrics = _StageLog()
+  result = getattr(_process_parser, method)(content)
+  if isinstance(result, pd.DataFrame):
+    # plain rows are sent back instead of a pickled dataframe
+    result = (list(result.columns), result.dtypes.astype(str).tolist(), result.index.tolist(), list(result.itertuples(index=False, name=None)))
+  return result, _process_parser.metrics.stages
+
+def _standings_frame(columns: list, dtypes: list, index: list, rows: list) -> pd.DataFrame:
+  """
+  Rebuild the dataframe of a standings page from the rows sent back by a parse process
+  """
+  return pd.DataFrame.from_records(rows, columns=columns, index=index).astype(dict(zip(columns, dtypes)))
+
+class ProcessParser(Parser):
+  """
+  Parse pages in a pool of processes, so parsing does not hold the GIL of the threads fetching the pages. The fetching threads only download
+  the raw bytes, hand them to the pool and go on to the next page. The parsed rows of a page or the records of a team come back in a Future.
+  When queue_depth pages are waiting for or being parsed, the fetching threads wait, so downloads cannot run far ahead of the parsing.
+  Produces the same output as the backend it runs. On Windows and macOS the script using it must be guarded by if __name__ == '__main__':
+  """
+  def __init__(self, backend = 'html.parser', workers = 2, queue_depth = None):
+    """
+    Arguments:
+        backend (str): the parser backend run in the processes, see get_parser()
+        workers (int): the number of parse processes
+        queue_depth (int): the maximum number of pages waiting for or being parsed. Defaults to 2 * workers
+    """
+    if workers < 1:
+      raise ValueError('parse_workers skal være mindst 1')
+    get_parser(backend) # raises a ValueError if the backend does not exist
+
+    self.name = backend
+    self.workers = workers
+    self.queue_depth = queue_depth or 2 * workers
+    self.__slots = threading.BoundedSemaphore(self.queue_depth)
+    self.__pool = ProcessPoolExecutor(max_workers=workers, initializer=_init_process, initargs=(backend,))
+    # start the processes now, before the scraper starts its threads
+    self.__pool.submit(int).result()
+
+  def __submit(self, method: str, content: bytes, build = None) -> Future:
+    """
+    Queue a page for the parse processes. Waits only while queue_depth pages are waiting for or being parsed
+    Arguments:
+        method (str): the parse method of the backend
+        content (bytes): the html of the page
+        build (function): a function turning the records sent back into the result. Defaults to None (the records are the result)
+    Returns:
+        A Future with the result
+    """
+    with self._stage('parse_queue'):
+      self.__slots.acquire()
+    try:
+      parsed = self.__pool.submit(_parse_in_process, method, content)
+    except BaseException:
+      self.__slots.release()
+      raise
+
+    result = Future()
+    def finish(done):
+      self.__slots.release()
+      try:
+        records, stages = done.result()
+        if self.metrics is not None:
+          for stage, seconds in stages:
+            self.metrics.record(stage, seconds)
+        result.set_result(build(*records) if build is not None else records)
+      except BaseException as e:
+        result.set_exception(e)
+    parsed.add_done_callback(finish)
+    return result
+
+  def submit_standings_page(self, content: bytes) -> Future:
+    """
+    Queue a page of the standings table (præmiepuljen) for the parse processes, see BeautifulSoupParser.parse_standings_page()
+    Returns:
+        A Future with the dataframe
+    """
+    return self.__submit('parse_standings_page', content, build=_standings_frame)
+
+  def submit_team_page(self, content: bytes) -> Future:
+    """
+    Queue the page of a team from the active round for the parse processes, see BeautifulSoupParser.parse_team_page()
+    Returns:
+        A Future with the name of the team, the name of the manager, the points of the manager and the players
+    """
+    return self.__submit('parse_team_page', content)
+
+  def parse_standings_page(self, content: bytes) -> pd.DataFrame:
+    """
+    Parse a page of the standings table (præmiepuljen) in a parse process and wait for it, see BeautifulSoupParser.parse_standings_page()
+    """
+    return self.submit_standings_page(content).result()
+
+  def parse_team_page(self, content: bytes):
+    """
+    Parse the page of a team from the active round in a parse process and wait for it, see BeautifulSoupParser.parse_team_page()
+    """
+    return self.submit_team_page(content).result()
+
+  def close(self):
+    """
+    Stop the parse processes
+    """
+    self.__pool.shutdown()
@@ -0,0 +1,210 @@
+import threading
+import numpy as np
+import pandas as pd
+
+PLAYER_COLUMNS = ['SpillerNavn', 'SpillerHold', 'SpillerPosition']
+
+def _codes(df: pd.DataFrame):
+  """
+  Number the distinct rows of df in the order they first appear
+  Arguments:
+      df (pd.DataFrame): the key columns
+  Returns:
+      An array with the number of each row, and the number of distinct rows
+  """
+  codes = np.zeros(len(df), dtype=np.int64)
+  for column in df.columns:
+    column_codes, n_uniques = _factorize(df[column])
+    codes, distinct = pd.factorize(codes * n_uniques + column_codes)
+  return codes, len(distinct)
+
+def _factorize(column: pd.Series):
+  """
+  Number the distinct values of column in the order they first appear. Missing values get a number of their own
+  instead of the -1 of pd.factorize, which would make different keys get the same number in _codes()
+  """
+  codes, uniques = pd.factorize(column)
+  if (codes < 0).any():
+    codes = np.where(codes < 0, len(uniques), codes)
+    return codes, len(uniques) + 1
+  return codes, len(uniques)
+
+def _team_columns(teams_table: pd.DataFrame) -> list:
+  """
+  The columns identifying a team. Teams without HoldLink (e.g. from older files) are told apart by their name and manager
+  """
+  return ['HoldLink'] if 'HoldLink' in teams_table.columns else ['Hold', 'Manager']
+
+def _valid_splits(n_teams: int, splits: list, verbose = True) -> list:
+  """
+  The splits up to the first split with more teams than the table has
+  """
+  valid = []
+  for split in splits:
+    if n_teams < split:
+      if verbose:
+        print(f'Der er kun {str(n_teams)} hold i tabellen. Returnerer alle meningsfulde splits.')
+      break
+    valid.append(split)
+  return valid
+
+def _popularity_frame(players: pd.DataFrame, counts: np.ndarray, captains: np.ndarray, teams: np.ndarray, bounds: list, splits: list) -> pd.DataFrame:
+  """
+  Build the popularity table from counts per player and rank band
+  Arguments:
+      players (pd.DataFrame): the player columns with one row per player
+      counts (np.ndarray): the number of teams in rank band 0..b (columns) that have the player (rows). The last column is all teams
+      captains (np.ndarray): the same for teams that have the player as captain
+      teams (np.ndarray): the number of teams in rank band 0..b
+      bounds (list): the sorted splits that the rank bands end at
+      splits (list): the splits of the output, in the order of the columns
+  Returns:
+      A DataFrame with popularity percentages and captaincy popularity for all players, sorted by popularity
+  """
+  with np.errstate(divide='ignore', invalid='ignore'):
+    pop_table = players.reset_index(drop=True)
+    pop_table['Pop% (samlet)'] = counts[:, -1] / teams[-1]
+    pop_table['(C)% (samlet)'] = captains[:, -1] / teams[-1]
+    for split in splits:
+      band = bounds.index(split)
+      pop_table[f'Pop% (Top {str(split)})'] = counts[:, band] / teams[band]
+      pop_table[f'(C)% (Top {str(split)})'] = captains[:, band] / teams[band]
+
+  # sort by popularity, and by name among equally popular players
+  pop_table = pop_table.sort_values(by=PLAYER_COLUMNS).sort_values(by=['Pop% (samlet)', '(C)% (samlet)'], ascending=False, kind='stable')
+  # only the percentages of empty rank bands are filled. A missing club or position of a player stays missing
+  percentages = [column for column in pop_table.columns if column not in PLAYER_COLUMNS]
+  pop_table[percentages] = pop_table[percentages].fillna(0)
+  pop_table = pop_table.reset_index(drop=True)
+
+  return pop_table
+
+def calc_popularity_table(teams_table: pd.DataFrame, splits = [100, 1000]) -> pd.DataFrame:
+  """
+  Calculate popularity percentages and captaincy popularity of the players in the teams_table.
+  Players and teams are numbered once, every team gets the rank band it belongs to from its order in the teams_table, and all splits
+  are counted in a single aggregation over (player, band). Teams may have different numbers of players
+  Arguments:
+      teams_table (pd.DataFrame): a Dataframe returned by one of the functions get_teams_from_active_round(), get_teams_from_old_round() or get_table_and_teams()
+      splits (list): The splits for which you want to calculate popularity
+  Returns:
+      A DataFrame with popularity percentages and captaincy popularity for all players in the teams_table
+  """
+  player_codes, n_players = _codes(teams_table[PLAYER_COLUMNS])
+  team_codes, n_teams = _codes(teams_table[_team_columns(teams_table)])
+
+  splits = _valid_splits(n_teams, splits)
+  bounds = sorted(set(splits))
+  n_bands = len(bounds) + 1
+
+  # team number i is among the first 'split' teams if i < split
+  team_bands = np.searchsorted(bounds, np.arange(n_teams), side='right')
+  cells = player_codes * n_bands + team_bands[team_codes]
+  counts = np.bincount(cells, minlength=n_players * n_bands).reshape(n_players, n_bands).cumsum(axis=1)
+  captains = np.bincount(cells, weights=teams_table['SpillerKaptajn'].to_numpy(dtype=float), minlength=n_players * n_bands).reshape(n_players, n_bands).cumsum(axis=1)
+  teams = np.bincount(team_bands, minlength=n_bands).cumsum()
+
+  # the first row of every player. Assigning in reverse order leaves the first row standing
+  first_rows = np.empty(n_players, dtype=np.int64)
+  first_rows[player_codes[::-1]] = np.arange(len(player_codes) - 1, -1, -1)
+  players = teams_table[PLAYER_COLUMNS].iloc[first_rows]
+
+  return _popularity_frame(players, counts, captains, teams, bounds, splits)
+
+class PopularityAggregator():
+  def __init__(self, splits = [100, 1000]):
+    """
+    Popularity percentages and captaincy popularity maintained while teams are being fetched, e.g. from iter_teams().
+    Every team adds its players to counts per player and rank band, so a snapshot in the same shape as calc_popularity_table()
+    can be taken at any time at a cost proportional to the number of players, not the number of teams
+    Arguments:
+        splits (list): The splits for which you want to calculate popularity
+    """
+    self.splits = list(splits)
+    self.__bounds = sorted(set(self.splits))
+    self.__n_bands = len(self.__bounds) + 1
+
+    self.__lock = threading.Lock()
+    self.__players = {}
+    self.__player_keys = []
+    self.__teams = set()
+    self.__counts = np.zeros((64, self.__n_bands), dtype=np.int32)
+    self.__captains = np.zeros((64, self.__n_bands), dtype=np.int32)
+    self.__band_teams = np.zeros(self.__n_bands, dtype=np.int64)
+
+  @property
+  def n_teams(self) -> int:
+    return len(self.__teams)
+
+  @property
+  def n_players(self) -> int:
+    return len(self.__player_keys)
+
+  def __player(self, key: tuple) -> int:
+    """
+    The number of a player, adding the player if it has not been seen before. Must be called with the lock held
+    """
+    index = self.__players.get(key)
+    if index is None:
+      index = len(self.__player_keys)
+      self.__players[key] = index
+      self.__player_keys.append(key)
+      if index == len(self.__counts):
+        self.__counts = np.concatenate([self.__counts, np.zeros_like(self.__counts)])
+        self.__captains = np.concatenate([self.__captains, np.zeros_like(self.__captains)])
+    return index
+
+  def add(self, team: pd.DataFrame, rank = None):
+    """
+    Add a team to the counts. Teams that have already been added are skipped
+    Arguments:
+        team (pd.DataFrame): a team as returned by iter_teams(). A dataframe with several teams, e.g. from get_teams_from_active_round(), is added team by team
+        rank (int): the placement of the (first) team in the table, starting from 1. Defaults to the number of teams added so far plus one,
+                    which is right when the teams are added in the order of the table
+    Returns:
+        None
+    """
+    team_codes, n_teams = _codes(team[_team_columns(team)])
+    team_keys = list(team[_team_columns(team)].itertuples(index=False, name=None))
+    player_keys = list(team[PLAYER_COLUMNS].itertuples(index=False, name=None))
+    is_captain = team['SpillerKaptajn'].to_numpy(dtype=bool)
+
+    # the rows of each team, with the teams in the order they appear
+    order = np.argsort(team_codes, kind='stable')
+    starts = np.searchsorted(team_codes[order], np.arange(n_teams + 1))
+
+    with self.__lock:
+      for code in range(n_teams):
+        rows = order[starts[code]:starts[code + 1]]
+        team_key = team_keys[rows[0]]
+        if team_key in self.__teams:
+          continue
+        position = len(self.__teams) if rank is None else rank - 1 + code
+        band = int(np.searchsorted(self.__bounds, position, side='right'))
+        self.__teams.add(team_key)
+        self.__band_teams[band] += 1
+
+        for row in rows:
+          index = self.__player(player_keys[row])
+          self.__counts[index, band] += 1
+          if is_captain[row]:
+            self.__captains[index, band] += 1
+
+  def snapshot(self) -> pd.DataFrame:
+    """
+    Get the popularity of the players in the teams added so far
+    Arguments:
+        None
+    Returns:
+        A DataFrame in the same shape as calc_popularity_table() with the splits that the teams added so far fill out
+    """
+    with self.__lock:
+      n = len(self.__player_keys)
+      counts = self.__counts[:n].cumsum(axis=1)
+      captains = self.__captains[:n].cumsum(axis=1)
+      teams = self.__band_teams.cumsum()
+      players = pd.DataFrame(self.__player_keys, columns=PLAYER_COLUMNS)
+      n_teams = len(self.__teams)
+
+    splits = _valid_splits(n_teams, self.splits, verbose=False)
+    return _popularity_frame(players, counts, captains, teams, self.__bounds, splits)
@@ -0,0 +1,173 @@
+import hashlib
+import json
+import os
+import sqlite3
+import threading
+import time
+from pathlib import Path
+
+FOREVER = float('inf')
+
+class ResponseCache():
+  def __init__(self, path: str, max_bytes = 1_000_000_000):
+    """
+    An on-disk cache of responses from Holdet.dk keyed by url.
+    Response bodies are stored in files named by the sha256 of the url, and an sqlite index keeps track of
+    when each response was stored, its ETag/Last-Modified headers and when it was last used.
+    When the bodies take up more than max_bytes, the least recently used responses are evicted
+    Arguments:
+        path (str): the folder of the cache. It is created if it does not exist
+        max_bytes (int): the maximum total size of the cached bodies in bytes
+    """
+    self.path = Path(path)
+    self.path.mkdir(parents=True, exist_ok=True)
+    self.max_bytes = max_bytes
+
+    self.__lock = threading.Lock()
+    self.__db = sqlite3.connect(str(self.path / 'index.sqlite'), check_same_thread=False)
+    self.__db.execute('''CREATE TABLE IF NOT EXISTS responses (
+                           key TEXT PRIMARY KEY,
+                           url TEXT NOT NULL,
+                           size INTEGER NOT NULL,
+                           headers TEXT NOT NULL,
+                           stored_at REAL NOT NULL,
+                           last_access REAL NOT NULL)''')
+    self.__db.execute('CREATE INDEX IF NOT EXISTS responses_last_access ON responses (last_access)')
+    self.__db.commit()
+    self.__total_bytes = self.__db.execute('SELECT COALESCE(SUM(size), 0) FROM responses').fetchone()[0]
+    self.__stats = {'hits': 0, 'misses': 0, 'revalidated': 0, 'stored': 0, 'evicted': 0}
+
+  @staticmethod
+  def key(url: str) -> str:
+    return hashlib.sha256(url.encode('utf-8')).hexdigest()
+
+  def __body_path(self, key: str) -> Path:
+    return self.path / key[:2] / key
+
+  def lookup(self, url: str):
+    """
+    Look up a url in the cache
+    Arguments:
+        url (str): the url
+    Returns:
+        A dictionary with the body, headers and age in seconds of the cached response, or None if the url is not cached
+    """
+    key = self.key(url)
+    with self.__lock:
+      row = self.__db.execute('SELECT headers, stored_at FROM responses WHERE key = ?', (key,)).fetchone()
+    if row is None:
+      return None
+
+    try:
+      body = self.__body_path(key).read_bytes()
+    except FileNotFoundError:
+      self.delete(url)
+      return None
+
+    return {'body': body, 'headers': json.loads(row[0]), 'age': time.time() - row[1]}
+
+  def record(self, event: str):
+    """
+    Count a cache event. event is one of 'hits', 'misses' or 'revalidated'
+    """
+    with self.__lock:
+      self.__stats[event] += 1
+
+  def touch(self, url: str, revalidated = False):
+    """
+    Mark a cached url as used, so it is evicted later. Set revalidated to True if the server has confirmed that the cached response is still valid
+    """
+    now = time.time()
+    with self.__lock:
+      if revalidated:
+        self.__db.execute('UPDATE responses SET last_access = ?, stored_at = ? WHERE key = ?', (now, now, self.key(url)))
+      else:
+        self.__db.execute('UPDATE responses SET last_access = ? WHERE key = ?', (now, self.key(url)))
+      self.__db.commit()
+
+  def store(self, url: str, body: bytes, headers: dict):
+    """
+    Store a response in the cache and evict the least recently used responses if the cache is full
+    Arguments:
+        url (str): the url of the response
+        body (bytes): the body of the response
+        headers (dict): the headers of the response
+    Returns:
+        None
+    """
+    key = self.key(url)
+    body_path = self.__body_path(key)
+    body_path.parent.mkdir(exist_ok=True)
+    tmp_path = body_path.with_suffix(f'.{threading.get_ident()}.tmp')
+    tmp_path.write_bytes(body)
+    os.replace(tmp_path, body_path)
+
+    now = time.time()
+    with self.__lock:
+      old = self.__db.execute('SELECT size FROM responses WHERE key = ?', (key,)).fetchone()
+      self.__db.execute('INSERT OR REPLACE INTO responses VALUES (?, ?, ?, ?, ?, ?)',
+                        (key, url, len(body), json.dumps(dict(headers)), now, now))
+      self.__total_bytes += len(body) - (old[0] if old else 0)
+      self.__stats['stored'] += 1
+      self.__evict()
+      self.__db.commit()
+
+  def __evict(self):
+    """
+    Delete the least recently used responses until the cache is below max_bytes. Must be called with the lock held
+    """
+    while self.__total_bytes > self.max_bytes:
+      rows = self.__db.execute('SELECT key, size FROM responses ORDER BY last_access LIMIT 100').fetchall()
+      if not rows:
+        break
+      for key, size in rows:
+        self.__db.execute('DELETE FROM responses WHERE key = ?', (key,))
+        self.__body_path(key).unlink(missing_ok=True)
+        self.__total_bytes -= size
+        self.__stats['evicted'] += 1
+        if self.__total_bytes <= self.max_bytes:
+          break
+
+  def delete(self, url: str):
+    """
+    Remove a url from the cache
+    """
+    key = self.key(url)
+    with self.__lock:
+      row = self.__db.execute('SELECT size FROM responses WHERE key = ?', (key,)).fetchone()
+      if row is not None:
+        self.__db.execute('DELETE FROM responses WHERE key = ?', (key,))
+        self.__db.commit()
+        self.__total_bytes -= row[0]
+    self.__body_path(key).unlink(missing_ok=True)
+
+  def clear(self):
+    """
+    Remove all responses from the cache
+    """
+    with self.__lock:
+      keys = [row[0] for row in self.__db.execute('SELECT key FROM responses').fetchall()]
+      self.__db.execute('DELETE FROM responses')
+      self.__db.commit()
+      self.__total_bytes = 0
+    for key in keys:
+      self.__body_path(key).unlink(missing_ok=True)
+
+  def urls(self) -> list:
+    """
+    Get the urls in the cache
+    """
+    with self.__lock:
+      return [row[0] for row in self.__db.execute('SELECT url FROM responses ORDER BY url').fetchall()]
+
+  def stats(self) -> dict:
+    """
+    Get hit/miss statistics of the cache
+    Arguments:
+        None
+    Returns:
+        A dictionary with the number of hits, misses, revalidated responses, stored responses and evicted responses together with the number of cached responses and their total size in bytes
+    """
+    with self.__lock:
+      entries = self.__db.execute('SELECT COUNT(*) FROM responses').fetchone()[0]
+      return {**self.__stats, 'entries': entries, 'bytes': self.__total_bytes}
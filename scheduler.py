@@ -0,0 +1,147 @@
+import itertools
+import queue
+import threading
+from concurrent.futures import CancelledError, Future
+
+# lower numbers are run first
+PRIORITY_SUMMARY = 0
+PRIORITY_STANDINGS = 1
+PRIORITY_TEAMS = 2
+
+def _copy_result(source: Future, target: Future):
+  """
+  Set the result or the exception of the done future source on target
+  """
+  if source.cancelled():
+    target.set_exception(CancelledError())
+  elif source.exception() is not None:
+    target.set_exception(source.exception())
+  else:
+    target.set_result(source.result())
+
+class Scheduler():
+  def __init__(self, max_workers = 1):
+    """
+    A fixed number of worker threads shared by everything a scraper fetches, so concurrent calls and batches never send more than
+    max_workers requests at a time in total. Waiting tasks are run in the order of their priority and, within a priority, in the order
+    they were submitted, so cheap summaries and standings pages are fetched before team pages that are already waiting.
+    The workers are started on first use and run as daemon threads
+    Arguments:
+        max_workers (int): the number of worker threads
+    """
+    if max_workers < 1:
+      raise ValueError('max_workers skal være mindst 1')
+
+    self.max_workers = max_workers
+    self.__queue = queue.PriorityQueue()
+    self.__order = itertools.count()
+    self.__lock = threading.Lock()
+    self.__workers = []
+    self.__shutdown = False
+
+  def __start_workers(self):
+    # must be called with the lock held
+    while len(self.__workers) < self.max_workers:
+      worker = threading.Thread(target=self.__work, name=f'holdet-worker-{len(self.__workers)}', daemon=True)
+      worker.start()
+      self.__workers.append(worker)
+
+  def __work(self):
+    while True:
+      _, _, future, fn, args, kwargs = self.__queue.get()
+      if future is None:
+        break
+      if not future.set_running_or_notify_cancel():
+        continue
+      try:
+        result = fn(*args, **kwargs)
+      except BaseException as e:
+        future.set_exception(e)
+      else:
+        if isinstance(result, Future):
+          # the task handed its work on, e.g. with then(). Its future is done when that work is done
+          result.add_done_callback(lambda done, future=future: _copy_result(done, future))
+        else:
+          future.set_result(result)
+
+  def submit(self, fn, *args, priority = PRIORITY_TEAMS, **kwargs) -> Future:
+    """
+    Queue fn(*args, **kwargs). The task must not wait for other tasks of the scheduler, since all workers could be waiting.
+    Instead a task can return a Future, e.g. from then(), and the result of the task is then the result of that future
+    Arguments:
+        fn (function): the function to call
+        priority (int): PRIORITY_SUMMARY, PRIORITY_STANDINGS or PRIORITY_TEAMS
+    Returns:
+        A Future with the result. Cancelling it before it has started removes the task. Raises a RuntimeError after shutdown()
+    """
+    future = Future()
+    with self.__lock:
+      if self.__shutdown:
+        raise RuntimeError('Scheduleren er lukket')
+      self.__start_workers()
+      self.__queue.put((priority, next(self.__order), future, fn, args, kwargs))
+    return future
+
+  def then(self, future: Future, fn, priority = PRIORITY_TEAMS) -> Future:
+    """
+    Queue fn(future) as a task once future is done, e.g. when a page has been parsed in another process.
+    The thread that started the work does not have to wait for it, and fn can read the result or the exception of future
+    Arguments:
+        future (Future): the work to wait for
+        fn (function): the function to call with the done future
+        priority (int): PRIORITY_SUMMARY, PRIORITY_STANDINGS or PRIORITY_TEAMS
+    Returns:
+        A Future with the result of fn. A task may return it, see submit()
+    """
+    chained = Future()
+
+    def queue_task(done):
+      with self.__lock:
+        if not self.__shutdown:
+          self.__queue.put((priority, next(self.__order), chained, fn, (done,), {}))
+          return
+      # the workers are stopping, so fn is called right away
+      if chained.set_running_or_notify_cancel():
+        try:
+          chained.set_result(fn(done))
+        except BaseException as e:
+          chained.set_exception(e)
+
+    future.add_done_callback(queue_task)
+    return chained
+
+  def pending(self) -> int:
+    """
+    The number of tasks waiting for a worker
+    """
+    return self.__queue.qsize()
+
+  def shutdown(self, wait = True, cancel_futures = False):
+    """
+    Stop the worker threads. Tasks already submitted are run before the workers stop, unless cancel_futures is True.
+    Nothing can be submitted afterwards
+    Arguments:
+        wait (bool): Set to False in order to return without waiting for the workers to stop
+        cancel_futures (bool): Set to True in order to cancel the tasks that are still waiting for a worker
+    """
+    with self.__lock:
+      if self.__shutdown:
+        return
+      self.__shutdown = True
+      workers = list(self.__workers)
+
+    if cancel_futures:
+      while True:
+        try:
+          _, _, future, _, _, _ = self.__queue.get_nowait()
+        except queue.Empty:
+          break
+        future.cancel()
+
+    # one stop marker per worker, after every waiting task
+    for _ in workers:
+      self.__queue.put((float('inf'), next(self.__order), None, None, (), {}))
+    if wait:
+      for worker in workers:
+        if worker is not threading.current_thread():
+          worker.join()
@@ -0,0 +1,228 @@
+import sqlite3
+import threading
+import numpy as np
+import pandas as pd
+from popularity import PLAYER_COLUMNS, _codes, _team_columns
+
+TABLE_COLUMNS = ['Spil', 'Runde', 'Præmiepulje', 'Global', 'Spring', 'Hold', 'HoldLink', 'Manager', 'ManagerLink', 'ManagerPoints',
+                 'Værdi', 'Afstand', 'RundeVækst', 'Kaptajn', 'KaptajnVækst', 'Formation']
+TEAM_COLUMNS = ['Spil', 'Runde', 'Præmiepulje', 'Global', 'Hold', 'HoldLink', 'Formation', 'Manager', 'ManagerPoints']
+VALUE_COLUMNS = ['SpillerKaptajn', 'SpillerVærdi', 'SpillerVækst']
+
+_SCHEMA = '''
+CREATE TABLE IF NOT EXISTS tabel (
+  Spil TEXT NOT NULL, Runde INTEGER NOT NULL, "Præmiepulje" INTEGER, Global INTEGER, Spring INTEGER,
+  Hold TEXT, HoldLink TEXT, Manager TEXT, ManagerLink TEXT, ManagerPoints INTEGER,
+  "Værdi" INTEGER, Afstand INTEGER, "RundeVækst" INTEGER, Kaptajn TEXT, "KaptajnVækst" INTEGER, Formation TEXT);
+CREATE INDEX IF NOT EXISTS tabel_runde ON tabel (Spil, Runde, HoldLink);
+CREATE INDEX IF NOT EXISTS tabel_placering ON tabel ("Præmiepulje", Spil, Runde);
+CREATE INDEX IF NOT EXISTS tabel_manager ON tabel (Manager);
+CREATE INDEX IF NOT EXISTS tabel_managerlink ON tabel (ManagerLink);
+
+CREATE TABLE IF NOT EXISTS hold (
+  id INTEGER PRIMARY KEY, Spil TEXT NOT NULL, Runde INTEGER NOT NULL, "Præmiepulje" INTEGER, Global INTEGER,
+  Hold TEXT, HoldLink TEXT, Formation TEXT, Manager TEXT, ManagerPoints INTEGER);
+CREATE INDEX IF NOT EXISTS hold_runde ON hold (Spil, Runde, HoldLink);
+CREATE INDEX IF NOT EXISTS hold_placering ON hold ("Præmiepulje", Spil, Runde);
+CREATE INDEX IF NOT EXISTS hold_manager ON hold (Manager);
+
+CREATE TABLE IF NOT EXISTS spiller (
+  id INTEGER PRIMARY KEY, SpillerNavn TEXT NOT NULL, SpillerHold TEXT, SpillerPosition TEXT);
+CREATE UNIQUE INDEX IF NOT EXISTS spiller_navn ON spiller (SpillerNavn, SpillerHold, SpillerPosition);
+
+CREATE TABLE IF NOT EXISTS spillere (
+  hold_id INTEGER NOT NULL REFERENCES hold (id), nr INTEGER NOT NULL, spiller_id INTEGER NOT NULL REFERENCES spiller (id),
+  SpillerKaptajn INTEGER, "SpillerVærdi" INTEGER, "SpillerVækst" INTEGER,
+  PRIMARY KEY (hold_id, nr)) WITHOUT ROWID;
+CREATE INDEX IF NOT EXISTS spillere_spiller ON spillere (spiller_id, hold_id, SpillerKaptajn);
+'''
+
+def _quote(columns: list) -> str:
+  return ', '.join(f'"{column}"' for column in columns)
+
+def _values(df: pd.DataFrame, columns: list) -> list:
+  """
+  The values of the columns of df as lists of Python values with None for missing values and missing columns, ready for sqlite
+  """
+  df = df.reindex(columns=columns).astype(object)
+  df = df.where(df.notna(), None)
+  return [df[column].tolist() for column in columns]
+
+class HoldetStore():
+  def __init__(self, path: str):
+    """
+    An sqlite file with the tables and teams of several games and rounds, indexed for queries across rounds without scraping again.
+    The rows of the tables are stored in 'tabel' and every team of a round is a row in 'hold'. The players of the teams are rows in 'spillere'
+    that refer to the team and to the player in 'spiller' by integer ids, so queries on players use the indexes instead of comparing text on every row
+    Arguments:
+        path (str): the path of the sqlite file. It is created if it does not exist
+    """
+    self.path = path
+    self.__lock = threading.Lock()
+    self.__db = sqlite3.connect(path, check_same_thread=False)
+    # a larger page cache keeps the indexes in memory while many teams are added
+    self.__db.execute('PRAGMA cache_size = -65536')
+    self.__db.executescript(_SCHEMA)
+    self.__db.commit()
+
+  @staticmethod
+  def __check_links(df: pd.DataFrame):
+    """
+    Raise a ValueError if the rows have no HoldLink, which the indexes and team_history() rely on to tell the teams apart
+    """
+    if 'HoldLink' not in df.columns or (len(df) > 0 and df['HoldLink'].isna().all()):
+      raise ValueError('Rækkerne mangler HoldLink. Brug tabeller og hold fra get_standings_table(), get_teams_from_active_round(), '
+                       'get_teams_from_old_round() eller get_table_and_teams()')
+
+  @staticmethod
+  def __rounds(df: pd.DataFrame) -> list:
+    return list(df[['Spil', 'Runde']].drop_duplicates().astype(object).itertuples(index=False, name=None))
+
+  def add_table(self, table: pd.DataFrame):
+    """
+    Store a table. The rounds in the table replace the same rounds already in the store, while other rounds are left unchanged
+    Arguments:
+        table (pd.DataFrame): a table returned by get_standings_table() or get_table_and_teams(). A table without HoldLink raises a ValueError
+    Returns:
+        None
+    """
+    self.__check_links(table)
+    rows = list(zip(*_values(table, TABLE_COLUMNS)))
+    with self.__lock, self.__db:
+      self.__db.executemany('DELETE FROM tabel WHERE Spil = ? AND Runde = ?', self.__rounds(table))
+      self.__db.executemany(f'INSERT INTO tabel ({_quote(TABLE_COLUMNS)}) VALUES ({", ".join("?" * len(TABLE_COLUMNS))})', rows)
+      self.__db.execute('PRAGMA optimize')
+
+  def __player_ids(self, players: pd.DataFrame) -> np.ndarray:
+    """
+    The ids of the players in the spiller table, adding the players that are not there yet. Must be called with the lock held
+    Arguments:
+        players (pd.DataFrame): the player columns with one row per player
+    Returns:
+        An array with the id of each row
+    """
+    known = {tuple(row[1:]): row[0] for row in self.__db.execute('SELECT id, SpillerNavn, SpillerHold, SpillerPosition FROM spiller')}
+    keys = list(players.astype(object).itertuples(index=False, name=None))
+    new = [key for key in dict.fromkeys(keys) if key not in known]
+    next_id = max(known.values(), default=0) + 1
+    self.__db.executemany('INSERT INTO spiller VALUES (?, ?, ?, ?)', [(next_id + i,) + key for i, key in enumerate(new)])
+    known.update({key: next_id + i for i, key in enumerate(new)})
+    return np.array([known[key] for key in keys], dtype=np.int64)
+
+  def add_teams(self, teams: pd.DataFrame):
+    """
+    Store teams. The rounds in teams replace the same rounds already in the store, while other rounds are left unchanged
+    Arguments:
+        teams (pd.DataFrame): teams returned by get_teams_from_active_round(), get_teams_from_old_round() or get_table_and_teams().
+                              Teams without Præmiepulje (e.g. from get_teams_from_active_round()) are left out of queries with top.
+                              The rows may be in any order. The players of a team are stored in the order of their rows.
+                              Teams without HoldLink raise a ValueError
+    Returns:
+        None
+    """
+    self.__check_links(teams)
+    # teams are numbered in the order they first appear, and the players of a team in the order of their rows,
+    # so the rows of a team do not have to follow each other
+    team_codes, n_teams = _codes(teams[['Spil', 'Runde'] + _team_columns(teams)])
+    starts = np.flatnonzero(~pd.Series(team_codes).duplicated().to_numpy())
+    numbers = pd.Series(team_codes).groupby(team_codes).cumcount().to_numpy()
+    player_codes, _ = _codes(teams[PLAYER_COLUMNS])
+
+    with self.__lock, self.__db:
+      for game, round in self.__rounds(teams):
+        self.__db.execute('DELETE FROM spillere WHERE hold_id IN (SELECT id FROM hold WHERE Spil = ? AND Runde = ?)', (game, round))
+        self.__db.execute('DELETE FROM hold WHERE Spil = ? AND Runde = ?', (game, round))
+
+      first_id = self.__db.execute('SELECT COALESCE(MAX(id), 0) + 1 FROM hold').fetchone()[0]
+      team_ids = first_id + np.arange(n_teams)
+      self.__db.executemany(f'INSERT INTO hold (id, {_quote(TEAM_COLUMNS)}) VALUES ({", ".join("?" * (len(TEAM_COLUMNS) + 1))})',
+                            zip(team_ids.tolist(), *_values(teams.iloc[starts], TEAM_COLUMNS)))
+
+      player_ids = self.__player_ids(teams[PLAYER_COLUMNS].iloc[np.unique(player_codes, return_index=True)[1]])[player_codes]
+      self.__db.executemany(f'INSERT INTO spillere (hold_id, nr, spiller_id, {_quote(VALUE_COLUMNS)}) VALUES (?, ?, ?, ?, ?, ?)',
+                            zip(team_ids[team_codes].tolist(), numbers.tolist(), player_ids.tolist(), *_values(teams, VALUE_COLUMNS)))
+      self.__db.execute('PRAGMA optimize')
+
+  def query(self, sql: str, params = ()) -> pd.DataFrame:
+    """
+    Run an SQL query on the store, e.g. 'SELECT * FROM tabel WHERE Runde = ?'
+    Arguments:
+        sql (str): the query. The tables are 'tabel', 'hold', 'spiller' and 'spillere' (joined on spillere.hold_id = hold.id and spillere.spiller_id = spiller.id)
+        params (tuple or dict): the values of the ? (or :name) in the query
+    Returns:
+        A dataframe with the result
+    """
+    with self.__lock:
+      return pd.read_sql_query(sql, self.__db, params=params)
+
+  def rounds(self) -> pd.DataFrame:
+    """
+    Get the games and rounds in the store
+    Arguments:
+        None
+    Returns:
+        A dataframe with the number of rows in the table and the number of teams of each game and round
+    """
+    return self.query('''SELECT Spil, Runde, SUM(Tabel) AS Tabel, SUM(Hold) AS Hold FROM (
+                           SELECT Spil, Runde, COUNT(*) AS Tabel, 0 AS Hold FROM tabel GROUP BY Spil, Runde
+                           UNION ALL
+                           SELECT Spil, Runde, 0, COUNT(*) FROM hold GROUP BY Spil, Runde)
+                         GROUP BY Spil, Runde ORDER BY Spil, Runde''')
+
+  def ownership(self, player: str, top = None, game = None) -> pd.DataFrame:
+    """
+    Get the popularity of a player round by round, e.g. the ownership of a player in the top 1000 across rounds
+    Arguments:
+        player (str): the name of the player (SpillerNavn)
+        top (int): only count the teams in Top X of præmiepuljen. Defaults to None (all teams)
+        game (str): the game. Defaults to None (all games)
+    Returns:
+        A dataframe with the number of teams and the popularity percentage and captaincy popularity of the player in each game and round,
+        calculated like calc_popularity_table()
+    """
+    # only the conditions in use are added, so sqlite can pick the indexes that fit them
+    conditions = ''.join([' AND hold.Spil = :game' if game is not None else '',
+                          ' AND hold."Præmiepulje" <= :top' if top is not None else ''])
+    # with top, the teams of Top X are found first and their players are looked up (CROSS JOIN keeps that order in sqlite).
+    # Without it, the rows of the player are found first. Otherwise sqlite may scan all teams of a popular player or all teams of every round
+    if top is not None:
+      index = 'INDEXED BY hold_placering'
+      players = 'hold INDEXED BY hold_placering CROSS JOIN spillere ON spillere.hold_id = hold.id CROSS JOIN spiller ON spillere.spiller_id = spiller.id'
+    else:
+      index = ''
+      players = 'spiller JOIN spillere ON spillere.spiller_id = spiller.id JOIN hold ON spillere.hold_id = hold.id'
+    return self.query(f'''SELECT h.Spil, h.Runde, h.Hold, COALESCE(s.Antal, 0) * 1.0 / h.Hold AS "Pop%", COALESCE(s.Kaptajn, 0) * 1.0 / h.Hold AS "(C)%"
+                          FROM (SELECT Spil, Runde, COUNT(*) AS Hold FROM hold {index} WHERE 1 {conditions} GROUP BY Spil, Runde) AS h
+                          LEFT JOIN (SELECT hold.Spil, hold.Runde, COUNT(*) AS Antal, SUM(spillere.SpillerKaptajn) AS Kaptajn
+                                     FROM {players}
+                                     WHERE spiller.SpillerNavn = :player {conditions}
+                                     GROUP BY hold.Spil, hold.Runde) AS s
+                          ON s.Spil = h.Spil AND s.Runde = h.Runde
+                          ORDER BY h.Spil, h.Runde''', {'player': player, 'top': top, 'game': game})
+
+  def team_history(self, manager: str, game = None, players = False) -> pd.DataFrame:
+    """
+    Get the teams of a manager round by round
+    Arguments:
+        manager (str): the name of the manager (Manager), or the link to the manager (ManagerLink) when players is False
+        game (str): the game. Defaults to None (all games)
+        players (bool): Set to True in order to get the players of the teams instead of their rows in the tables
+    Returns:
+        A dataframe with the rows of the manager in the tables, or the players of the teams of the manager, ordered by game and round
+    """
+    if players:
+      columns = [f'hold."{column}"' for column in TEAM_COLUMNS] + [f'spiller."{column}"' for column in PLAYER_COLUMNS] + [f'spillere."{column}"' for column in VALUE_COLUMNS]
+      teams = self.query(f'''SELECT {", ".join(columns)}
+                             FROM hold JOIN spillere ON spillere.hold_id = hold.id JOIN spiller ON spillere.spiller_id = spiller.id
+                             WHERE hold.Manager = :manager {'AND hold.Spil = :game' if game is not None else ''}
+                             ORDER BY hold.Spil, hold.Runde, hold.id, spillere.nr''', {'manager': manager, 'game': game})
+      teams['SpillerKaptajn'] = teams['SpillerKaptajn'].astype(bool)
+      return teams
+
+    return self.query(f'''SELECT {_quote(TABLE_COLUMNS)} FROM tabel
+                          WHERE (Manager = :manager OR ManagerLink = :manager) {'AND Spil = :game' if game is not None else ''}
+                          ORDER BY Spil, Runde''', {'manager': manager, 'game': game})
+
+  def close(self):
+    with self.__lock:
+      self.__db.close()